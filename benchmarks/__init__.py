@@ -0,0 +1,14 @@
+'''
+Benchmarks for flet_quill's converters, serialization and save round trips.
+Run from the repo root:
+    python -m benchmarks.run --sizes 1KB,1MB --out results.json
+    python -m benchmarks.run --baseline results.json     # compare against an earlier run
+'''
+import os
+import sys
+
+# Let the benchmarks run straight from a checkout, without installing the package first
+try:
+    import flet_quill  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
@@ -0,0 +1,55 @@
+'''
+Compares the compact binary delta encoding (.qdelta) against delta json.
+Builds a synthetic formatted document, checks every encoding round trips, and prints
+the encoded size and encode/decode times.
+Run from the repo root:
+    python -m benchmarks.bench_codec
+'''
+import json
+import time
+
+from flet_quill import decode_delta, encode_delta
+
+from .corpus import make_document
+
+
+def timed(fn, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def main():
+    ops = make_document(4 * 1024 * 1024)
+
+    rows = []
+    data, encode_ms = timed(lambda: json.dumps(ops).encode("utf-8"))
+    decoded, decode_ms = timed(lambda: json.loads(data))
+    assert decoded == ops
+    rows.append(("json", len(data), encode_ms, decode_ms))
+
+    codecs = ["none", "zlib"]
+    try:
+        import zstandard  # noqa: F401
+        codecs.append("zstd")
+    except ImportError:
+        pass
+
+    for compression in codecs:
+        data, encode_ms = timed(lambda: encode_delta(ops, compression))
+        decoded, decode_ms = timed(lambda: decode_delta(data))
+        assert decoded == ops, f"{compression} didn't round trip"
+        rows.append((f"qdelta/{compression}", len(data), encode_ms, decode_ms))
+
+    json_size = rows[0][1]
+    print(f"{len(ops)} ops")
+    print(f"{'format':<14}{'bytes':>12}{'size':>8}{'encode ms':>12}{'decode ms':>12}")
+    for name, size, encode_ms, decode_ms in rows:
+        print(f"{name:<14}{size:>12}{size / json_size:>8.1%}{encode_ms:>12.1f}{decode_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
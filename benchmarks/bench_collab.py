@@ -0,0 +1,82 @@
+'''
+Simulates lots of users editing shared documents through one CollabHub.
+Every tick a share of the sessions type a little, then the hub sends out the batched updates.
+Prints how long ticks took and checks every client ended up with the server's document.
+The simulated clients' own work runs inside the ticks too, so the hub alone is faster than shown.
+Run from the repo root:
+    python -m benchmarks.bench_collab --documents 20 --sessions 10 --ticks 200
+'''
+import argparse
+import random
+import time
+
+from flet_quill import CollabClient, CollabHub, Delta
+
+
+def random_edit(rng: random.Random, length: int) -> list:
+    # Mostly typing, some deleting and formatting, like a person would
+    index = rng.randint(0, length - 1)
+    ops = [{"retain": index}] if index else []
+    room = length - 1 - index
+    roll = rng.random()
+    if roll < 0.7 or room == 0:
+        ops.append({"insert": rng.choice("etaoin shrdlu")})
+    elif roll < 0.9:
+        ops.append({"delete": rng.randint(1, min(room, 5))})
+    else:
+        ops.append({"retain": rng.randint(1, min(room, 20)), "attributes": {"bold": rng.choice([True, None])}})
+    return ops
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_collab", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20, help="Shared documents")
+    parser.add_argument("--sessions", type=int, default=10, help="Sessions per document")
+    parser.add_argument("--ticks", type=int, default=200, help="Ticks to run")
+    parser.add_argument("--active", type=float, default=0.3, help="Share of sessions typing each tick")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    hub = CollabHub()
+    clients = []
+    for d in range(args.documents):
+        hub.open(d, [{"insert": f"Shared document {d}\n" * 50}])
+        clients.extend(CollabClient(hub, d) for _ in range(args.sessions))
+
+    edits = 0
+    tick_times = []
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        tick_start = time.perf_counter()
+        for client in clients:
+            if rng.random() < args.active:
+                client.edit(random_edit(rng, client.document.length()))
+                edits += 1
+            client.flush()
+        hub.tick()
+        tick_times.append(time.perf_counter() - tick_start)
+
+    # Let everything settle
+    for _ in range(5):
+        for client in clients:
+            client.flush()
+        hub.tick()
+    total = time.perf_counter() - start
+
+    for client in clients:
+        server = Delta(hub.document(client.session.document.doc_id).ops)
+        assert client.document == server, "client didn't converge"
+
+    tick_times.sort()
+    print(f"{len(clients)} sessions on {args.documents} documents, {edits} edits in {args.ticks} ticks")
+    print(f"total {total:.2f}s, {edits / total:.0f} edits/s")
+    print(
+        f"tick ms: median {tick_times[len(tick_times) // 2] * 1000:.1f}, "
+        f"p95 {tick_times[int(len(tick_times) * 0.95)] * 1000:.1f}, max {tick_times[-1] * 1000:.1f}"
+    )
+    print("all clients converged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+'''
+Shows how much compact_delta shrinks converted documents.
+Writes a few synthetic files to a temp folder, converts each with and without compaction
+and prints the op count, json size and how long compaction took.
+Run from the repo root:
+    python -m benchmarks.bench_compact
+'''
+import json
+import os
+import tempfile
+import time
+
+from flet_quill import compact_delta, load_file_to_delta_ops
+
+
+def make_txt(path: str, lines: int = 50_000):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            f.write(f"2024-01-01 12:00:{i % 60:02d} INFO worker-{i % 8} handled request {i}\n")
+
+
+def make_md(path: str, sections: int = 2_000):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(sections):
+            f.write(f"## Section {i}\n\nSome text for section {i} with a few words in it.\n\n- one\n- two\n\n")
+
+
+def make_docx(path: str, paragraphs: int = 2_000):
+    from docx import Document
+
+    document = Document()
+    for i in range(paragraphs):
+        para = document.add_paragraph()
+        # Several runs with the same formatting, the way Word splits text on edits and spell checks
+        for word in f"paragraph {i} was typed in several runs".split():
+            para.add_run(word + " ")
+        para.add_run("bold").bold = True
+    document.save(path)
+
+
+def measure(path: str) -> dict:
+    raw = load_file_to_delta_ops(path, compact=False)
+
+    start = time.perf_counter()
+    compacted = compact_delta(raw)
+    seconds = time.perf_counter() - start
+
+    raw_bytes = len(json.dumps(raw))
+    compact_bytes = len(json.dumps(compacted))
+    return {
+        "file": os.path.basename(path),
+        "ops": len(raw),
+        "compact_ops": len(compacted),
+        "bytes": raw_bytes,
+        "compact_bytes": compact_bytes,
+        "saved": 1 - compact_bytes / raw_bytes if raw_bytes else 0.0,
+        "compact_ms": seconds * 1000,
+    }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        files = []
+        for name, make in (("log.txt", make_txt), ("wiki.md", make_md), ("report.docx", make_docx)):
+            path = os.path.join(folder, name)
+            try:
+                make(path)
+            except ImportError as e:
+                print(f"skipping {name}: {e}")
+                continue
+            files.append(path)
+
+        print(f"{'file':<14}{'ops':>10}{'compact':>10}{'bytes':>12}{'compact':>12}{'saved':>8}{'ms':>8}")
+        for path in files:
+            r = measure(path)
+            print(
+                f"{r['file']:<14}{r['ops']:>10}{r['compact_ops']:>10}{r['bytes']:>12}"
+                f"{r['compact_bytes']:>12}{r['saved']:>8.1%}{r['compact_ms']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
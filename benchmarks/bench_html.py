@@ -0,0 +1,98 @@
+'''
+Compares the single pass html converter against the BeautifulSoup one it replaced.
+Exports synthetic documents to html, converts them back with both, and prints time,
+peak memory and how much formatting survived (ops carrying attributes).
+Run from the repo root:
+    python -m benchmarks.bench_html --sizes 100KB,1MB,10MB
+'''
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from flet_quill.text_converter import delta_from_html
+from flet_quill.text_exporter import export_delta_ops
+
+from .corpus import make_document, parse_size
+
+
+# The old converter, kept here to compare against. It walks the tree once for <br> and once per
+# block tag, then flattens everything to one plain insert
+def legacy_delta_from_html(file_path: str) -> list:
+    from bs4 import BeautifulSoup
+
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        html = f.read().strip()
+    if not html:
+        return [{"insert": "\n"}]
+
+    soup = BeautifulSoup(html, "html.parser")
+    for br in soup.find_all("br"):
+        br.replace_with("\n")
+    for tag_name in ("p", "div", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr"):
+        for t in soup.find_all(tag_name):
+            t.append("\n")
+
+    text = soup.get_text()
+    lines = [ln.rstrip() for ln in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    out_lines = []
+    blank_run = 0
+    for ln in lines:
+        if ln.strip() == "":
+            blank_run += 1
+            if blank_run <= 2:
+                out_lines.append("")
+        else:
+            blank_run = 0
+            out_lines.append(ln)
+
+    full_text = "\n".join(out_lines).strip()
+    if not full_text.endswith("\n"):
+        full_text += "\n"
+    return [{"insert": full_text}]
+
+
+def measure(fn, path: str) -> dict:
+    start = time.perf_counter()
+    ops = fn(path)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        fn(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_bytes": peak, "ops": len(ops), "formatted": sum(1 for op in ops if op.get("attributes"))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_html", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100KB,1MB", help="Comma separated document sizes")
+    args = parser.parse_args(argv)
+
+    converters = [("single pass", delta_from_html)]
+    try:
+        import bs4  # noqa: F401
+        converters.append(("bs4 (old)", legacy_delta_from_html))
+    except ImportError:
+        print("beautifulsoup4 isn't installed, only timing the new converter")
+
+    print(f"{'size':>7}  {'converter':<12}{'html bytes':>12}{'ms':>10}{'peak MB':>10}{'ops':>9}{'formatted':>11}")
+    with tempfile.TemporaryDirectory() as folder:
+        for label in (s.strip() for s in args.sizes.split(",") if s.strip()):
+            path = os.path.join(folder, f"corpus_{label}.html")
+            export_delta_ops(make_document(parse_size(label)), path)
+            size = os.path.getsize(path)
+            for name, fn in converters:
+                r = measure(fn, path)
+                print(
+                    f"{label:>7}  {name:<12}{size:>12}{r['seconds'] * 1000:>10.1f}"
+                    f"{r['peak_bytes'] / 1024 / 1024:>10.1f}{r['ops']:>9}{r['formatted']:>11}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+'''
+Compares the single pass markdown converter against the markdown + BeautifulSoup one it replaced.
+Exports synthetic documents to markdown, converts them back with both, and prints time,
+peak memory and how much formatting survived (ops carrying attributes).
+Run from the repo root:
+    python -m benchmarks.bench_md --sizes 100KB,1MB,10MB
+'''
+import argparse
+import os
+import tempfile
+
+from flet_quill.text_converter import delta_from_md
+from flet_quill.text_exporter import export_delta_ops
+
+from .bench_html import measure
+from .corpus import make_document, parse_size
+
+
+# The old converter, kept here to compare against. Renders the whole file to html, parses that
+# into a tree, then only looks at the top level elements
+def legacy_delta_from_md(file_path: str) -> list:
+    import markdown
+    from bs4 import BeautifulSoup
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        md_text = f.read()
+    html = markdown.markdown(md_text, extensions=["extra", "codehilite"])
+    soup = BeautifulSoup(html, "html.parser")
+
+    ops = []
+    for element in soup.body or soup:
+        tag = element.name if element.name else None
+        if tag in {"h1", "h2", "h3", "h4", "h5", "h6"}:
+            ops.append({"insert": element.get_text(" ", strip=True) + "\n", "attributes": {"header": int(tag[1])}})
+        elif tag == "p":
+            text = element.get_text(" ", strip=True)
+            if text:
+                ops.append({"insert": text + "\n"})
+        elif tag == "li":
+            text = element.get_text(" ", strip=True)
+            if text:
+                ops.append({"insert": text + "\n", "attributes": {"list": "bullet"}})
+        elif tag == "pre":
+            code = element.get_text()
+            if code:
+                ops.append({"insert": code + "\n", "attributes": {"code-block": True}})
+        elif element.string and element.string.strip():
+            ops.append({"insert": element.string.strip() + "\n"})
+    return ops
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_md", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100KB,1MB", help="Comma separated document sizes")
+    args = parser.parse_args(argv)
+
+    converters = [("single pass", delta_from_md)]
+    try:
+        import bs4  # noqa: F401
+        import markdown  # noqa: F401
+        converters.append(("md+bs4 (old)", legacy_delta_from_md))
+    except ImportError:
+        print("markdown or beautifulsoup4 isn't installed, only timing the new converter")
+
+    print(f"{'size':>7}  {'converter':<13}{'md bytes':>11}{'ms':>10}{'peak MB':>10}{'ops':>9}{'formatted':>11}")
+    with tempfile.TemporaryDirectory() as folder:
+        for label in (s.strip() for s in args.sizes.split(",") if s.strip()):
+            path = os.path.join(folder, f"corpus_{label}.md")
+            export_delta_ops(make_document(parse_size(label)), path)
+            size = os.path.getsize(path)
+            for name, fn in converters:
+                r = measure(fn, path)
+                print(
+                    f"{label:>7}  {name:<13}{size:>11}{r['seconds'] * 1000:>10.1f}"
+                    f"{r['peak_bytes'] / 1024 / 1024:>10.1f}{r['ops']:>9}{r['formatted']:>11}"
+                )
+
+
+if __name__ == "__main__":
+    main()
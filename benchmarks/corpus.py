@@ -0,0 +1,85 @@
+'''
+Synthetic corpus for the benchmarks. Documents are generated as delta ops, then written out as
+txt/html/md/docx/pdf/rtf/json with flet_quill's own exporters, so every format holds the same text.
+'''
+from __future__ import annotations
+
+from typing import Iterable, Optional
+import os
+import random
+
+from flet_quill.text_exporter import export_delta_ops
+
+FORMATS = ["txt", "html", "md", "docx", "pdf", "rtf", "json"]
+
+_UNITS = {"B": 1, "KB": 1024, "MB": 1024 * 1024, "GB": 1024 * 1024 * 1024}
+
+_WORDS = "the quick brown fox jumps over lazy dog delta quill flet editor document".split()
+_INLINE = [None, None, None, {"bold": True}, {"italic": True}, {"bold": True, "italic": True},
+           {"link": "https://example.com"}, {"code": True}]
+_BLOCKS = [None, None, None, {"header": 2}, {"list": "bullet"}, {"list": "ordered"}, {"blockquote": True}]
+
+
+def parse_size(label: str) -> int:
+    ''' Turns a size like "100KB" or "1MB" into bytes. '''
+    label = label.strip().upper()
+    for unit in sorted(_UNITS, key=len, reverse=True):
+        if label.endswith(unit):
+            return int(float(label[: -len(unit)]) * _UNITS[unit])
+    return int(label)
+
+
+def make_document(size: int, seed: int = 1, embeds: bool = True) -> list:
+    '''
+    Delta ops with about `size` characters of text, shaped like real edits:
+    formatted runs, headers, lists, links and the odd image.
+    '''
+    rng = random.Random(seed)
+    ops = []
+    total = 0
+    while total < size:
+        for _ in range(rng.randint(1, 5)):
+            op = {"insert": " ".join(rng.choices(_WORDS, k=rng.randint(1, 12))) + " "}
+            attributes = rng.choice(_INLINE)
+            if attributes:
+                op["attributes"] = dict(attributes)
+            ops.append(op)
+            total += len(op["insert"])
+        if embeds and rng.random() < 0.01:
+            ops.append({"insert": {"image": "https://example.com/image.png"}})
+        newline = {"insert": "\n"}
+        attributes = rng.choice(_BLOCKS)
+        if attributes:
+            newline["attributes"] = dict(attributes)
+        ops.append(newline)
+        total += 1
+    return ops
+
+
+def write_corpus(
+    out_dir: str,
+    sizes: Iterable[str],
+    formats: Optional[Iterable[str]] = None,
+    seed: int = 1,
+) -> list:
+    '''
+    Writes corpus_<size>.<format> files to out_dir, reusing ones already there (big pdf/docx files are slow to make).
+    Returns [(format, size label, path)]. Formats whose exporter is missing a dependency are skipped.
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+    for label in sizes:
+        ops = None
+        for fmt in formats or FORMATS:
+            path = os.path.join(out_dir, f"corpus_{label}.{fmt}")
+            if not os.path.exists(path):
+                if ops is None:
+                    # Exported text formats can't hold images, keep the corpus the same in all of them
+                    ops = make_document(parse_size(label), seed, embeds=False)
+                try:
+                    export_delta_ops(ops, path)
+                except RuntimeError as e:
+                    print(f"skipping {fmt}: {e}")
+                    continue
+            files.append((fmt, label, path))
+    return files
@@ -0,0 +1,199 @@
+'''
+Times every converter, json (de)serialization of text_data, the .qdelta codec and the
+save event decode on the synthetic corpus, with peak memory, and writes the results to json.
+Examples:
+    python -m benchmarks.run --sizes 1KB,100KB,1MB --out results.json
+    python -m benchmarks.run --sizes 1KB,100KB,1MB --baseline results.json --threshold 1.25
+'''
+from __future__ import annotations
+
+from typing import Callable, Optional
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from flet.core.event import Event
+from flet_quill import FletQuill, compact_delta, decode_delta, encode_delta
+from flet_quill.text_converter import (
+    delta_from_docx,
+    delta_from_html,
+    delta_from_json,
+    delta_from_md,
+    delta_from_pdf,
+    delta_from_rtf,
+    delta_from_txt,
+)
+
+from .corpus import FORMATS, parse_size, write_corpus
+
+CONVERTERS = {
+    "txt": delta_from_txt,
+    "html": delta_from_html,
+    "md": delta_from_md,
+    "docx": delta_from_docx,
+    "pdf": delta_from_pdf,
+    "rtf": delta_from_rtf,
+    "json": delta_from_json,
+}
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    '''
+    Runs fn `repeat` times for the timings, then once more under tracemalloc for peak memory
+    (tracing slows things down, so it's kept out of the timed runs).
+    Only memory allocated by Python in this process is counted.
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"best_s": min(times), "mean_s": sum(times) / len(times), "peak_bytes": peak}
+
+
+def _save_event_handler(save_format: str) -> Callable[[str], None]:
+    control = FletQuill(save_method=lambda ops: None, save_format=save_format)
+    handler = control.event_handlers["save"]
+    return lambda data: handler(Event(control.uid or "", "save", data))
+
+
+def run(files: list, repeat: int, on_result: Optional[Callable[[dict], None]] = None) -> list:
+    results = []
+
+    def add(benchmark: str, fmt: str, size: str, input_bytes: int, fn: Callable[[], object]):
+        result = {"benchmark": benchmark, "format": fmt, "size": size, "input_bytes": input_bytes}
+        result.update(measure(fn, repeat))
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    save_json = _save_event_handler("json")
+    save_binary = _save_event_handler("binary")
+
+    for fmt, size, path in files:
+        file_bytes = os.path.getsize(path)
+        add("convert", fmt, size, file_bytes, lambda: CONVERTERS[fmt](path))
+
+        # The rest work on text_data itself, so only need doing once per size
+        if fmt != "json":
+            continue
+
+        text_data = delta_from_json(path)
+        data = json.dumps(text_data)
+        binary = encode_delta(text_data)
+        binary_event = base64.b64encode(binary).decode("ascii")
+
+        add("compact_delta", "delta", size, len(data), lambda: compact_delta(text_data))
+        add("json_dumps", "delta", size, len(data), lambda: json.dumps(text_data))
+        add("json_loads", "delta", size, len(data), lambda: json.loads(data))
+        add("qdelta_encode", "delta", size, len(binary), lambda: encode_delta(text_data))
+        add("qdelta_decode", "delta", size, len(binary), lambda: decode_delta(binary))
+        add("save_event", "json", size, len(data), lambda: save_json(data))
+        add("save_event", "binary", size, len(binary_event), lambda: save_binary(binary_event))
+
+    return results
+
+
+def compare(results: list, baseline: list, threshold: float, min_seconds: float = 0.001) -> list:
+    '''
+    Returns the results that got slower than baseline by more than threshold (a ratio, like 1.25).
+    Benchmarks faster than min_seconds in the baseline are skipped, their timings are mostly noise.
+    '''
+    previous = {(r["benchmark"], r["format"], r["size"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["benchmark"], result["format"], result["size"]))
+        if old is None or old["best_s"] < min_seconds:
+            continue
+        ratio = result["best_s"] / old["best_s"]
+        if ratio > threshold:
+            regressions.append(dict(result, baseline_s=old["best_s"], ratio=ratio))
+    return regressions
+
+
+def _package_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("flet-quill")
+    except Exception:
+        return "unknown"
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1KB,100KB,1MB", help="Comma separated corpus sizes, 1KB up to 100MB")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma separated formats to convert")
+    parser.add_argument("--corpus-dir", help="Folder to keep the generated corpus in (reused between runs)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark, the best one is compared")
+    parser.add_argument("--out", help="Write the results to this json file")
+    parser.add_argument("--baseline", help="Results json from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Don't compare benchmarks faster than this")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    for size in sizes:
+        parse_size(size)
+
+    # The save/codec benchmarks run on the json copy of each size
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    if "json" not in formats:
+        formats.append("json")
+
+    def print_result(r: dict):
+        print(
+            f"{r['benchmark']:<14}{r['format']:<8}{r['size']:>7}{r['input_bytes']:>13}"
+            f"{r['best_s'] * 1000:>11.1f}{r['mean_s'] * 1000:>11.1f}{r['peak_bytes'] / 1024 / 1024:>10.1f}",
+            flush=True,
+        )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = write_corpus(args.corpus_dir or temp_dir, sizes, formats)
+        print(f"{'benchmark':<14}{'format':<8}{'size':>7}{'bytes':>13}{'best ms':>11}{'mean ms':>11}{'peak MB':>10}")
+        results = run(files, max(1, args.repeat), on_result=print_result)
+
+    report = {
+        "flet_quill": _package_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_ms / 1000)
+        for r in regressions:
+            print(
+                f"REGRESSION {r['benchmark']} {r['format']} {r['size']}: "
+                f"{r['baseline_s'] * 1000:.1f}ms -> {r['best_s'] * 1000:.1f}ms ({r['ratio']:.2f}x)"
+            )
+        if regressions:
+            return 1
+        print("No regressions")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
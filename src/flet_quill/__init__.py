@@ -1 +1,12 @@
-from flet_quill.flet_quill import FletQuill
\ No newline at end of file
+from flet_quill.flet_quill import FletQuill
+from flet_quill.delta_document import DeltaDocument
+from flet_quill.text_converter import load_file_to_delta_ops, iter_delta_ops, register_converter, write_delta_ops_json
+from flet_quill.conversion_cache import ConversionCache
+from flet_quill.batch_converter import convert_many
+from flet_quill.text_exporter import export_delta_ops, export_many, register_exporter
+from flet_quill.delta import Delta, Op, compact_delta, iter_compact_delta
+from flet_quill.delta_codec import encode_delta, decode_delta, write_delta_ops_binary
+from flet_quill.metrics import add_metrics_hook, remove_metrics_hook, MetricsRecorder, opentelemetry_hook
+from flet_quill.search_index import SearchIndex
+from flet_quill.history_store import HistoryStore
+from flet_quill.collab import CollabHub, CollabDocument, CollabSession, CollabClient
\ No newline at end of file
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable, Optional
+import os
+import time
+
+from .delta_codec import BINARY_EXTENSION
+from .text_converter import iter_delta_ops, json_path_for, supported_extensions, write_delta_ops_json
+
+
+def find_convertible_files(paths: Iterable[str]) -> list:
+    '''
+    Expands a mix of files and folders into the files we can convert.
+    Folders are searched recursively for supported extensions, json and .qdelta files are skipped since they're already delta ops.
+    '''
+    delta_extensions = (".json", BINARY_EXTENSION)
+    extensions = tuple(ext for ext in supported_extensions() if ext not in delta_extensions)
+    files = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(extensions):
+                        files.append(os.path.join(root, name))
+        elif not path.lower().endswith(delta_extensions):
+            files.append(path)
+
+    return files
+
+
+# Converts one file to its .json, top level so process pool workers can pickle it
+def _convert_one(file_path: str, resume: bool) -> dict:
+    output = json_path_for(file_path)
+    result = {"path": file_path, "output": output, "ops": 0, "seconds": 0.0, "skipped": False, "error": None}
+
+    # Outputs are written with a rename, so one that's newer than its source finished converting
+    if resume:
+        try:
+            if os.path.getmtime(output) >= os.path.getmtime(file_path):
+                result["skipped"] = True
+                return result
+        except OSError:
+            pass
+
+    start = time.perf_counter()
+    try:
+        result["ops"] = write_delta_ops_json(iter_delta_ops(file_path), output)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def convert_many(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    resume: bool = True,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> list:
+    '''
+    Converts files (or folders of them) to delta ops json, saved next to each source the same way
+    FletQuill saves a converted file_path.
+    workers: size of the process pool (None uses the cpu count, 1 converts in this process)
+    resume: skip files whose .json is already newer than the source, so a crashed run can just be rerun
+    on_result: called with each file's result as it finishes
+    Returns a report entry per file: {"path", "output", "ops", "seconds", "skipped", "error"}
+    Files that would convert to the same output (a.md and a.txt) only convert the first one, the others get an error.
+    '''
+    files = list(dict.fromkeys(find_convertible_files(paths)))
+    results: dict = {}
+
+    def finished(result: dict):
+        results[result["path"]] = result
+        if on_result is not None:
+            on_result(result)
+
+    # Outputs go next to their sources, so a.md and a.txt would both write a.json. The first one listed
+    # converts, the others fail instead of overwriting it (or being skipped as already converted by resume)
+    outputs: dict = {}
+    to_convert = []
+    for file_path in files:
+        output = json_path_for(file_path)
+        first = outputs.setdefault(os.path.normcase(os.path.abspath(output)), file_path)
+        if first == file_path:
+            to_convert.append(file_path)
+        else:
+            finished({"path": file_path, "output": output, "ops": 0, "seconds": 0.0, "skipped": False,
+                      "error": f"Same output as {first}: {output}"})
+
+    if workers == 1 or len(to_convert) <= 1:
+        for file_path in to_convert:
+            finished(_convert_one(file_path, resume))
+
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_convert_one, file_path, resume) for file_path in to_convert]
+            for future in as_completed(futures):
+                finished(future.result())
+
+    # Report in the same order the files were given
+    return [results[file_path] for file_path in files]
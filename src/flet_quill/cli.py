@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import Optional
+import argparse
+import json
+import os
+import sys
+
+from .batch_converter import convert_many
+from .text_exporter import export_many
+
+
+def _convert(args) -> int:
+
+    # Print each file as it finishes so long runs show progress
+    def print_result(result: dict):
+        if args.quiet:
+            return
+        if result["error"]:
+            status = "FAILED  " + result["error"]
+        elif result["skipped"]:
+            status = "skipped (up to date)"
+        else:
+            status = f"{result['ops']} ops in {result['seconds']:.2f}s"
+        print(f"{result['path']}: {status}", flush=True)
+
+    report = convert_many(args.paths, workers=args.workers, resume=not args.no_resume, on_result=print_result)
+
+    converted = [r for r in report if not r["error"] and not r["skipped"]]
+    failed = [r for r in report if r["error"]]
+    skipped = [r for r in report if r["skipped"]]
+    print(
+        f"{len(converted)} converted, {len(skipped)} skipped, {len(failed)} failed "
+        f"in {sum(r['seconds'] for r in report):.2f}s of conversion time"
+    )
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if failed else 0
+
+
+def _export(args) -> int:
+    jobs = []
+    for json_path in args.paths:
+        out_name = os.path.splitext(os.path.basename(json_path))[0] + "." + args.to.lstrip(".")
+        jobs.append((json_path, os.path.join(args.out_dir or os.path.dirname(json_path), out_name)))
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    def print_result(result: dict):
+        if args.quiet:
+            return
+        status = "FAILED  " + result["error"] if result["error"] else f"{result['seconds']:.2f}s"
+        print(f"{result['path']} -> {result['output']}: {status}", flush=True)
+
+    report = export_many(jobs, workers=args.workers, on_result=print_result)
+    failed = [r for r in report if r["error"]]
+    print(f"{len(report) - len(failed)} exported, {len(failed)} failed")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return 1 if failed else 0
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(prog="flet-quill", description="FletQuill document tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # flet-quill convert
+    convert_parser = subparsers.add_parser(
+        "convert", help="Convert files or folders to Quill delta json, saved next to each source"
+    )
+    convert_parser.add_argument("paths", nargs="+", help="Files or folders to convert")
+    convert_parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (defaults to cpu count)")
+    convert_parser.add_argument("--no-resume", action="store_true", help="Convert files even if their .json is up to date")
+    convert_parser.add_argument("--report", help="Write the per file timing/failure report to this json file")
+    convert_parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    convert_parser.set_defaults(func=_convert)
+
+    # flet-quill export
+    export_parser = subparsers.add_parser("export", help="Export delta json files to html, md, txt, rtf, docx or pdf")
+    export_parser.add_argument("paths", nargs="+", help="Delta json or .qdelta files to export")
+    export_parser.add_argument("--to", required=True, help="Format to export to, like pdf or html")
+    export_parser.add_argument("-o", "--out-dir", help="Folder to write to (defaults to next to each json file)")
+    export_parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (defaults to cpu count)")
+    export_parser.add_argument("--report", help="Write the per file timing/failure report to this json file")
+    export_parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary")
+    export_parser.set_defaults(func=_export)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
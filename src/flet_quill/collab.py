@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+import json
+import threading
+import time
+
+from .delta import INSERT, Delta
+from .history_store import HistoryStore
+
+# Collaboration protocol (same idea as ot.js):
+#   The server numbers every change it accepts (the document revision). A client sends one change at a time,
+#   tagged with the revision it was made on ("base"), and waits for the ack before sending the next one,
+#   collecting edits made meanwhile into a buffer.
+#   The server transforms an incoming change over everything accepted since its base, applies it, and queues
+#   it for every other client. Each tick, a client's queue goes out as one message list: [revision, ops] for
+#   each remote change, and [revision, None] acking the client's own change in its place in the order.
+#   Clients transform remote changes over their unacked change and buffer before applying them.
+#   Remote changes aren't composed into one: composing can reorder an insert and a delete at the same spot,
+#   which changes how a concurrent insert there is ordered, and the clients would end up different.
+# Server changes count as happening first, so the server transforms with priority and clients without.
+
+
+class CollabDocument:
+    '''
+    A document shared by several sessions. Keeps the current document, its revision and the recent
+    changes needed to transform late arriving ones. Accepted changes go to history and on_change if given.
+    '''
+
+    def __init__(
+        self,
+        doc_id: Any,
+        ops: Optional[list] = None,
+        history: Optional[HistoryStore] = None,
+        on_change: Optional[Callable[[list, int], None]] = None,
+        max_log: int = 1000,
+    ):
+        self.doc_id = doc_id
+        self.history: Optional[HistoryStore] = history
+        self.on_change: Optional[Callable[[list, int], None]] = on_change
+        self.max_log = max_log  # changes kept for transforming, older bases get the session reset
+
+        self._lock = threading.Lock()
+        self._document = Delta(ops)
+        self._revision = 0
+        self._log: list = []        # accepted changes, the last one is self._revision
+        self._sessions: list = []
+
+        # History continues from the document we start with
+        if history is not None:
+            history.commit(self._document.to_json())
+
+    # Number of changes accepted so far
+    @property
+    def revision(self) -> int:
+        return self._revision
+
+    # Current document as delta ops
+    @property
+    def ops(self) -> list:
+        with self._lock:
+            return self._document.to_json()
+
+    @property
+    def sessions(self) -> list:
+        with self._lock:
+            return list(self._sessions)
+
+    def _join(self, session: "CollabSession") -> tuple:
+        with self._lock:
+            self._sessions.append(session)
+            return self._document.to_json(), self._revision
+
+    def _leave(self, session: "CollabSession") -> None:
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+
+    def submit(self, session: "CollabSession", ops: list, base: int) -> Optional[int]:
+        '''
+        Accepts a session's change made on revision base. Returns the change's revision, or None if base
+        was too old to transform from (the session gets reset to the current document instead).
+        Raises ValueError for a base the document never had, or a change that doesn't fit the document at base.
+        '''
+        change = Delta(ops)
+        # Retains and deletes past the end would end up in the document itself
+        covered = 0
+        for op in change.ops:
+            if op.kind != INSERT:
+                if not isinstance(op.value, int) or op.value <= 0:
+                    raise ValueError(f"Bad {op.kind} length: {op.value!r}")
+                covered += op.value
+
+        with self._lock:
+            if base > self._revision or base < 0:
+                raise ValueError(f"Change based on revision {base}, document is at {self._revision}")
+
+            log_start = self._revision - len(self._log)
+            if base < log_start:
+                ops, revision = self._document.to_json(), self._revision
+                reset = True
+            else:
+                missed = self._log[base - log_start:]
+                base_length = self._document.length() - sum(accepted.change_length() for accepted in missed)
+                if covered > base_length:
+                    raise ValueError(f"Change covers {covered} characters, the document at revision {base} has {base_length}")
+                for accepted in missed:
+                    change = accepted.transform(change, True)
+                reset = False
+
+                self._document = self._document.compose(change)
+                self._revision = revision = self._revision + 1
+                self._log.append(change)
+                if len(self._log) > 2 * self.max_log:
+                    del self._log[:-self.max_log]
+
+                # Encoded once here, every session gets the same ops list
+                change_ops = change.to_json()
+                for other in self._sessions:
+                    other._queue(revision, None if other is session else change_ops)
+
+                # Under the lock so the history gets changes in revision order
+                if self.history is not None and change.ops:
+                    self.history.append(change_ops)
+
+        if reset:
+            session.reset(ops, revision)
+            return None
+
+        if self.on_change is not None and change.ops:
+            self.on_change(change_ops, revision)
+        return revision
+
+
+class CollabSession:
+    '''
+    One client of a CollabDocument. send(messages) delivers queued updates, messages being a list of
+    [revision, ops] (or [revision, None] for the ack of this client's change). reset(ops, revision)
+    replaces the client's document when it fell too far behind.
+    '''
+
+    def __init__(
+        self,
+        hub: "CollabHub",
+        document: CollabDocument,
+        send: Callable[[list], None],
+        reset: Optional[Callable[[list, int], None]] = None,
+    ):
+        self.hub = hub
+        self.document = document
+        self._send = send
+        self._reset = reset
+        self._outbox: list = []
+
+    def submit(self, ops: list, base: int) -> Optional[int]:
+        ''' Sends this client's change (made on revision base) to the document. '''
+        return self.document.submit(self, ops, base)
+
+    def reset(self, ops: list, revision: int) -> None:
+        with self.document._lock:
+            self._outbox.clear()
+        if self._reset is not None:
+            self._reset(ops, revision)
+
+    def resync(self) -> None:
+        ''' Starts the client over from the current document, for when it sent a change the document can't take. '''
+        document = self.document
+        with document._lock:
+            ops, revision = document._document.to_json(), document._revision
+        self.reset(ops, revision)
+
+    # Called with the document lock held
+    def _queue(self, revision: int, change: Optional[list]) -> None:
+        if not self._outbox:
+            self.hub._mark_dirty(self)
+        self._outbox.append((revision, change))
+
+    def flush(self) -> None:
+        ''' Sends everything queued since the last flush as one batch. '''
+        with self.document._lock:
+            outbox, self._outbox = self._outbox, []
+        if not outbox:
+            return
+
+        self._send([[revision, change] for revision, change in outbox])
+
+
+class CollabHub:
+    '''
+    Lets several FletQuill controls (or simulated clients) edit the same documents at once.
+    Concurrent edits are merged with operational transform, and updates go out in batches every
+    tick_interval seconds, one call per client with just the changes it hasn't seen.
+    Example:
+        hub = CollabHub(tick_interval=1 / 30)
+        hub.open("notes", ops=load_file_to_delta_ops(path), history=HistoryStore(history_dir))
+        hub.start()
+        ...
+        # in each user's page
+        editor = FletQuill()
+        page.add(editor)
+        hub.attach(editor, "notes")
+        # when the page closes
+        hub.detach(editor)
+    Without start(), call tick() to send the queued updates yourself (handy in tests).
+    '''
+
+    def __init__(self, tick_interval: float = 1 / 30):
+        self.tick_interval = tick_interval
+
+        self._lock = threading.Lock()
+        self._documents: dict = {}
+        self._controls: dict = {}       # id(control) -> session
+        self._dirty: dict = {}          # sessions with queued updates (dict for insertion order)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def open(
+        self,
+        doc_id: Any,
+        ops: Optional[list] = None,
+        history: Optional[HistoryStore] = None,
+        on_change: Optional[Callable[[list, int], None]] = None,
+    ) -> CollabDocument:
+        ''' Returns the document doc_id, creating it from ops (and history/on_change) if it isn't open yet. '''
+        with self._lock:
+            document = self._documents.get(doc_id)
+            if document is None:
+                document = self._documents[doc_id] = CollabDocument(doc_id, ops, history, on_change)
+            return document
+
+    def close(self, doc_id: Any) -> None:
+        ''' Forgets a document once everyone has left it. '''
+        document = self.document(doc_id)
+        if document is None or document.sessions:
+            return
+        with self._lock:
+            if self._documents.get(doc_id) is document:
+                del self._documents[doc_id]
+
+    def document(self, doc_id: Any) -> Optional[CollabDocument]:
+        with self._lock:
+            return self._documents.get(doc_id)
+
+    def connect(
+        self,
+        doc_id: Any,
+        send: Callable[[list], None],
+        reset: Optional[Callable[[list, int], None]] = None,
+    ) -> tuple:
+        ''' Joins a client to a document. Returns (session, ops, revision), the client starts from those. '''
+        document = self.open(doc_id)
+        session = CollabSession(self, document, send, reset)
+        ops, revision = document._join(session)
+        return session, ops, revision
+
+    def disconnect(self, session: CollabSession) -> None:
+        session.document._leave(session)
+        with self._lock:
+            self._dirty.pop(session, None)
+
+    def attach(self, control, doc_id: Any) -> CollabSession:
+        ''' Connects a FletQuill control (already on a page) to a document, replacing what it shows. '''
+        def send(messages: list):
+            control.invoke_method("collab_update", {"messages": json.dumps(messages)})
+
+        def reset(ops: list, revision: int):
+            control._join_collab(session, ops, revision)
+            control.update()
+
+        session, ops, revision = self.connect(doc_id, send, reset)
+        with self._lock:
+            self._controls[id(control)] = session
+        reset(ops, revision)
+        return session
+
+    def detach(self, control) -> None:
+        with self._lock:
+            session = self._controls.pop(id(control), None)
+        if session is not None:
+            self.disconnect(session)
+            control._join_collab(None, None, 0)
+
+    def _mark_dirty(self, session: CollabSession) -> None:
+        with self._lock:
+            self._dirty[session] = None
+
+    def tick(self) -> int:
+        ''' Sends every session its queued updates. Returns how many sessions were sent to. '''
+        with self._lock:
+            sessions, self._dirty = list(self._dirty), {}
+        for session in sessions:
+            try:
+                session.flush()
+            except Exception:
+                # Client went away without detaching
+                self.disconnect(session)
+        return len(sessions)
+
+    def start(self) -> None:
+        ''' Runs tick() every tick_interval seconds on a background thread, until stop(). '''
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            next_tick = time.monotonic()
+            while not self._stop.is_set():
+                self.tick()
+                next_tick += self.tick_interval
+                self._stop.wait(max(0.0, next_tick - time.monotonic()))
+
+        self._thread = threading.Thread(target=run, name="flet_quill-collab", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.tick()
+
+
+class CollabClient:
+    '''
+    Client side of the protocol in Python, the same steps the Flutter control takes.
+    For simulating users in tests and benchmarks:
+        hub = CollabHub()
+        hub.open("doc", [{"insert": "hello\\n"}])
+        a, b = CollabClient(hub, "doc"), CollabClient(hub, "doc")
+        a.edit([{"insert": "A"}]); b.edit([{"retain": 5}, {"insert": "B"}])
+        a.flush(); b.flush(); hub.tick(); a.flush(); b.flush(); hub.tick()
+        assert a.document == b.document
+    '''
+
+    def __init__(self, hub: CollabHub, doc_id: Any):
+        self.session, ops, self.revision = hub.connect(doc_id, self.receive, self._reset)
+        self.document = Delta(ops)
+        self.outstanding: Optional[Delta] = None    # sent, waiting for the ack
+        self.pending = Delta()                      # edited since, not sent yet
+
+    def edit(self, ops: list) -> None:
+        ''' A local edit. '''
+        change = Delta(ops)
+        self.document = self.document.compose(change)
+        self.pending = self.pending.compose(change)
+
+    def flush(self) -> None:
+        ''' Sends the buffered edits, unless a change is still waiting for its ack. '''
+        if self.outstanding is None and self.pending.ops:
+            self.outstanding, self.pending = self.pending, Delta()
+            self.session.submit(self.outstanding.to_json(), self.revision)
+
+    def receive(self, messages: list) -> None:
+        for revision, ops in messages:
+            self.revision = revision
+            if ops is None:
+                self.outstanding = None
+                continue
+            change = Delta(ops)
+            if self.outstanding is not None:
+                change, self.outstanding = self.outstanding.transform(change), change.transform(self.outstanding, True)
+            if self.pending.ops:
+                change, self.pending = self.pending.transform(change), change.transform(self.pending, True)
+            self.document = self.document.compose(change)
+
+    def _reset(self, ops: list, revision: int) -> None:
+        self.document = Delta(ops)
+        self.revision = revision
+        self.outstanding = None
+        self.pending = Delta()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import Callable, Optional
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+
+
+class ConversionCache:
+    '''
+    On disk cache of converted delta ops, so reopening the same docx/pdf/etc. skips parsing.
+    Entries are keyed by the file's path, size, mtime, content hash and the converter version,
+    and stored as zlib compressed compact json. When the cache grows past max_bytes, the least
+    recently used entries are evicted.
+    Example:
+        cache = ConversionCache("/tmp/flet_quill_cache", max_bytes=256 * 1024 * 1024)
+        FletQuill(file_path=file_path, conversion_cache=cache)
+    '''
+
+    # File extension for cache entries
+    ENTRY_SUFFIX = ".delta.z"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        # Counters so we can see what the cache saves us
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Entry name -> size in bytes, and the total of those
+        self._sizes: dict = {}
+        self._total_bytes = 0
+        for name in os.listdir(cache_dir):
+            if name.endswith(self.ENTRY_SUFFIX):
+                try:
+                    size = os.path.getsize(os.path.join(cache_dir, name))
+                except OSError:
+                    continue
+                self._sizes[name] = size
+                self._total_bytes += size
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def stats(self) -> dict:
+        ''' Returns the hit/miss/eviction counters and current size of the cache. '''
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._sizes),
+            "total_bytes": self._total_bytes,
+        }
+
+    def key_for(self, file_path: str, converter_version: str) -> str:
+        ''' Builds the cache key for a file from its path, size, mtime, content hash and converter version. '''
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+
+        content_hash = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                content_hash.update(chunk)
+
+        key = f"{path}\0{st.st_size}\0{st.st_mtime_ns}\0{content_hash.hexdigest()}\0{converter_version}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> Optional[list]:
+        ''' Returns the cached delta ops for a key, or None on a miss. '''
+        name = key + self.ENTRY_SUFFIX
+        entry_path = os.path.join(self.cache_dir, name)
+
+        try:
+            with open(entry_path, "rb") as f:
+                ops = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except (OSError, ValueError, zlib.error):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch the entry so it counts as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return ops
+
+    def put(self, key: str, ops: list) -> None:
+        ''' Stores delta ops under a key, evicting old entries if we're over max_bytes. '''
+        name = key + self.ENTRY_SUFFIX
+        data = zlib.compress(json.dumps(ops, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+        # Entries bigger than the whole cache are never worth keeping
+        if len(data) > self.max_bytes:
+            return
+
+        # Write to a temp file and rename so readers never see half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(self.cache_dir, name))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._total_bytes += len(data) - self._sizes.get(name, 0)
+            self._sizes[name] = len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=name)
+
+    def get_or_convert(self, file_path: str, convert: Callable[[str], list], converter_version: str) -> list:
+        ''' Returns cached delta ops for the file, or converts it and caches the result. '''
+        key = self.key_for(file_path, converter_version)
+        ops = self.get(key)
+        if ops is None:
+            ops = convert(file_path)
+            self.put(key, ops)
+        return ops
+
+    def clear(self) -> None:
+        ''' Removes every entry from the cache. '''
+        with self._lock:
+            for name in list(self._sizes):
+                self._remove(name)
+
+    # Removes least recently used entries (oldest mtime) until we're under max_bytes. Call with the lock held
+    def _evict(self, keep: str) -> None:
+        def last_used(name: str) -> float:
+            try:
+                return os.path.getmtime(os.path.join(self.cache_dir, name))
+            except OSError:
+                return 0.0
+
+        for name in sorted(self._sizes, key=last_used):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            self._remove(name)
+            self.evictions += 1
+
+    def _remove(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+        self._total_bytes -= self._sizes.pop(name, 0)
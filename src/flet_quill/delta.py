@@ -0,0 +1,783 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Optional
+import math
+import os
+import re
+
+
+def compact_delta(ops: Iterable[dict]) -> list:
+    '''
+    Normalizes delta ops in one pass: merges neighbouring ops that share the same attributes
+    and drops ones that do nothing (empty inserts, zero length retains/deletes, empty attributes).
+    The document it describes doesn't change, it just takes fewer ops to say it.
+    Example:
+        compact_delta([{"insert": "a\\n"}, {"insert": "b\\n"}])  # [{"insert": "a\\nb\\n"}]
+    '''
+    return list(iter_compact_delta(ops))
+
+
+def iter_compact_delta(ops: Iterable[dict], max_length: Optional[int] = None) -> Iterator[dict]:
+    '''
+    Streaming version of compact_delta, for ops coming from iter_delta_ops.
+    max_length: stop merging text into an insert once it's this long, so streamed inserts stay bounded.
+    '''
+
+    # The op we're merging into: its kind ("insert", "retain" or "delete"), attributes,
+    # and its text pieces (joined once at the end instead of re-concatenating) or length
+    kind = None
+    attributes = None
+    pieces: list = []
+    length = 0
+
+    for op in ops:
+        if "insert" in op:
+            insert = op["insert"]
+
+            # Embeds (images, videos...) never merge, they go straight through
+            if not isinstance(insert, str):
+                if kind is not None:
+                    yield _build_op(kind, attributes, pieces, length)
+                    kind = None
+                embed = {"insert": insert}
+                embed_attributes = _clean_attributes(op.get("attributes"), keep_null=False)
+                if embed_attributes:
+                    embed["attributes"] = embed_attributes
+                yield embed
+                continue
+
+            if not insert:
+                continue
+            op_kind, op_length = "insert", len(insert)
+
+        elif "retain" in op:
+            op_kind, op_length = "retain", op["retain"]
+        elif "delete" in op:
+            op_kind, op_length = "delete", op["delete"]
+        else:
+            continue
+
+        if not op_length:
+            continue
+
+        # Removing an attribute only means something on a retain
+        op_attributes = None if op_kind == "delete" else \
+            _clean_attributes(op.get("attributes"), keep_null=op_kind == "retain")
+
+        if kind == op_kind and attributes == op_attributes and (max_length is None or length < max_length):
+            if kind == "insert":
+                pieces.append(insert)
+            length += op_length
+            continue
+
+        if kind is not None:
+            yield _build_op(kind, attributes, pieces, length)
+        kind, attributes, length = op_kind, op_attributes, op_length
+        pieces = [insert] if kind == "insert" else []
+
+    # A plain retain at the very end doesn't change anything
+    if kind is not None and not (kind == "retain" and not attributes):
+        yield _build_op(kind, attributes, pieces, length)
+
+
+def _build_op(kind: str, attributes: Optional[dict], pieces: list, length: int) -> dict:
+    op: dict = {"insert": pieces[0] if len(pieces) == 1 else "".join(pieces)} if kind == "insert" else {kind: length}
+    if attributes:
+        op["attributes"] = attributes
+    return op
+
+
+# Drops empty attribute dicts, and None values outside of retains (where they'd have nothing to remove)
+def _clean_attributes(attributes: Optional[dict], keep_null: bool) -> Optional[dict]:
+    if not attributes:
+        return None
+    if not keep_null and any(value is None for value in attributes.values()):
+        attributes = {key: value for key, value in attributes.items() if value is not None}
+    return attributes or None
+
+
+# Lengths and offsets count UTF-16 code units like the editor (Dart strings) does, so a character outside
+# the BMP (most emoji) is 2 long. Python strings count code points, these convert between the two
+_ASTRAL = re.compile("[\U00010000-\U0010ffff]")
+
+
+def utf16_length(text: str) -> int:
+    ''' Length of text in UTF-16 code units, the way the editor counts it. '''
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le", "surrogatepass")) // 2
+
+
+def utf16_slice(text: str, start: int, end: Optional[int] = None) -> str:
+    ''' text[start:end] with start and end in UTF-16 code units. Cutting a surrogate pair leaves its halves as lone surrogates. '''
+    if text.isascii():
+        return text[start:end]
+    data = text.encode("utf-16-le", "surrogatepass")
+    if len(data) == 2 * len(text):
+        return text[start:end]
+    return data[2 * start:None if end is None else 2 * end].decode("utf-16-le", "surrogatepass")
+
+
+def utf16_units(text: str) -> str:
+    ''' text with each character outside the BMP split into its two surrogates, so str indexes are UTF-16 offsets. '''
+    if text.isascii():
+        return text
+    return _ASTRAL.sub(_split_surrogates, text)
+
+
+def _split_surrogates(match) -> str:
+    code_point = ord(match.group()) - 0x10000
+    return chr(0xD800 + (code_point >> 10)) + chr(0xDC00 + (code_point & 0x3FF))
+
+
+# Joins two inserts, putting a surrogate pair split between them back together
+def _join_text(a: str, b: str) -> str:
+    text = a + b
+    if a and b and "\ud800" <= a[-1] <= "\udbff" and "\udc00" <= b[0] <= "\udfff":
+        text = text.encode("utf-16-le", "surrogatepass").decode("utf-16-le", "surrogatepass")
+    return text
+
+
+# Op kinds, also the key they use in delta json
+INSERT = "insert"
+RETAIN = "retain"
+DELETE = "delete"
+
+# Length of "nothing left" in an op iterator
+_INFINITY = float("inf")
+
+
+class Op:
+    '''
+    A single delta op. kind is INSERT, RETAIN or DELETE, value is the inserted text (or embed dict)
+    or the retain/delete length. Lengths are in UTF-16 code units, like the editor's. Ops are shared between deltas, so treat them (and their attributes) as read only.
+    '''
+
+    __slots__ = ("kind", "value", "attributes", "length")
+
+    def __init__(self, kind: str, value, attributes: Optional[dict] = None):
+        self.kind = kind
+        self.value = value
+        self.attributes = attributes or None
+
+        # Stored since the compose/transform loops ask for it constantly
+        if kind == INSERT:
+            self.length = utf16_length(value) if isinstance(value, str) else 1
+        else:
+            self.length = value
+
+    @classmethod
+    def from_json(cls, op: dict) -> "Op":
+        if "insert" in op:
+            return cls(INSERT, op["insert"], op.get("attributes"))
+        if "retain" in op:
+            return cls(RETAIN, op["retain"], op.get("attributes"))
+        if "delete" in op:
+            return cls(DELETE, op["delete"])
+        raise ValueError(f"Not a delta op: {op!r}")
+
+    def to_json(self) -> dict:
+        op = {self.kind: self.value}
+        if self.attributes:
+            op["attributes"] = dict(self.attributes)
+        return op
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Op) and self.kind == other.kind and self.value == other.value \
+            and self.attributes == other.attributes
+
+    def __repr__(self) -> str:
+        return f"Op({self.kind!r}, {self.value!r}, {self.attributes!r})"
+
+
+class Delta:
+    '''
+    Quill delta with the same operations as the javascript quill-delta library, so documents and
+    changes can be edited, merged and diffed on the server.
+    A delta is either a document (only inserts) or a change (inserts, retains and deletes).
+    Example:
+        doc = Delta(editor.text_data)
+        change = Delta().retain(6).delete(5).insert("there")
+        doc = doc.compose(change)
+        undo = change.invert(Delta(editor.text_data))
+    '''
+
+    __slots__ = ("ops",)
+
+    def __init__(self, ops: Optional[Iterable] = None):
+        self.ops: list = [op if isinstance(op, Op) else Op.from_json(op) for op in ops] if ops else []
+
+    @classmethod
+    def from_json(cls, ops: Iterable[dict]) -> "Delta":
+        return cls(ops)
+
+    # Wraps a list of Ops without checking or copying it
+    @classmethod
+    def _wrap(cls, ops: list) -> "Delta":
+        delta = cls.__new__(cls)
+        delta.ops = ops
+        return delta
+
+    def to_json(self) -> list:
+        ''' Returns the delta as delta ops (list of dicts). '''
+        return [op.to_json() for op in self.ops]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Delta) and self.ops == other.ops
+
+    def __repr__(self) -> str:
+        return f"Delta({self.to_json()!r})"
+
+    # Building
+
+    def insert(self, value, attributes: Optional[dict] = None) -> "Delta":
+        ''' Appends an insert of text (or an embed dict). '''
+        if isinstance(value, str) and not value:
+            return self
+        return self.push(Op(INSERT, value, attributes))
+
+    def retain(self, length: int, attributes: Optional[dict] = None) -> "Delta":
+        ''' Appends a retain, with attributes to format the retained range (None values remove a format). '''
+        if length <= 0:
+            return self
+        return self.push(Op(RETAIN, length, attributes))
+
+    def delete(self, length: int) -> "Delta":
+        if length <= 0:
+            return self
+        return self.push(Op(DELETE, length))
+
+    def push(self, op: Op) -> "Delta":
+        ''' Appends an op, merging it into the previous one when they can be, and keeping inserts before deletes. '''
+        ops = self.ops
+        index = len(ops)
+        if index:
+            last = ops[index - 1]
+            if op.kind == DELETE and last.kind == DELETE:
+                ops[index - 1] = Op(DELETE, last.value + op.value)
+                return self
+
+            # An insert right after a delete means the same thing before it, which is the normal form
+            if last.kind == DELETE and op.kind == INSERT:
+                index -= 1
+                if index == 0:
+                    ops.insert(0, op)
+                    return self
+                last = ops[index - 1]
+
+            if op.attributes == last.attributes:
+                if op.kind == INSERT and last.kind == INSERT \
+                        and isinstance(op.value, str) and isinstance(last.value, str):
+                    ops[index - 1] = Op(INSERT, _join_text(last.value, op.value), last.attributes)
+                    return self
+                if op.kind == RETAIN and last.kind == RETAIN:
+                    ops[index - 1] = Op(RETAIN, last.value + op.value, last.attributes)
+                    return self
+
+        if index == len(ops):
+            ops.append(op)
+        else:
+            ops.insert(index, op)
+        return self
+
+    def chop(self) -> "Delta":
+        ''' Drops a trailing plain retain, which changes nothing. '''
+        if self.ops and self.ops[-1].kind == RETAIN and not self.ops[-1].attributes:
+            self.ops.pop()
+        return self
+
+    def concat(self, other: "Delta") -> "Delta":
+        delta = Delta._wrap(list(self.ops))
+        if other.ops:
+            delta.push(other.ops[0])
+            delta.ops.extend(other.ops[1:])
+        return delta
+
+    # Measuring
+
+    def length(self) -> int:
+        ''' Length of the document, or of the range a change covers. '''
+        return sum(op.length for op in self.ops)
+
+    def change_length(self) -> int:
+        ''' How much a change grows (or shrinks) the document it's applied to. '''
+        total = 0
+        for op in self.ops:
+            if op.kind == INSERT:
+                total += op.length
+            elif op.kind == DELETE:
+                total -= op.value
+        return total
+
+    def slice(self, start: int = 0, end: Optional[int] = None) -> "Delta":
+        ''' Returns the ops covering [start, end), splitting ops at the edges. '''
+        end = _INFINITY if end is None else end
+        ops = []
+        it = _OpIterator(self.ops)
+        index = 0
+        while index < end and it.has_next():
+            if index < start:
+                op = it.next(start - index)
+            else:
+                op = it.next(end - index)
+                ops.append(op)
+            index += op.length
+        return Delta._wrap(ops)
+
+    # Operations
+
+    def compose(self, other: "Delta") -> "Delta":
+        ''' Returns a delta doing this, then other. Composing a change onto a document applies it. '''
+        this_iter = _OpIterator(self.ops)
+        other_iter = _OpIterator(other.ops)
+        ops = []
+
+        # A change starting with a plain retain leaves our leading inserts alone, take them as they are.
+        # Edits are usually a retain to the cursor and a small change, so this is where most of the time goes
+        first = other_iter.peek()
+        if first is not None and first.kind == RETAIN and not first.attributes:
+            first_left = first.value
+            this_ops = self.ops
+            index = 0
+            for op in this_ops:
+                if op.kind != INSERT or op.length > first_left:
+                    break
+                first_left -= op.length
+                index += 1
+            ops = this_ops[:index]
+            this_iter.index = index
+            if first.value - first_left > 0:
+                other_iter.next(first.value - first_left)
+
+        delta = Delta._wrap(ops)
+        while this_iter.has_next() or other_iter.has_next():
+            if other_iter.peek_kind() == INSERT:
+                delta.push(other_iter.next())
+            elif this_iter.peek_kind() == DELETE:
+                delta.push(this_iter.next())
+            else:
+                length = min(this_iter.peek_length(), other_iter.peek_length())
+                this_op = this_iter.next(length)
+                other_op = other_iter.next(length)
+                if other_op.kind == RETAIN:
+                    keep_null = this_op.kind == RETAIN
+                    attributes = compose_attributes(this_op.attributes, other_op.attributes, keep_null)
+                    new_op = Op(RETAIN, length, attributes) if keep_null else Op(INSERT, this_op.value, attributes)
+                    delta.push(new_op)
+
+                    # Change is used up and the rest of us is untouched, copy it over in one go
+                    if not other_iter.has_next() and delta.ops[-1] == new_op:
+                        return delta.concat(Delta._wrap(this_iter.rest())).chop()
+
+                # Deleting something we inserted cancels out, deleting a retain stays a delete
+                elif other_op.kind == DELETE and this_op.kind == RETAIN:
+                    delta.push(other_op)
+
+        return delta.chop()
+
+    def transform(self, other: "Delta", priority: bool = False) -> "Delta":
+        '''
+        Rewrites other (a change made at the same time as this one) to apply after this one.
+        priority: True if this change happened first, which decides who goes first when both insert at the same spot.
+        '''
+        this_iter = _OpIterator(self.ops)
+        other_iter = _OpIterator(other.ops)
+        delta = Delta()
+        while this_iter.has_next() or other_iter.has_next():
+            if this_iter.peek_kind() == INSERT and (priority or other_iter.peek_kind() != INSERT):
+                delta.retain(this_iter.next().length)
+            elif other_iter.peek_kind() == INSERT:
+                delta.push(other_iter.next())
+            else:
+                length = min(this_iter.peek_length(), other_iter.peek_length())
+                this_op = this_iter.next(length)
+                other_op = other_iter.next(length)
+
+                # Our delete already removed what other deletes or retains
+                if this_op.kind == DELETE:
+                    continue
+                if other_op.kind == DELETE:
+                    delta.push(other_op)
+                else:
+                    delta.retain(length, transform_attributes(this_op.attributes, other_op.attributes, priority))
+        return delta.chop()
+
+    def transform_position(self, index: int, priority: bool = False) -> int:
+        ''' Moves a cursor position through this change. '''
+        it = _OpIterator(self.ops)
+        offset = 0
+        while it.has_next() and offset <= index:
+            length = it.peek_length()
+            kind = it.peek_kind()
+            it.next()
+            if kind == DELETE:
+                index -= min(length, index - offset)
+                continue
+            if kind == INSERT and (offset < index or not priority):
+                index += length
+            offset += length
+        return index
+
+    def invert(self, base: "Delta") -> "Delta":
+        ''' Returns the change that undoes this one, given the document (base) it was applied to. '''
+        inverted = Delta()
+        base_index = 0
+        for op in self.ops:
+            if op.kind == INSERT:
+                inverted.delete(op.length)
+            elif op.kind == RETAIN and not op.attributes:
+                inverted.retain(op.value)
+                base_index += op.value
+            else:
+                length = op.value
+                for base_op in base.slice(base_index, base_index + length).ops:
+                    if op.kind == DELETE:
+                        inverted.push(base_op)
+                    else:
+                        inverted.retain(base_op.length, invert_attributes(op.attributes, base_op.attributes))
+                base_index += length
+        return inverted.chop()
+
+    def diff(self, other: "Delta") -> "Delta":
+        ''' Returns the change that turns this document into other. Both must be documents (only inserts). '''
+        if self.ops is other.ops:
+            return Delta()
+
+        texts = []
+        for delta in (self, other):
+            pieces = []
+            for op in delta.ops:
+                if op.kind != INSERT:
+                    raise ValueError("diff() needs documents, not changes")
+                # Embeds stand in as a character that can't appear in text
+                pieces.append(op.value if isinstance(op.value, str) else "\0")
+            texts.append(utf16_units("".join(pieces)))
+
+        this_iter = _OpIterator(self.ops)
+        other_iter = _OpIterator(other.ops)
+        result = Delta()
+        for kind, length in _diff_text(texts[0], texts[1]):
+            while length > 0:
+                if kind == INSERT:
+                    op_length = min(other_iter.peek_length(), length)
+                    result.push(other_iter.next(op_length))
+                elif kind == DELETE:
+                    op_length = min(length, this_iter.peek_length())
+                    this_iter.next(op_length)
+                    result.delete(op_length)
+                else:
+                    op_length = min(this_iter.peek_length(), other_iter.peek_length(), length)
+                    this_op = this_iter.next(op_length)
+                    other_op = other_iter.next(op_length)
+                    if this_op.value == other_op.value:
+                        result.retain(op_length, diff_attributes(this_op.attributes, other_op.attributes))
+                    else:
+                        result.push(other_op).delete(op_length)
+                length -= op_length
+        return result.chop()
+
+
+class _OpIterator:
+    ''' Walks a list of ops, handing out pieces of a given length. Past the end it hands out infinite retains. '''
+
+    __slots__ = ("ops", "index", "offset")
+
+    def __init__(self, ops: list):
+        self.ops = ops
+        self.index = 0
+        self.offset = 0
+
+    def has_next(self) -> bool:
+        return self.index < len(self.ops)
+
+    def peek(self) -> Optional[Op]:
+        return self.ops[self.index] if self.index < len(self.ops) else None
+
+    def peek_length(self):
+        if self.index < len(self.ops):
+            return self.ops[self.index].length - self.offset
+        return _INFINITY
+
+    def peek_kind(self) -> str:
+        if self.index < len(self.ops):
+            return self.ops[self.index].kind
+        return RETAIN
+
+    def next(self, length=_INFINITY) -> Op:
+        if self.index >= len(self.ops):
+            return Op(RETAIN, _INFINITY)
+
+        op = self.ops[self.index]
+        offset = self.offset
+        remaining = op.length - offset
+        if length >= remaining:
+            length = remaining
+            self.index += 1
+            self.offset = 0
+            # The whole op, no need for a copy
+            if offset == 0:
+                return op
+        else:
+            self.offset += length
+
+        if op.kind == INSERT:
+            if isinstance(op.value, str):
+                # Only text with characters outside the BMP needs slicing by UTF-16 units
+                value = op.value
+                if len(value) == op.length:
+                    return Op(INSERT, value[offset:offset + length], op.attributes)
+                return Op(INSERT, utf16_slice(value, offset, offset + length), op.attributes)
+            return op
+        return Op(op.kind, length, op.attributes)
+
+    def rest(self) -> list:
+        ''' Returns the ops that haven't been handed out yet. '''
+        if not self.has_next():
+            return []
+        if self.offset == 0:
+            return self.ops[self.index:]
+        head = self.next()
+        return [head] + self.ops[self.index:]
+
+
+def compose_attributes(a: Optional[dict], b: Optional[dict], keep_null: bool = False) -> Optional[dict]:
+    ''' Attributes b applied over a. None values in b remove the attribute (kept as None when keep_null). '''
+    if not b:
+        return a or None
+    attributes = dict(b) if keep_null else {key: value for key, value in b.items() if value is not None}
+    if a:
+        for key, value in a.items():
+            if key not in b:
+                attributes[key] = value
+    return attributes or None
+
+
+def transform_attributes(a: Optional[dict], b: Optional[dict], priority: bool = False) -> Optional[dict]:
+    ''' Attributes b rewritten to apply after a. With priority, a wins where both set the same attribute. '''
+    if not a:
+        return b or None
+    if not b:
+        return None
+    if not priority:
+        return b
+    return {key: value for key, value in b.items() if key not in a} or None
+
+
+def invert_attributes(attributes: Optional[dict], base: Optional[dict]) -> Optional[dict]:
+    ''' Attributes that undo applying attributes over base. '''
+    attributes = attributes or {}
+    base = base or {}
+    inverted = {key: value for key, value in base.items() if key in attributes and attributes[key] != value}
+    for key, value in attributes.items():
+        if key not in base and value is not None:
+            inverted[key] = None
+    return inverted or None
+
+
+def diff_attributes(a: Optional[dict], b: Optional[dict]) -> Optional[dict]:
+    ''' Attributes that turn a into b, None for ones b doesn't have. '''
+    a = a or {}
+    b = b or {}
+    attributes = {}
+    for key in a.keys() | b.keys():
+        if a.get(key) != b.get(key) or (key in a) != (key in b):
+            attributes[key] = b.get(key)
+    return attributes or None
+
+
+# Most steps one diff takes (about a second). Past that, changed stretches are replaced whole
+# (a delete and an insert) instead of diffed finer
+DIFF_MAX_STEPS = 2_000_000
+
+# Middles longer than this (both sides together) are diffed line by line first, then by character
+# only inside the lines that changed
+_DIFF_LINE_MODE = 1000
+
+
+# Character diff of two strings as [(kind, length)], kind being INSERT, DELETE or RETAIN for equal runs.
+# Myers' O(ND) diff, in linear space (the middle snake version), on lines and then characters
+def _diff_text(a: str, b: str) -> list:
+    result: list = []
+    _diff_into(a, b, result, True, [DIFF_MAX_STEPS])
+    return result
+
+
+def _push_edit(result: list, kind: str, length: int) -> None:
+    if length <= 0:
+        return
+    if result and result[-1][0] == kind:
+        result[-1] = (kind, result[-1][1] + length)
+    else:
+        result.append((kind, length))
+
+
+# budget is [steps left], shared by everything one diff does
+def _diff_into(a: str, b: str, result: list, lines: bool, budget: list) -> None:
+    # Edits are usually in one spot, so take the common start and end off first
+    prefix = len(os.path.commonprefix([a, b]))
+    a, b = a[prefix:], b[prefix:]
+    suffix = len(os.path.commonprefix([a[::-1], b[::-1]])) if a and b else 0
+    if suffix:
+        a, b = a[:-suffix], b[:-suffix]
+    _push_edit(result, RETAIN, prefix)
+
+    if not a or not b:
+        _push_edit(result, DELETE, len(a))
+        _push_edit(result, INSERT, len(b))
+    elif lines and len(a) + len(b) > _DIFF_LINE_MODE and ("\n" in a or "\n" in b):
+        _diff_lines(a, b, result, budget)
+    else:
+        edits = _myers(a, b, budget)
+        if edits is None:
+            _push_edit(result, DELETE, len(a))
+            _push_edit(result, INSERT, len(b))
+        else:
+            for kind, length in edits:
+                _push_edit(result, kind, length)
+
+    _push_edit(result, RETAIN, suffix)
+
+
+# Diffs whole lines (each one stood in for by one character), then each changed run of lines by character
+def _diff_lines(a: str, b: str, result: list, budget: list) -> None:
+    codes: dict = {}
+    a_lines = a.splitlines(keepends=True)
+    b_lines = b.splitlines(keepends=True)
+    a_codes = "".join(chr(codes.setdefault(line, len(codes))) for line in a_lines)
+    b_codes = "".join(chr(codes.setdefault(line, len(codes))) for line in b_lines)
+    edits = _myers(a_codes, b_codes, budget) if len(codes) <= 0x10FFFF else None
+    if edits is None:
+        edits = [(DELETE, len(a_lines)), (INSERT, len(b_lines))]
+
+    i = j = 0
+    deleted: list = []
+    inserted: list = []
+    for kind, count in edits + [(RETAIN, 0)]:
+        if kind != RETAIN:
+            if kind == DELETE:
+                deleted.extend(a_lines[i:i + count])
+                i += count
+            else:
+                inserted.extend(b_lines[j:j + count])
+                j += count
+            continue
+        if deleted or inserted:
+            _diff_into("".join(deleted), "".join(inserted), result, False, budget)
+            deleted, inserted = [], []
+        _push_edit(result, RETAIN, sum(len(line) for line in a_lines[i:i + count]))
+        i += count
+        j += count
+
+
+# Myers diff of two strings. Returns [(kind, length)], or None if the budget ran out
+def _myers(a: str, b: str, budget: list) -> Optional[list]:
+    result: list = []
+    try:
+        _myers_into(a, b, result, budget)
+    except _DiffTooCostly:
+        return None
+    return result
+
+
+class _DiffTooCostly(Exception):
+    pass
+
+
+def _myers_into(a: str, b: str, result: list, budget: list) -> None:
+    prefix = len(os.path.commonprefix([a, b]))
+    a, b = a[prefix:], b[prefix:]
+    suffix = len(os.path.commonprefix([a[::-1], b[::-1]])) if a and b else 0
+    if suffix:
+        a, b = a[:-suffix], b[:-suffix]
+    _push_edit(result, RETAIN, prefix)
+
+    if not a or not b:
+        _push_edit(result, DELETE, len(a))
+        _push_edit(result, INSERT, len(b))
+    else:
+        split = _middle_snake(a, b, budget)
+        if split is None:
+            _push_edit(result, DELETE, len(a))
+            _push_edit(result, INSERT, len(b))
+        else:
+            x, y = split
+            _myers_into(a[:x], b[:y], result, budget)
+            _myers_into(a[x:], b[y:], result, budget)
+
+    _push_edit(result, RETAIN, suffix)
+
+
+# Finds where the shortest edit script crosses the middle, searching from both ends at once.
+# Returns the (x, y) to split a and b at, or None if they have nothing in common.
+# Raises _DiffTooCostly when the budget runs out
+def _middle_snake(a: str, b: str, budget: list) -> Optional[tuple]:
+    n, m = len(a), len(b)
+    max_d = (n + m + 1) // 2
+
+    # Rounds cost 2d + 2, so the budget runs out before d gets past its square root
+    limit = min(max_d, math.isqrt(max(budget[0], 0)) + 1)
+    offset = limit + 1
+    size = 2 * limit + 3
+    v1 = [-1] * size
+    v2 = [-1] * size
+    v1[offset + 1] = 0
+    v2[offset + 1] = 0
+    delta = n - m
+    front = delta % 2 != 0
+
+    # Diagonals that ran off the edge of the grid are skipped from then on
+    k1_start = k1_end = k2_start = k2_end = 0
+    for d in range(max_d):
+        # Each round looks at up to 2d + 2 diagonals, the snakes they follow are counted as they go
+        budget[0] -= 2 * d + 2
+        if budget[0] < 0 or d >= limit:
+            raise _DiffTooCostly()
+
+        # Forward from the start
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            start = x1
+            while x1 < n and y1 < m and a[x1] == b[y1]:
+                x1 += 1
+                y1 += 1
+            budget[0] -= x1 - start
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif front:
+                k2_offset = offset + delta - k1
+                if 0 <= k2_offset < size and v2[k2_offset] != -1 and x1 >= n - v2[k2_offset]:
+                    return x1, y1
+
+        # Backward from the end
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            start = x2
+            while x2 < n and y2 < m and a[n - x2 - 1] == b[m - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            budget[0] -= x2 - start
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not front:
+                k1_offset = offset + delta - k2
+                if 0 <= k1_offset < size and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    if x1 >= n - x2:
+                        return x1, offset + x1 - k1_offset
+    return None
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+import json
+import os
+import tempfile
+import zlib
+
+# Compact binary encoding of delta ops (.qdelta files), a lot smaller than delta json and faster to read.
+#
+# Layout: b"QDLT", format version (1 byte), compression (1 byte: 0 none, 1 zlib, 2 zstd), then the body
+# (compressed as a whole). All numbers in the body are unsigned LEB128 varints.
+#   attribute count, then each distinct attribute set once: byte length + compact json
+#   op count, then each op: kind (0 text, 1 embed, 2 retain, 3 delete),
+#       attribute set (0 for none, otherwise its index + 1, not written for deletes),
+#       then text (byte length + utf-8), embed (byte length + json), or the retain/delete length
+# The Flutter control reads and writes the same format (see flet_quill.dart), except zstd.
+
+MAGIC = b"QDLT"
+FORMAT_VERSION = 1
+BINARY_EXTENSION = ".qdelta"
+
+_COMPRESSION_CODES = {None: 0, "none": 0, "zlib": 1, "zstd": 2}
+
+_TEXT, _EMBED, _RETAIN, _DELETE = 0, 1, 2, 3
+
+
+def _import_zstd():
+    try:
+        import zstandard  # type: ignore
+    except ImportError as e:
+        raise RuntimeError(
+            "zstd compressed deltas require 'zstandard'. Install: pip install zstandard"
+        ) from e
+    return zstandard
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_bytes(out: bytearray, data: bytes) -> None:
+    _write_varint(out, len(data))
+    out += data
+
+
+def encode_delta(ops: Iterable[dict], compression: Optional[str] = "zlib", level: int = 6) -> bytes:
+    '''
+    Encodes delta ops to the compact binary format.
+    compression: "zlib" (default), "zstd" (needs the zstandard package) or None
+    Example:
+        data = encode_delta(editor.text_data)
+        ops = decode_delta(data)
+    '''
+    if compression not in _COMPRESSION_CODES:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    # Attribute sets repeat a lot (every bold run, every list line), so each one is stored once.
+    # They're looked up by their items when those are hashable, which skips a json.dumps per op.
+    # The value types are part of the key, True == 1 == 1.0 would otherwise share an entry
+    attribute_index: dict = {}
+    attribute_table: list = []
+    body = bytearray()
+    count = 0
+
+    for op in ops:
+        attributes = op.get("attributes")
+        ref = 0
+        if attributes:
+            try:
+                lookup = tuple((key, value.__class__, value) for key, value in attributes.items())
+                ref = attribute_index.get(lookup)
+            except TypeError:
+                lookup = json.dumps(attributes, sort_keys=True)
+                ref = attribute_index.get(lookup)
+            if ref is None:
+                attribute_table.append(json.dumps(attributes, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+                ref = attribute_index[lookup] = len(attribute_table)
+
+        if "insert" in op:
+            insert = op["insert"]
+            if isinstance(insert, str):
+                encoded = insert.encode("utf-8")
+                length = len(encoded)
+                # Most refs and lengths fit in one varint byte
+                if ref < 0x80 and length < 0x80:
+                    body += bytes((_TEXT, ref, length))
+                else:
+                    body.append(_TEXT)
+                    _write_varint(body, ref)
+                    _write_varint(body, length)
+                body += encoded
+            else:
+                body.append(_EMBED)
+                _write_varint(body, ref)
+                _write_bytes(body, json.dumps(insert, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        elif "retain" in op:
+            body.append(_RETAIN)
+            _write_varint(body, ref)
+            _write_varint(body, op["retain"])
+        elif "delete" in op:
+            body.append(_DELETE)
+            _write_varint(body, op["delete"])
+        else:
+            continue
+        count += 1
+
+    data = bytearray()
+    _write_varint(data, len(attribute_table))
+    for encoded in attribute_table:
+        _write_bytes(data, encoded)
+    _write_varint(data, count)
+    data += body
+
+    code = _COMPRESSION_CODES[compression]
+    if code == 1:
+        data = zlib.compress(data, level)
+    elif code == 2:
+        data = _import_zstd().ZstdCompressor(level=level).compress(bytes(data))
+
+    return MAGIC + bytes((FORMAT_VERSION, code)) + bytes(data)
+
+
+def decode_delta(data: bytes) -> list:
+    ''' Decodes delta ops from the compact binary format (any compression). '''
+    if data[:4] != MAGIC:
+        raise ValueError("Not a binary delta (bad magic)")
+    if data[4] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary delta version: {data[4]}")
+
+    code = data[5]
+    body = data[6:]
+    if code == 1:
+        body = zlib.decompress(body)
+    elif code == 2:
+        body = _import_zstd().ZstdDecompressor().decompressobj().decompress(body)
+    elif code != 0:
+        raise ValueError(f"Unsupported binary delta compression: {code}")
+
+    body = memoryview(body)
+    pos = 0
+
+    # Returns the varint at pos and the position after it
+    def read_varint(pos: int) -> tuple:
+        value = shift = 0
+        while True:
+            byte = body[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value, pos
+            shift += 7
+
+    attribute_table: list = [None]
+    count, pos = read_varint(pos)
+    for _ in range(count):
+        length, pos = read_varint(pos)
+        attribute_table.append(json.loads(bytes(body[pos:pos + length])))
+        pos += length
+
+    ops = []
+    count, pos = read_varint(pos)
+    for _ in range(count):
+        kind = body[pos]
+
+        # The attribute ref, or the length for deletes. Fast path for the common single byte varint
+        ref = body[pos + 1]
+        if ref < 0x80:
+            pos += 2
+        else:
+            ref, pos = read_varint(pos + 1)
+
+        if kind == _DELETE:
+            ops.append({"delete": ref})
+            continue
+
+        length = body[pos]
+        if length < 0x80:
+            pos += 1
+        else:
+            length, pos = read_varint(pos)
+
+        if kind == _TEXT:
+            op = {"insert": str(body[pos:pos + length], "utf-8")}
+            pos += length
+        elif kind == _EMBED:
+            op = {"insert": json.loads(bytes(body[pos:pos + length]))}
+            pos += length
+        elif kind == _RETAIN:
+            op = {"retain": length}
+        else:
+            raise ValueError(f"Bad op kind in binary delta: {kind}")
+
+        # Each op gets its own copy, so editing one op's attributes can't change the others
+        attributes = attribute_table[ref]
+        if attributes:
+            op["attributes"] = attributes.copy()
+        ops.append(op)
+
+    return ops
+
+
+def write_delta_ops_binary(ops: Iterable[dict], out_path: str, compression: Optional[str] = "zlib") -> int:
+    '''
+    Writes delta ops to a .qdelta file. Writes to a temp file and renames it, like write_delta_ops_json.
+    Returns the file size in bytes.
+    '''
+    data = encode_delta(ops, compression)
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+# Called on .qdelta files, these are already delta ops
+def delta_from_qdelta(file_path: str) -> list:
+    with open(file_path, "rb") as f:
+        return decode_delta(f.read())
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from .delta import Delta
+
+
+class DeltaDocument:
+    '''
+    Server side copy of an editor document, kept in sync by applying the change deltas
+    the Flutter control sends in incremental save mode.
+    Every change carries a version number. A change that doesn't follow the current version
+    is rejected, so the control can ask the client for a fresh full snapshot.
+    '''
+
+    def __init__(self, ops: Optional[list] = None, version: int = 0):
+        self._delta: Delta = Delta(ops)
+        self._version: int = version
+
+    # Current document as delta ops (list)
+    @property
+    def ops(self) -> list:
+        return self._delta.to_json()
+
+    # Current document as a Delta, for diffing/inverting against it
+    @property
+    def delta(self) -> Delta:
+        return self._delta
+
+    # Version of the last change applied (or snapshot loaded)
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def apply(self, change_ops: list, version: Optional[int] = None) -> bool:
+        ''' Applies a change delta on top of the document. Returns False if the version is out of order. '''
+
+        # Only accept the very next version, otherwise we've missed a change somewhere
+        if version is not None and version != self._version + 1:
+            return False
+
+        self._delta = self._delta.compose(Delta(change_ops))
+        self._version = self._version + 1 if version is None else version
+        return True
+
+    def reset(self, ops: Optional[list], version: int) -> None:
+        ''' Replaces the document with a full snapshot from the client. '''
+        self._delta = Delta(ops)
+        self._version = version
+
+    def to_json(self) -> list:
+        ''' Returns a copy of the document safe to hand out or json.dumps. '''
+        return self._delta.to_json()
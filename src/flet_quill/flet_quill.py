@@ -1,13 +1,21 @@
 from enum import Enum
 from typing import Any, Optional, Callable, Union
+from types import MappingProxyType
+import base64
 import json
 
 from flet.core.constrained_control import ConstrainedControl
 from flet.core.control import OptionalNumber, Control
 from flet.core.event import Event
-import os
 
-from .text_converter import load_file_to_delta_ops
+from .text_converter import load_file_to_delta_ops, json_path_for
+from .delta import Delta, compact_delta
+from .delta_codec import BINARY_EXTENSION, decode_delta
+from .delta_document import DeltaDocument
+from .metrics import emit_metrics, measure
+from .conversion_cache import ConversionCache
+from .search_index import SearchIndex
+from .history_store import HistoryStore
 
 
 class FletQuill(Control):
@@ -26,6 +34,38 @@ class FletQuill(Control):
 
                 text_data=[{"insert": "Hello there"}],  # Inital text data (Will ignore file_path loading)\n
                 save_method=save_to_db, # Custom save methods (Will ignore file_path saving)\n
+                on_saved=log_save,      # Called with {"bytes", "duration_ms"} after each save\n
+                save_format="binary",   # Save converted files as .qdelta and send saves in the compact binary format\n
+
+                ### Autosave policy
+                autosave=True,          # False only saves on save_now()/flush() and when the app closes\n
+                autosave_debounce=2.0,  # Seconds after the last edit before saving\n
+                autosave_max_wait=30.0, # Save at least this often while the user keeps typing (0 is off)\n
+                autosave_min_changes=1, # Edits needed before the debounce save kicks in\n
+                on_dirty=show_unsaved,  # Called when the document first has unsaved changes\n
+                on_clean=hide_unsaved,  # Called once everything is saved\n
+
+                ### Incremental saving
+                incremental_save=True,  # Client sends only change deltas instead of the full document\n
+                on_change_delta=on_delta,   # Called with (delta_ops, version) on every change delta\n
+                snapshot_interval=50,   # Send a full snapshot (to save_method) every N change deltas\n
+
+                ### Loading big files
+                async_load=True,        # Convert file_path in the background once mounted, editor shows a loading placeholder\n
+                on_load_complete=loaded,    # Called with the delta ops once loaded\n
+                on_load_error=failed,   # Called with the exception if conversion failed\n
+                conversion_cache=ConversionCache(cache_dir),    # Reuse earlier conversions of the same file\n
+                background_decode=True, # Client decodes the document on a background isolate after the first frame\n
+                on_load_timing=log_timing,  # Called with {"bytes", "decode_ms", "build_ms", "total_ms"} once decoded\n
+                text_data_chunk_size=256 * 1024,    # text_data bigger than this is sent in chunks of this size (0 never chunks)\n
+
+                ### Search
+                search_index=index,     # SearchIndex kept up to date with this document as it's loaded and saved\n
+                search_doc_id="notes",  # Id of the document in the index (defaults to the file it saves to)\n
+                show_search_button=True,    # Toolbar button opening the find bar (find() works either way)\n
+
+                ### History
+                history=HistoryStore(history_dir),  # Keep every save as a revision (change deltas plus periodic snapshots)\n
 
                 ### Styling
                 border_visible=True,    # Give text editor a border (like docs and word)\n
@@ -70,6 +110,28 @@ class FletQuill(Control):
         file_path: Optional[str] = None,    # str to file path to load and save to
         text_data: Optional[list] = None,
         save_method: Optional[Callable[[list], None]] = None,
+        on_saved: Optional[Callable[[dict], None]] = None,
+        save_format: str = "json",
+        autosave: bool = True,
+        autosave_debounce: float = 2.0,
+        autosave_max_wait: float = 0.0,
+        autosave_min_changes: int = 1,
+        on_dirty: Optional[Callable[[], None]] = None,
+        on_clean: Optional[Callable[[], None]] = None,
+        incremental_save: bool = False,
+        on_change_delta: Optional[Callable[[list, int], None]] = None,
+        snapshot_interval: int = 50,
+        async_load: bool = False,
+        on_load_complete: Optional[Callable[[list], None]] = None,
+        on_load_error: Optional[Callable[[Exception], None]] = None,
+        conversion_cache: Optional[ConversionCache] = None,
+        background_decode: bool = False,
+        on_load_timing: Optional[Callable[[dict], None]] = None,
+        text_data_chunk_size: int = 256 * 1024,
+        search_index: Optional[SearchIndex] = None,
+        search_doc_id: Any = None,
+        show_search_button: bool = True,
+        history: Optional[HistoryStore] = None,
         border_visible: bool = False,
         border_width: float = 1.0,
         padding_left: float = 10.0,
@@ -97,6 +159,48 @@ class FletQuill(Control):
             expand=expand,
         )
 
+        # Decoded copies of our json attributes, so reading them doesn't json.loads every time
+        self._text_data_cache: Optional[list] = None
+        self._text_data_view: Optional[tuple] = None
+        self._font_sizes_cache: list = []
+
+        # Big text_data goes to the client in chunks it asks for one at a time, instead of one huge update
+        self.text_data_chunk_size: int = text_data_chunk_size
+        self._transfer_count = 0
+        self._transfer_id: Optional[str] = None
+        self._transfer_data: str = ""
+        self._transfer_chunk_size: int = 0
+        self._add_event_handler("text_data_request", self.__handle_text_data_request_event)
+
+        # Background loading of file_path, started once we're mounted
+        self.on_load_complete: Optional[Callable[[list], None]] = on_load_complete
+        self.on_load_error: Optional[Callable[[Exception], None]] = on_load_error
+        self._pending_load_path: Optional[str] = None
+        self._load_token: Optional[object] = None
+        self._conversion_cache: Optional[ConversionCache] = conversion_cache
+
+        # "json" or "binary" (.qdelta), for the save event and files converted from file_path
+        self.save_format = save_format
+
+        # Client side decoding of the document off the UI isolate
+        self.background_decode = background_decode
+        self._on_load_timing: Optional[Callable[[dict], None]] = None
+        self.on_load_timing = on_load_timing
+
+        # Full text search over saved documents, this one is reindexed whenever it's loaded or saved
+        self._search_index: Optional[SearchIndex] = None
+        self._history: Optional[HistoryStore] = None
+        self.search_index = search_index
+        self.search_doc_id: Any = search_doc_id
+        self.show_search_button = show_search_button
+
+        # Revision history, every save (or change delta in incremental mode) becomes a revision
+        self.history = history
+
+        # Set by CollabHub.attach, change deltas then go to the shared document instead
+        self._collab_session = None
+        self._collab_resets = 0
+
 
         # If we passed in text data (delta ops), set it
         if text_data is not None:
@@ -104,24 +208,17 @@ class FletQuill(Control):
 
         # Otherwise, read and convert the file path to delta ops
         elif file_path is not None:
-            self.text_data = load_file_to_delta_ops(file_path)
-
-            # Set our new file name to be a json for saving later, or we'll corrupt the original
-            file_name = os.path.basename(file_path)
-
-            # Json can read, so it needs no change
-            if file_name.lower().endswith(".json"):
-                self.file_path = file_path
-
-            # Otherwise, make a new file name with the .json extension
+            if async_load:
+                # Editor shows a placeholder until did_mount's load finishes
+                self.text_data = None
+                self._pending_load_path = file_path
             else:
-                new_file_name = os.path.splitext(file_name)[0] + ".json"
-                new_file_path = os.path.join(os.path.dirname(file_path), new_file_name)
+                self.text_data = load_file_to_delta_ops(file_path, self._conversion_cache)
 
-                # New file path it will save to in deltaop json format
-                self.file_path = new_file_path
-                # TIP: This saves to a new/different file, so keep track of new path after conversions
-                # or you'll be loading from old file and saving to a new one
+            # Set our new file name to be a json for saving later, or we'll corrupt the original
+            self.file_path = json_path_for(file_path, BINARY_EXTENSION if save_format == "binary" else ".json")
+            # TIP: This saves to a new/different file, so keep track of new path after conversions
+            # or you'll be loading from old file and saving to a new one
                 
             
         # If not using either, set to None. Editor will start blank and only save if save_method used
@@ -133,6 +230,27 @@ class FletQuill(Control):
         # Custom save methods save our text editor if user doesn't want to just use file_path
         self._save_method: Optional[Callable[[list], None]] = None
         self.save_method = save_method  # enables/disables save-to-event mode
+        self._on_saved: Optional[Callable[[dict], None]] = None
+        self.on_saved = on_saved
+
+        # Autosave policy and dirty tracking
+        self.autosave = autosave
+        self.autosave_debounce = autosave_debounce
+        self.autosave_max_wait = autosave_max_wait
+        self.autosave_min_changes = autosave_min_changes
+        self._dirty: bool = False
+        self.on_dirty: Optional[Callable[[], None]] = on_dirty
+        self.on_clean: Optional[Callable[[], None]] = on_clean
+        self._add_event_handler("dirty", self.__handle_dirty_event)
+        self._add_event_handler("clean", self.__handle_clean_event)
+
+        # Incremental mode, client only sends change deltas and we keep our own copy of the document
+        self._on_change_delta: Optional[Callable[[list, int], None]] = None
+        self._delta_document: Optional[DeltaDocument] = None
+        self._incremental_save: bool = False
+        self.on_change_delta = on_change_delta
+        self.snapshot_interval = snapshot_interval
+        self.incremental_save = incremental_save
 
         # Set our border visibility and width
         self.border_visible = border_visible
@@ -156,11 +274,52 @@ class FletQuill(Control):
         self.font_sizes: list = font_sizes
         self.placeholder_text: str = placeholder_text
 
+        self.loading = self._pending_load_path is not None
+
+        self.__record_document(self._text_data_cache)
+
         
 
     def _get_control_name(self):
         return "flet_quill"
 
+    def did_mount(self):
+        # Start converting our file in the background so building the page doesn't wait on it
+        if self._pending_load_path is not None and self._load_token is None:
+            self._load_token = token = object()
+            self.page.run_thread(self.__load_file, self._pending_load_path, token)
+
+    def will_unmount(self):
+        # Cancels any pending load, its result is thrown away when it finishes
+        self._load_token = None
+
+    def __load_file(self, file_path: str, token: object):
+        try:
+            ops = load_file_to_delta_ops(file_path, self._conversion_cache)
+            error = None
+        except Exception as ex:
+            ops, error = None, ex
+
+        # We were unmounted (or a newer load started) while converting
+        if token is not self._load_token:
+            return
+        self._load_token = None
+        self._pending_load_path = None
+
+        if error is None:
+            self.text_data = ops
+            if self._delta_document is not None:
+                self._delta_document.reset(ops, self._delta_document.version)
+            self.__record_document(ops)
+        self.loading = False
+        self.update()
+
+        if error is None:
+            if self.on_load_complete is not None:
+                self.on_load_complete(ops)
+        elif self.on_load_error is not None:
+            self.on_load_error(error)
+
     # file_path
     @property
     def file_path(self):
@@ -170,25 +329,222 @@ class FletQuill(Control):
     def file_path(self, value):
         self._set_attr("file_path", value)
 
-    # text_data (JSON string attribute consumed by Flutter)
+    # loading (editor shows a placeholder while file_path is converted in the background)
     @property
-    def text_data(self) -> Optional[list]:
-        v = self._get_attr("text_data")
-        if not v:
-            return None
+    def loading(self) -> bool:
+        return self._get_attr("loading", data_type=bool)
+
+    @loading.setter
+    def loading(self, value: bool):
+        self._set_attr("loading", value)
+
+    # background_decode (Flutter decodes text_data/file_path on a background isolate and shows a placeholder meanwhile)
+    @property
+    def background_decode(self) -> bool:
+        return self._get_attr("background_decode", data_type=bool)
+
+    @background_decode.setter
+    def background_decode(self, value: bool):
+        self._set_attr("background_decode", value)
+
+    # on_load_timing (Python-side callback, Flutter reports how long decoding and building the document took)
+    @property
+    def on_load_timing(self) -> Optional[Callable[[dict], None]]:
+        return self._on_load_timing
+
+    @on_load_timing.setter
+    def on_load_timing(self, cb: Optional[Callable[[dict], None]]):
+        self._on_load_timing = cb
+
+        # Always listened to, the timings also go to the metrics hooks
+        self._add_event_handler("load_timing", self.__handle_load_timing_event)
+
+    def __handle_load_timing_event(self, e: Event):
         try:
-            return json.loads(v)
+            payload = json.loads(e.data) if e.data else {}
         except Exception:
+            return
+        emit_metrics({
+            "phase": "client_decode",
+            "ok": True,
+            "error": None,
+            "duration_ms": payload.get("total_ms"),
+            "bytes": payload.get("bytes"),
+            "decode_ms": payload.get("decode_ms"),
+            "build_ms": payload.get("build_ms"),
+        })
+        if self._on_load_timing is not None:
+            self._on_load_timing(payload)
+
+    # text_data (JSON string attribute consumed by Flutter, we keep the decoded list alongside it)
+    @property
+    def text_data(self) -> Optional[list]:
+        if self._text_data_cache is None:
             return None
+        return _copy_ops(self._text_data_cache)
 
     @text_data.setter
     def text_data(self, value: Optional[list]):
+        self._text_data_view = None
+        self._transfer_id = None
+        self._transfer_data = ""
+        self._set_attr("text_data_transfer", None)
         if value is None:
+            self._text_data_cache = None
             self._set_attr("text_data", None)
             return
         if not isinstance(value, list):
             raise TypeError("text_data must be a list of delta operations")
-        self._set_attr("text_data", json.dumps(value))
+        with measure("serialize", ops=len(value)) as event:
+            self._text_data_cache = _copy_ops(value)
+            data = json.dumps(value)
+            event["bytes"] = len(data)
+
+        # Too big for one update, the client will request it in chunks ("id:chunk count")
+        if self.text_data_chunk_size and len(data) > self.text_data_chunk_size:
+            self._transfer_count += 1
+            self._transfer_id = str(self._transfer_count)
+            self._transfer_data = data
+            self._transfer_chunk_size = size = self.text_data_chunk_size
+            chunks = (len(data) + size - 1) // size
+            self._set_attr("text_data", None)
+            self._set_attr("text_data_transfer", f"{self._transfer_id}:{chunks}")
+            return
+
+        self._set_attr("text_data", data)
+
+    def __handle_text_data_request_event(self, e: Event):
+        try:
+            payload = json.loads(e.data) if e.data else {}
+            transfer_id = str(payload.get("id"))
+            seq = int(payload.get("seq", 0))
+        except Exception:
+            return
+
+        # Request for an old transfer, the client gets told about the current one on the next update
+        if transfer_id != self._transfer_id:
+            return
+
+        size = self._transfer_chunk_size
+        if seq < 0 or seq * size >= len(self._transfer_data):
+            return
+        self.invoke_method(
+            "text_data_chunk",
+            {
+                "id": transfer_id,
+                "seq": seq,
+                "data": self._transfer_data[seq * size:(seq + 1) * size],
+            },
+        )
+
+    # text_data_view (read only text_data for callers that only read it, built once per text_data instead of
+    # copied on every read). Read only all the way down, attributes and embeds too
+    @property
+    def text_data_view(self) -> Optional[tuple]:
+        if self._text_data_cache is None:
+            return None
+        if self._text_data_view is None:
+            self._text_data_view = tuple(_freeze(op) for op in self._text_data_cache)
+        return self._text_data_view
+
+    # Targeted edits. These send just the change to the client, which applies it to the open document
+    # instead of rebuilding it like setting text_data does, so the cursor and undo history survive.
+    # Indexes are offsets into the editor's current document in UTF-16 code units, like the editor counts
+    # (an emoji is 2, embeds are 1). SearchIndex matches and find() results use the same offsets.
+    # text_data stays the document Python last set, in incremental_save mode delta_document follows the edits
+    def apply_delta(self, delta: Union[Delta, list]):
+        ''' Applies a change delta (Delta or delta ops) to the editor's document. Raises ValueError for ops that aren't a delta. '''
+        # Delta() checks the ops, a bad one would otherwise only fail on the client
+        ops = (delta if isinstance(delta, Delta) else Delta(delta)).to_json()
+        self.invoke_method("apply_delta", {"ops": json.dumps(ops)})
+
+    def insert_text(self, index: int, text: str, attributes: Optional[dict] = None):
+        ''' Inserts text at index, with optional attributes like {"bold": True}. '''
+        _check_range(index, 0)
+        if not isinstance(text, str):
+            raise TypeError("text must be a str")
+        self.apply_delta(Delta().retain(index).insert(text, attributes))
+
+    def format_range(self, index: int, length: int, attributes: dict):
+        ''' Formats length characters from index. A None value removes that format, like {"bold": None}. '''
+        _check_range(index, length)
+        self.apply_delta(Delta().retain(index).retain(length, attributes))
+
+    def delete_range(self, index: int, length: int):
+        ''' Deletes length characters from index. '''
+        _check_range(index, length)
+        self.apply_delta(Delta().retain(index).delete(length))
+
+    # Find in the editor. Searches the client's current document, so it includes unsaved edits
+    def find(self, query: str, case_sensitive: bool = False, whole_word: bool = False, timeout: Optional[float] = 5) -> list:
+        '''
+        Opens the find bar with query, selects the first match and returns every match as (index, length).
+        To search saved documents without opening them, use a SearchIndex.
+        '''
+        result = self.invoke_method(
+            "find",
+            {"query": query, "case_sensitive": case_sensitive, "whole_word": whole_word},
+            wait_for_result=True,
+            wait_timeout=timeout,
+        )
+        return [tuple(match) for match in json.loads(result)] if result else []
+
+    def close_find(self):
+        ''' Closes the find bar. '''
+        self.invoke_method("close_find")
+
+    def select_range(self, index: int, length: int = 0):
+        ''' Selects length characters from index (just moves the cursor for 0) and scrolls to them, like a SearchIndex match. '''
+        self.invoke_method("select_range", {"index": index, "length": length})
+
+    # show_search_button (toolbar button that opens the find bar)
+    @property
+    def show_search_button(self) -> bool:
+        return self._get_attr("show_search_button", data_type=bool)
+
+    @show_search_button.setter
+    def show_search_button(self, value: bool):
+        self._set_attr("show_search_button", value)
+
+    # search_index (SearchIndex kept up to date with this document)
+    @property
+    def search_index(self) -> Optional[SearchIndex]:
+        return self._search_index
+
+    @search_index.setter
+    def search_index(self, value: Optional[SearchIndex]):
+        self._search_index = value
+        self.__update_saved_document()
+
+    # history (HistoryStore getting a revision per save)
+    @property
+    def history(self) -> Optional[HistoryStore]:
+        return self._history
+
+    @history.setter
+    def history(self, value: Optional[HistoryStore]):
+        self._history = value
+        self.__update_saved_document()
+
+    # Saving to file_path, the client sends the saved document along with the "saved" event
+    # while something here needs it, so it doesn't have to be read back from the file
+    def __update_saved_document(self):
+        self._set_attr("saved_document", self._search_index is not None or self._history is not None)
+
+    def __search_doc_id(self):
+        return self.search_doc_id if self.search_doc_id is not None else self.file_path
+
+    # Updates the search index and history with a full document, after loads and saves
+    def __record_document(self, ops: Optional[list]):
+        if ops is None:
+            return
+        if self.search_index is not None:
+            doc_id = self.__search_doc_id()
+            if doc_id is not None:
+                self.search_index.update_document(doc_id, ops)
+        # Diffing a big document takes a while, so that happens on the history's own thread
+        if self.history is not None:
+            self.history.commit_later(ops)
 
     # save_method (Python-side callback; Flutter triggers "save" event)
     @property
@@ -211,11 +567,275 @@ class FletQuill(Control):
     def __handle_save_event(self, e: Event):
         if self._save_method is None:
             return
+        payload = self.__decode_document(e.data, self.save_format == "binary")
+        # A broken save isn't an empty document, so it doesn't replace anything (the metrics have the error)
+        if payload is None:
+            return
+        self.__record_document(payload)
+        self._save_method(payload)
+
+    # Decodes a document the client sent (json, or base64 of .qdelta when binary), None if it's broken
+    def __decode_document(self, data: Optional[str], binary: bool) -> Optional[list]:
+        with measure("save_decode", format="binary" if binary else "json", bytes=len(data or "")) as event:
+            try:
+                if not data:
+                    payload = []
+                elif binary:
+                    payload = decode_delta(base64.b64decode(data))
+                else:
+                    payload = json.loads(data)
+                if not isinstance(payload, list):
+                    raise ValueError(f"Expected a list of delta ops, got {type(payload).__name__}")
+                payload = compact_delta(payload)
+            except Exception as ex:
+                event["ok"] = False
+                event["error"] = f"{type(ex).__name__}: {ex}"
+                return None
+            event["ops"] = len(payload)
+        return payload
+
+    # save_format ("json" or "binary", binary saves are sent as base64 of the compact .qdelta encoding)
+    @property
+    def save_format(self) -> str:
+        return self._get_attr("save_format")
+
+    @save_format.setter
+    def save_format(self, value: str):
+        if value not in ("json", "binary"):
+            raise ValueError('save_format must be "json" or "binary"')
+        self._set_attr("save_format", value)
+
+    # on_saved (Python-side callback, Flutter reports each save's size and how long it took)
+    @property
+    def on_saved(self) -> Optional[Callable[[dict], None]]:
+        return self._on_saved
+
+    @on_saved.setter
+    def on_saved(self, cb: Optional[Callable[[dict], None]]):
+        self._on_saved = cb
+
+        # Always listened to, client saves (and their failures) also go to the metrics hooks
+        self._add_event_handler("saved", self.__handle_saved_event)
+        self._add_event_handler("save_error", self.__handle_save_error_event)
+
+    def __handle_saved_event(self, e: Event):
         try:
-            payload = json.loads(e.data) if e.data else []
+            payload = json.loads(e.data) if e.data else {}
         except Exception:
-            payload = []
-        self._save_method(payload)
+            return
+        emit_metrics({
+            "phase": "client_save",
+            "ok": True,
+            "error": None,
+            "duration_ms": payload.get("duration_ms"),
+            "bytes": payload.get("bytes"),
+        })
+        # Saved straight to file_path by the client, which sends the document along for the index and history
+        document = payload.pop("document", None)
+        if document is not None and self._save_method is None:
+            self.__record_document(self.__decode_document(document, bool(payload.pop("binary", False))))
+        if self._on_saved is not None:
+            self._on_saved(payload)
+
+    def __handle_save_error_event(self, e: Event):
+        try:
+            payload = json.loads(e.data) if e.data else {}
+        except Exception:
+            payload = {}
+        emit_metrics({
+            "phase": "client_save",
+            "ok": False,
+            "error": payload.get("error"),
+            "duration_ms": payload.get("duration_ms"),
+        })
+
+    # autosave (False turns off timed saves, the editor then only saves on save_now()/flush() or when closing)
+    @property
+    def autosave(self) -> bool:
+        return self._get_attr("autosave", data_type=bool)
+
+    @autosave.setter
+    def autosave(self, value: bool):
+        self._set_attr("autosave", value)
+
+    # autosave_debounce (seconds after the last edit before saving)
+    @property
+    def autosave_debounce(self) -> float:
+        return self._get_attr("autosave_debounce", data_type=float)
+
+    @autosave_debounce.setter
+    def autosave_debounce(self, value: float):
+        self._set_attr("autosave_debounce", value)
+
+    # autosave_max_wait (longest time in seconds edits go unsaved while the user keeps typing, 0 is off)
+    @property
+    def autosave_max_wait(self) -> float:
+        return self._get_attr("autosave_max_wait", data_type=float)
+
+    @autosave_max_wait.setter
+    def autosave_max_wait(self, value: float):
+        self._set_attr("autosave_max_wait", value)
+
+    # autosave_min_changes (number of edits before the debounce save is scheduled)
+    @property
+    def autosave_min_changes(self) -> int:
+        return self._get_attr("autosave_min_changes", data_type=int)
+
+    @autosave_min_changes.setter
+    def autosave_min_changes(self, value: int):
+        self._set_attr("autosave_min_changes", value)
+
+    # dirty (True while the editor has changes that haven't been saved yet)
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def __handle_dirty_event(self, e: Event):
+        self._dirty = True
+        if self.on_dirty is not None:
+            self.on_dirty()
+
+    def __handle_clean_event(self, e: Event):
+        self._dirty = False
+        if self.on_clean is not None:
+            self.on_clean()
+
+    def save_now(self):
+        ''' Asks the editor to save right away, without waiting for the autosave timers. '''
+        self.invoke_method("save_now")
+
+    def flush(self, timeout: Optional[float] = 5):
+        ''' Saves right away and waits until the editor has saved, like before closing the page. '''
+        self.invoke_method("save_now", {"sync": True}, wait_for_result=True, wait_timeout=timeout)
+
+    # incremental_save (Flutter sends "change_delta" events instead of the full document, plus periodic "snapshot" events).
+    # file_path is written at each snapshot and on flush(), page close and app pause
+    @property
+    def incremental_save(self) -> bool:
+        return self._incremental_save
+
+    @incremental_save.setter
+    def incremental_save(self, value: bool):
+        self._incremental_save = bool(value)
+        self._set_attr("incremental_save", self._incremental_save)
+
+        if self._incremental_save:
+            # Our server side copy starts from whatever the editor was loaded with
+            if self._delta_document is None:
+                self._delta_document = DeltaDocument(self._text_data_cache)
+            self._add_event_handler("change_delta", self.__handle_change_delta_event)
+            self._add_event_handler("snapshot", self.__handle_snapshot_event)
+        else:
+            self._delta_document = None
+            self._add_event_handler("change_delta", None)
+            self._add_event_handler("snapshot", None)
+
+    # snapshot_interval (number of change deltas between full snapshots, 0 only sends them on request)
+    @property
+    def snapshot_interval(self) -> int:
+        return self._get_attr("snapshot_interval", data_type=int)
+
+    @snapshot_interval.setter
+    def snapshot_interval(self, value: int):
+        self._set_attr("snapshot_interval", value)
+
+    # on_change_delta (Python-side callback, called with (delta_ops, version))
+    @property
+    def on_change_delta(self) -> Optional[Callable[[list, int], None]]:
+        return self._on_change_delta
+
+    @on_change_delta.setter
+    def on_change_delta(self, cb: Optional[Callable[[list, int], None]]):
+        self._on_change_delta = cb
+
+    # delta_document (server side copy of the document, only kept in incremental mode)
+    @property
+    def delta_document(self) -> Optional[DeltaDocument]:
+        return self._delta_document
+
+    # collab_session (CollabSession while a CollabHub has this control attached)
+    @property
+    def collab_session(self):
+        return self._collab_session
+
+    def _join_collab(self, session, ops: Optional[list], revision: int):
+        ''' Called by CollabHub, starts the editor over from the shared document at revision (or leaves it with None). '''
+        self._collab_session = session
+        self._set_attr("collab", session is not None)
+        if session is None:
+            return
+        self.incremental_save = True
+        self.text_data = ops
+        # Changes every time, so the client starts over even if the text is the same
+        self._collab_resets += 1
+        self._set_attr("collab_reset", f"{self._collab_resets}:{revision}")
+
+    def request_snapshot(self):
+        ''' Asks the client to send the full document through the "snapshot" event. '''
+        self.invoke_method("request_snapshot")
+
+    def __handle_change_delta_event(self, e: Event):
+        with measure("change_delta", bytes=len(e.data or "")) as event:
+            try:
+                payload = json.loads(e.data) if e.data else {}
+                ops = payload.get("ops") or []
+                version = int(payload.get("version", 0))
+                base = int(payload.get("base", 0))
+            except Exception as ex:
+                event["ok"] = False
+                event["error"] = f"{type(ex).__name__}: {ex}"
+                return
+            event["ops"] = len(ops)
+
+            if self._collab_session is not None:
+                # The shared document has the history, and the client's own copy only syncs with it
+                try:
+                    self._collab_session.submit(ops, base)
+                except ValueError as ex:
+                    # A base revision the document never had, the client is out of sync so it starts over
+                    event["ok"] = False
+                    event["error"] = f"{type(ex).__name__}: {ex}"
+                    self._collab_session.resync()
+                    return
+
+            elif self._delta_document is not None:
+                # We missed a change somewhere, so get back in sync with a full snapshot
+                if not self._delta_document.apply(ops, version):
+                    event["ok"] = False
+                    event["error"] = "Out of order version, requested a snapshot"
+                    self.request_snapshot()
+                    return
+
+            # Change deltas go into the history as they are, no diffing needed. Queued behind
+            # any commit still diffing, so the revisions stay in order
+            if self.history is not None:
+                self.history.append_later(ops)
+
+        if self._on_change_delta is not None:
+            self._on_change_delta(ops, version)
+
+    def __handle_snapshot_event(self, e: Event):
+        # Collaborating, the hub's document is the one that counts
+        if self._collab_session is not None:
+            return
+        try:
+            payload = json.loads(e.data) if e.data else {}
+            ops = payload.get("ops") or []
+            version = int(payload.get("version", 0))
+        except Exception:
+            return
+
+        if self._delta_document is not None:
+            self._delta_document.reset(ops, version)
+
+        # Reindexing the whole document on every change delta would cost too much, so the index follows snapshots.
+        # The history already has the change deltas, so this only records something if we were out of sync
+        ops = compact_delta(ops)
+        self.__record_document(ops)
+
+        # Snapshots are full documents, so they go to the regular save method
+        if self._save_method is not None:
+            self._save_method(ops)
 
     # border_visible
     @property
@@ -310,19 +930,15 @@ class FletQuill(Control):
     # font_sizes
     @property
     def font_sizes(self) -> list:
-        v = self._get_attr("font_sizes")
-        if not v:
-            return []
-        try:
-            return json.loads(v)
-        except Exception:
-            return []
+        return list(self._font_sizes_cache)
         
     @font_sizes.setter
     def font_sizes(self, value: list):
         if value is None:
+            self._font_sizes_cache = []
             self._set_attr("font_sizes", None)
             return
+        self._font_sizes_cache = list(value)
         self._set_attr("font_sizes", json.dumps(value))
 
 
@@ -334,3 +950,34 @@ class FletQuill(Control):
     @placeholder_text.setter
     def placeholder_text(self, value: str):
         self._set_attr("placeholder_text", value)
+
+
+# Index and length in UTF-16 units, like the editor counts them
+def _check_range(index: int, length: int):
+    if not isinstance(index, int) or isinstance(index, bool) or index < 0:
+        raise ValueError(f"Bad index: {index!r}")
+    if not isinstance(length, int) or isinstance(length, bool) or length < 0:
+        raise ValueError(f"Bad length: {length!r}")
+
+
+# Copies delta ops deep enough that callers can't change our cached ones (op dicts, attributes and embeds),
+# a lot cheaper than decoding the json again
+def _copy_ops(ops: list) -> list:
+    copied = []
+    for op in ops:
+        op = dict(op)
+        if isinstance(op.get("attributes"), dict):
+            op["attributes"] = dict(op["attributes"])
+        if isinstance(op.get("insert"), dict):
+            op["insert"] = dict(op["insert"])
+        copied.append(op)
+    return copied
+
+
+# Read only copy of a json value: dicts become MappingProxyTypes and lists tuples, all the way down
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+from typing import Iterator, Optional
+import mmap
+import os
+import queue
+import re
+import struct
+import threading
+import time
+import zlib
+
+from .delta import Delta
+from .delta_codec import BINARY_EXTENSION, decode_delta, encode_delta, write_delta_ops_binary
+from .metrics import measure
+
+# Each log record: payload length, crc32 of the payload, revision, unix time, then the change delta
+# as an uncompressed .qdelta (zlib costs more than it saves on deltas this small)
+_RECORD_HEADER = struct.Struct("<IIQd")
+
+_SNAPSHOT_NAME = re.compile(r"^snap-(\d{12})" + re.escape(BINARY_EXTENSION) + "$")
+
+
+class HistoryStore:
+    '''
+    Revision history for one document: change deltas appended to a log, plus a full snapshot every
+    snapshot_interval revisions, so keeping history costs about the size of the edits instead of a
+    copy of the document per autosave.
+    The folder holds pairs of snap-<revision>.qdelta (the document at that revision) and
+    log-<revision>.qlog (every change after it, up to the next snapshot). Revision 0 is the empty document.
+    Any revision is rebuilt by replaying the log from the nearest snapshot before it, old logs are read
+    through mmap. compact() drops whole snapshot/log pairs older than the retention limits, and
+    start_compaction() runs it on a background thread.
+    Example:
+        history = HistoryStore("/data/history/notes", snapshot_interval=200, keep_seconds=30 * 86400)
+        FletQuill(file_path=path, history=history)   # every save becomes a revision
+        history.revisions()[-5:]    # [(revision, unix time), ...]
+        history.revision(42)        # the document's delta ops at revision 42
+    '''
+
+    LOG_EXTENSION = ".qlog"
+
+    def __init__(
+        self,
+        directory: str,
+        snapshot_interval: int = 100,
+        segment_bytes: int = 4 * 1024 * 1024,
+        keep_revisions: Optional[int] = None,
+        keep_seconds: Optional[float] = None,
+        durable: bool = False,
+    ):
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval  # revisions between snapshots
+        self.segment_bytes = segment_bytes          # a log this big also gets a snapshot started early
+        self.keep_revisions = keep_revisions        # compact() keeps at least this many recent revisions
+        self.keep_seconds = keep_seconds            # and every revision newer than this
+        self.durable = durable                      # fsync every append, slower but survives power loss
+
+        self._lock = threading.RLock()
+        self._log = None
+        self._log_start = 0
+        self._log_records = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._compaction_stop = threading.Event()
+        self._writes: "queue.Queue" = queue.Queue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._write_error: Optional[Exception] = None   # first failed background write, raised by flush()/close()
+
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    # Newest revision number
+    @property
+    def head(self) -> int:
+        return self._head
+
+    # Document at the newest revision as delta ops
+    @property
+    def document(self) -> list:
+        with self._lock:
+            return self._document.to_json()
+
+    def _snapshot_path(self, revision: int) -> str:
+        return os.path.join(self.directory, f"snap-{revision:012d}{BINARY_EXTENSION}")
+
+    def _log_path(self, revision: int) -> str:
+        return os.path.join(self.directory, f"log-{revision:012d}{self.LOG_EXTENSION}")
+
+    # Revisions of the snapshots on disk, oldest first
+    def _snapshots(self) -> list:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SNAPSHOT_NAME.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    # Loads the newest snapshot and replays its log to get the head, cutting off a record
+    # left half written by a crash
+    def _open(self) -> None:
+        snapshots = self._snapshots()
+        if not snapshots:
+            write_delta_ops_binary([], self._snapshot_path(0))
+            snapshots = [0]
+
+        start = snapshots[-1]
+        document = Delta(self._read_snapshot(start))
+        head = start
+        records = 0
+        good_bytes = 0
+        for revision, _, ops, end in self._iter_log(start):
+            document = document.compose(Delta(ops))
+            head = revision
+            records += 1
+            good_bytes = end
+
+        log_path = self._log_path(start)
+        if os.path.exists(log_path) and os.path.getsize(log_path) != good_bytes:
+            with open(log_path, "r+b") as f:
+                f.truncate(good_bytes)
+
+        self._document = document
+        self._head = head
+        self._log_start = start
+        self._log_records = records
+        self._log = open(log_path, "ab")
+
+    def _read_snapshot(self, revision: int) -> list:
+        with open(self._snapshot_path(revision), "rb") as f:
+            return decode_delta(f.read())
+
+    # Yields (revision, time, ops, end offset) for each intact record of the log started at start
+    def _iter_log(self, start: int, until: Optional[int] = None) -> Iterator[tuple]:
+        path = self._log_path(start)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if size == 0:
+            return
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            pos = 0
+            header_size = _RECORD_HEADER.size
+            while pos + header_size <= size:
+                length, crc, revision, timestamp = _RECORD_HEADER.unpack_from(data, pos)
+                end = pos + header_size + length
+                if end > size:
+                    return
+                payload = data[pos + header_size:end]
+                if zlib.crc32(payload) != crc:
+                    return
+                if until is not None and revision > until:
+                    return
+                yield revision, timestamp, decode_delta(payload), end
+                pos = end
+
+    def append(self, change_ops: list) -> int:
+        ''' Adds a change delta as the next revision. Returns its revision number. '''
+        change = Delta(change_ops)
+        payload = encode_delta(change.to_json(), compression="none")
+
+        with self._lock:
+            revision = self._head + 1
+            self._log.write(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload), revision, time.time()))
+            self._log.write(payload)
+            self._log.flush()
+            if self.durable:
+                os.fsync(self._log.fileno())
+
+            self._document = self._document.compose(change)
+            self._head = revision
+            self._log_records += 1
+
+            if self._log_records >= self.snapshot_interval or self._log.tell() >= self.segment_bytes:
+                self.snapshot()
+        return revision
+
+    def commit(self, document_ops: list) -> Optional[int]:
+        '''
+        Adds a full document (like a save_method save) as a revision, storing only what changed.
+        Returns the new revision, or None if nothing changed.
+        '''
+        with self._lock:
+            change = self._document.diff(Delta(document_ops))
+            if not change.ops:
+                return None
+            return self.append(change.to_json())
+
+    def commit_later(self, document_ops: list) -> None:
+        '''
+        commit() on a background thread, for callers that can't wait on the diff (like the control's
+        event handlers). Runs in order with append_later(), flush() waits for both.
+        '''
+        self._write_later(self.commit, document_ops)
+
+    def append_later(self, change_ops: list) -> None:
+        ''' append() on the commit_later() thread, so it lands after the commits queued before it. '''
+        self._write_later(self.append, change_ops)
+
+    def flush(self) -> None:
+        '''
+        Waits until everything queued by commit_later() and append_later() is written.
+        Raises the first background write that failed since the last flush, the history has a gap there.
+        '''
+        self._writes.join()
+        self._raise_write_error()
+
+    def _raise_write_error(self) -> None:
+        error, self._write_error = self._write_error, None
+        if error is not None:
+            raise error
+
+    def _write_later(self, write, ops: list) -> None:
+        with self._lock:
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(target=self._run_writes, name="flet_quill-history-writer", daemon=True)
+                self._writer_thread.start()
+        self._writes.put((write, ops))
+
+    def _run_writes(self) -> None:
+        while True:
+            item = self._writes.get()
+            try:
+                if item is None:
+                    return
+                write, ops = item
+                # Nobody is waiting on this write, so a failure goes to the metrics hooks and flush()
+                try:
+                    with measure("history_write", write=write.__name__, ops=len(ops)):
+                        write(ops)
+                except Exception as ex:
+                    if self._write_error is None:
+                        self._write_error = ex
+            finally:
+                self._writes.task_done()
+
+    def snapshot(self) -> None:
+        ''' Writes the head as a snapshot and starts a new log after it. '''
+        with self._lock:
+            if self._head == self._log_start:
+                return
+            write_delta_ops_binary(self._document.to_json(), self._snapshot_path(self._head))
+            self._log.close()
+            self._log_start = self._head
+            self._log_records = 0
+            self._log = open(self._log_path(self._head), "ab")
+
+    def revision(self, revision: int) -> list:
+        ''' The document's delta ops at a revision. '''
+        with self._lock:
+            if revision == self._head:
+                return self._document.to_json()
+            if revision < 0 or revision > self._head:
+                raise KeyError(f"No revision {revision}, head is {self._head}")
+            snapshots = [s for s in self._snapshots() if s <= revision]
+            if not snapshots:
+                raise KeyError(f"Revision {revision} was removed by compaction")
+            start = snapshots[-1]
+            document = Delta(self._read_snapshot(start))
+            for _, _, ops, _ in self._iter_log(start, until=revision):
+                document = document.compose(Delta(ops))
+            return document.to_json()
+
+    def changes(self, since: int = 0) -> Iterator[tuple]:
+        ''' Yields (revision, unix time, change ops) for every stored revision after since. '''
+        for start, following in self._segments():
+            if following is not None and following <= since:
+                continue
+            for revision, timestamp, ops, _ in self._iter_log(start):
+                if revision > since:
+                    yield revision, timestamp, ops
+
+    def revisions(self) -> list:
+        ''' (revision, unix time) of every stored revision, oldest first. '''
+        return [(revision, timestamp) for revision, timestamp, _ in self.changes()]
+
+    # (snapshot revision, next snapshot revision or None) for each snapshot/log pair
+    def _segments(self) -> list:
+        with self._lock:
+            snapshots = self._snapshots()
+        return list(zip(snapshots, snapshots[1:] + [None]))
+
+    def compact(self) -> int:
+        '''
+        Deletes snapshot/log pairs whose revisions are all older than keep_revisions/keep_seconds
+        allow (a revision is kept if either limit keeps it). Returns how many pairs were removed.
+        '''
+        if self.keep_revisions is None and self.keep_seconds is None:
+            return 0
+
+        with self._lock:
+            head = self._head
+        oldest_kept = head
+        if self.keep_revisions is not None:
+            oldest_kept = min(oldest_kept, head - self.keep_revisions + 1)
+        if self.keep_seconds is not None:
+            cutoff = time.time() - self.keep_seconds
+            for revision, timestamp in self.revisions():
+                if timestamp >= cutoff:
+                    oldest_kept = min(oldest_kept, revision)
+                    break
+
+        removed = 0
+        for start, following in self._segments():
+            # Never the live log, and a pair goes only once the next snapshot covers everything kept
+            if following is None or following > oldest_kept:
+                break
+            with self._lock:
+                for path in (self._log_path(start), self._snapshot_path(start)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            removed += 1
+        return removed
+
+    def start_compaction(self, interval: float = 3600.0) -> None:
+        ''' Runs compact() every interval seconds on a background thread, until close(). '''
+        if self._compaction_thread is not None:
+            return
+        self._compaction_stop.clear()
+
+        def run():
+            while not self._compaction_stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception:
+                    pass
+
+        self._compaction_thread = threading.Thread(target=run, name="flet_quill-history-compaction", daemon=True)
+        self._compaction_thread.start()
+
+    def close(self) -> None:
+        ''' Finishes queued writes, stops background compaction and closes the log. Raises like flush() if a write failed. '''
+        if self._writer_thread is not None:
+            self._writes.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+        self._compaction_stop.set()
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+        self._raise_write_error()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
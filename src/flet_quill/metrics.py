@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import threading
+import time
+
+# Metrics hooks get a dict for every timed phase of loading and saving documents:
+#   {"phase", "duration_ms", "ok", "error", ...} plus "bytes" and "ops" when the phase knows them,
+#   and phase specific extras (like "mime" for conversions).
+# Python side phases:
+#   "convert"       load_file_to_delta_ops reading and converting a file
+#   "serialize"     text_data setter encoding the document for the client
+#   "save_decode"   decoding a save event before save_method is called
+#   "change_delta"  decoding and applying an incremental save change delta
+#   "history_write" a HistoryStore commit_later/append_later write on its background thread
+# Client (Flutter) side phases, reported through the control's events:
+#   "client_save"   an autosave/flush encoding and writing (or sending) the document
+#   "client_decode" background_decode decoding and building the document
+# Errors in these paths are still handled the way they always were, they're just counted now (ok False).
+
+_hooks: list = []
+_hooks_lock = threading.Lock()
+
+
+def add_metrics_hook(hook: Callable[[dict], None]) -> None:
+    '''
+    Registers a function called with each metrics event (dict). Hooks run on whatever thread the
+    phase ran on, so keep them quick, and exceptions they raise are ignored.
+    Example:
+        recorder = MetricsRecorder()
+        add_metrics_hook(recorder)
+        ...
+        print(recorder.summary())
+    '''
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks.append(hook)
+
+
+def remove_metrics_hook(hook: Callable[[dict], None]) -> None:
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def emit_metrics(event: dict) -> None:
+    ''' Sends a metrics event to every hook. '''
+    for hook in list(_hooks):
+        try:
+            hook(event)
+        except Exception:
+            pass
+
+
+@contextmanager
+def measure(phase: str, **fields) -> Iterator[dict]:
+    '''
+    Times the block and emits a metrics event for it. The block can add "bytes", "ops" or anything
+    else to the yielded dict, and set "ok" False with an "error" for failures it handles itself.
+    Exceptions leaving the block are recorded as failures and re-raised.
+    '''
+    event = {"phase": phase, "ok": True, "error": None}
+    event.update(fields)
+
+    # Nothing listening, skip the timing
+    if not _hooks:
+        yield event
+        return
+
+    start = time.perf_counter()
+    try:
+        yield event
+    except BaseException as e:
+        event["ok"] = False
+        event["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        event["duration_ms"] = (time.perf_counter() - start) * 1000
+        emit_metrics(event)
+
+
+class MetricsRecorder:
+    '''
+    Metrics hook that keeps running totals per phase, for logging or a stats endpoint.
+    summary() returns {phase: {"count", "failures", "total_ms", "max_ms", "bytes", "ops"}}
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases: dict = {}
+
+    def __call__(self, event: dict) -> None:
+        with self._lock:
+            totals = self._phases.get(event["phase"])
+            if totals is None:
+                totals = self._phases[event["phase"]] = {
+                    "count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0, "ops": 0,
+                }
+            duration = event.get("duration_ms") or 0.0
+            totals["count"] += 1
+            totals["failures"] += 0 if event.get("ok", True) else 1
+            totals["total_ms"] += duration
+            totals["max_ms"] = max(totals["max_ms"], duration)
+            totals["bytes"] += event.get("bytes") or 0
+            totals["ops"] += event.get("ops") or 0
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {phase: dict(totals) for phase, totals in self._phases.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._phases.clear()
+
+
+def opentelemetry_hook(meter) -> Callable[[dict], None]:
+    '''
+    Returns a metrics hook that records into an OpenTelemetry meter, with the phase as an attribute:
+    flet_quill.duration (ms), flet_quill.bytes, flet_quill.ops histograms and a flet_quill.failures counter.
+    Example:
+        from opentelemetry import metrics
+        add_metrics_hook(opentelemetry_hook(metrics.get_meter("flet_quill")))
+    '''
+    duration = meter.create_histogram("flet_quill.duration", unit="ms", description="Time spent per phase")
+    size = meter.create_histogram("flet_quill.bytes", unit="By", description="Payload size per phase")
+    ops = meter.create_histogram("flet_quill.ops", description="Delta op count per phase")
+    failures = meter.create_counter("flet_quill.failures", description="Failed phases")
+
+    def hook(event: dict) -> None:
+        attributes = {"phase": event["phase"]}
+        if event.get("duration_ms") is not None:
+            duration.record(event["duration_ms"], attributes)
+        if event.get("bytes") is not None:
+            size.record(event["bytes"], attributes)
+        if event.get("ops") is not None:
+            ops.record(event["ops"], attributes)
+        if not event.get("ok", True):
+            failures.add(1, attributes)
+
+    return hook
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+import os
+import pickle
+import re
+import tempfile
+import threading
+
+from .delta import _ASTRAL
+from .delta_codec import BINARY_EXTENSION
+from .text_converter import load_file_to_delta_ops
+
+# Words are runs of letters/digits/underscores, matched case insensitively
+_TOKEN = re.compile(r"\w+")
+
+# Embeds take up one character in the document, so offsets line up with editor indexes
+_EMBED_CHARACTER = "\ufffc"
+
+
+def document_text(ops: Iterable[dict]) -> str:
+    ''' Plain text of a delta document, with embeds as one placeholder character like the editor counts them. '''
+    return "".join(op["insert"] if isinstance(op.get("insert"), str) else _EMBED_CHARACTER
+                   for op in ops if "insert" in op)
+
+
+class SearchIndex:
+    '''
+    Inverted index over delta documents, for searching lots of saved documents without loading them.
+    Documents are (re)indexed one at a time as they're saved, and searches return each matching
+    document's id with the ranges of the matches, ready for FletQuill.select_range. Like the editor's
+    indexes, the offsets are UTF-16 code units, so an emoji counts as 2.
+    Queries match whole words in order, ignoring case and punctuation ("hello world" finds "Hello, world").
+    Example:
+        index = SearchIndex()
+        index.index_files(["/docs"])
+        FletQuill(file_path=path, search_index=index)   # keeps the index up to date as the document is saved
+        index.search("quarterly report")   # [{"doc_id": "/docs/q3.json", "matches": [(120, 136)]}]
+    '''
+
+    # Bump when the saved index layout changes
+    FORMAT_VERSION = 2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: dict = {}   # token -> {doc_id: array of token positions}
+        self._starts: dict = {}     # doc_id -> array of each token's start offset, by position
+        self._ends: dict = {}       # doc_id -> array of each token's end offset, by position
+        self._tokens: dict = {}     # doc_id -> the distinct tokens it has, to remove it again
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._tokens
+
+    def documents(self) -> list:
+        ''' Ids of every indexed document. '''
+        with self._lock:
+            return list(self._tokens)
+
+    def update_document(self, doc_id, ops: Iterable[dict]) -> None:
+        ''' Indexes a document (delta ops), replacing what was indexed under doc_id before. '''
+        text = document_text(ops)
+
+        # Python indexes count code points, the editor counts UTF-16 units. Every character
+        # outside the BMP before an offset moves it one further
+        astral = [] if text.isascii() else [m.start() for m in _ASTRAL.finditer(text)]
+
+        # Tokenize outside the lock, only swapping the postings in needs it
+        positions: dict = {}
+        starts = array("L")
+        ends = array("L")
+        for position, match in enumerate(_TOKEN.finditer(text)):
+            token = match.group().lower()
+            found = positions.get(token)
+            if found is None:
+                found = positions[token] = array("L")
+            found.append(position)
+            start, end = match.span()
+            if astral:
+                start += bisect_left(astral, start)
+                end += bisect_left(astral, end)
+            starts.append(start)
+            ends.append(end)
+
+        with self._lock:
+            self._remove(doc_id)
+            for token, found in positions.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                postings[doc_id] = found
+            self._starts[doc_id] = starts
+            self._ends[doc_id] = ends
+            self._tokens[doc_id] = tuple(positions)
+
+    def update_file(self, file_path: str, doc_id=None) -> None:
+        ''' Indexes a saved document (.json, .qdelta, or anything load_file_to_delta_ops converts), by its path unless doc_id is given. '''
+        self.update_document(file_path if doc_id is None else doc_id, load_file_to_delta_ops(file_path))
+
+    def index_files(self, paths: Iterable[str]) -> int:
+        ''' Indexes saved .json and .qdelta documents, searching folders recursively. Returns how many were indexed. '''
+        count = 0
+        for path in paths:
+            if os.path.isdir(path):
+                files = []
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in sorted(names)
+                                 if name.lower().endswith((".json", BINARY_EXTENSION)))
+            else:
+                files = [path]
+            for file_path in files:
+                self.update_file(file_path)
+                count += 1
+        return count
+
+    def remove_document(self, doc_id) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    # Call with the lock held
+    def _remove(self, doc_id) -> None:
+        for token in self._tokens.pop(doc_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+        self._starts.pop(doc_id, None)
+        self._ends.pop(doc_id, None)
+
+    def search(self, query: str, limit: Optional[int] = None) -> list:
+        '''
+        Finds documents containing the query's words in order.
+        Returns [{"doc_id", "matches": [(start, end), ...]}], documents with the most matches first.
+        '''
+        terms = [token.lower() for token in _TOKEN.findall(query)]
+        if not terms:
+            return []
+
+        with self._lock:
+            term_postings = []
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    return []
+                term_postings.append(postings)
+
+            # Only documents with every word can match, start from the rarest one
+            rarest = min(term_postings, key=len)
+            candidates = [doc_id for doc_id in rarest if all(doc_id in postings for postings in term_postings)]
+
+            results = []
+            for doc_id in candidates:
+                first = term_postings[0][doc_id]
+                if len(terms) == 1:
+                    hits = first
+                else:
+                    following = [set(postings[doc_id]) for postings in term_postings[1:]]
+                    hits = [p for p in first if all(p + i in found for i, found in enumerate(following, 1))]
+                if hits:
+                    starts = self._starts[doc_id]
+                    ends = self._ends[doc_id]
+                    last = len(terms) - 1
+                    results.append({"doc_id": doc_id, "matches": [(starts[p], ends[p + last]) for p in hits]})
+
+        results.sort(key=lambda r: -len(r["matches"]))
+        return results[:limit] if limit is not None else results
+
+    def save(self, path: str) -> None:
+        ''' Writes the index to a file (atomically), so it doesn't need rebuilding on the next start. '''
+        with self._lock:
+            state = {
+                "version": self.FORMAT_VERSION,
+                "postings": self._postings,
+                "starts": self._starts,
+                "ends": self._ends,
+                "tokens": self._tokens,
+            }
+            out_dir = os.path.dirname(os.path.abspath(path))
+            fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        ''' Reads an index written by save(). Only load files you wrote yourself, they're pickles. '''
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported search index version: {state.get('version')}")
+        index = cls()
+        index._postings = state["postings"]
+        index._starts = state["starts"]
+        index._ends = state["ends"]
+        index._tokens = state["tokens"]
+        return index
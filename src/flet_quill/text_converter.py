@@ -1,56 +1,314 @@
 from __future__ import annotations
 
-from typing import Union
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Optional, Union
 import json
 import os
 import re
+import tempfile
+from html.parser import HTMLParser
 from pathlib import Path
-from bs4 import BeautifulSoup
-from pypdf import PdfReader
-import markdown
-from docx import Document 
 
-    
+from .delta import compact_delta, iter_compact_delta
+from .delta_codec import BINARY_EXTENSION, MAGIC, delta_from_qdelta
+from .metrics import measure
 
-# Called to convert read and convert our file paths to delta ops (list)
-def load_file_to_delta_ops(file_path: str) -> list:
-    ''' Accepts our file path and calls the appropriate converter based on file type. '''
+if TYPE_CHECKING:
+    from .conversion_cache import ConversionCache
+
+# Converter backends (pypdf, docx, striprtf) are imported inside their converters,
+# so importing flet_quill only pays for the ones a file type actually needs
 
-    # Set the file name from the path so we know what type it is
-    file_name = os.path.basename(file_path)
-    
-    # If its json (delta ops), load and return that directly
-    if file_name.lower().endswith(".json"):
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-        
-    # If its .txt file, load and return delta ops from that
-    elif file_name.lower().endswith(".txt"):
-        return delta_from_txt(file_path)
-    
-    # If its .html file, load and return delta ops from that
-    elif file_name.lower().endswith(".html") or file_name.lower().endswith(".htm"):
-        return delta_from_html(file_path)
-    
-    # If its .pdf file, load and return delta ops from that
-    elif file_name.lower().endswith(".pdf"):
-        return delta_from_pdf(file_path)
-    
-    # If its .rtf file, load and return delta ops from that
-    elif file_name.lower().endswith(".rtf"):
-        return delta_from_rtf(file_path)
-    
-    # If its .md file, load and return delta ops from that
-    elif file_name.lower().endswith(".md") or file_name.lower().endswith(".markdown"):
-        return delta_from_md(file_path)
 
-    # If its .docx file, load and return delta ops from that
-    elif file_name.lower().endswith(".docx"):
-        return delta_from_docx(file_path)
+# Bump when a converter's output changes, so cached conversions made by older versions are ignored
+CONVERTER_VERSION = 4
 
-    # If not a supported file type, this error will fill the text editor
+# How many bytes of the file head we read to sniff its type
+SNIFF_SIZE = 4096
+
+# Formats that already are delta ops, so they're never converted to another file or cached
+DELTA_MIMES = ("application/json", "application/x-quill-delta")
+
+# Converter registry. Converters are looked up by mime type: binary signatures (magic bytes) win over
+# the extension, since those can't be mistaken, then the extension, then sniffing text-like formats
+# for files whose extension we don't know
+_converters: dict = {}          # mime -> converter function (file_path) -> list
+_extension_to_mime: dict = {}   # ".ext" -> mime
+_sniffers: list = []            # [(mime, sniff)] checked newest first
+_stream_converters: dict = {}   # mime -> streaming converter function (file_path) -> iterator of ops
+
+# How much of a file the streaming converters read at a time, and the most text they put in one insert
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def register_converter(
+    mime: str,
+    extensions: list,
+    fn: Callable[[str], list],
+    sniff: Optional[Union[bytes, Callable[[bytes], bool]]] = None,
+    iter_fn: Optional[Callable[[str], Iterator[dict]]] = None,
+) -> None:
+    '''
+    Registers a converter that turns a file path into delta ops (list).
+    extensions: file extensions it handles, like [".odt"]
+    sniff: magic bytes the file starts with, or a function given the file head (bytes) that returns True on a match.
+        Magic bytes are trusted over the extension, functions are only tried when the extension isn't registered.
+    iter_fn: optional streaming version of fn that yields ops as it reads, used by iter_delta_ops.
+    Registering an existing mime type or extension replaces the old converter.
+    '''
+    _converters[mime] = fn
+    if iter_fn is not None:
+        _stream_converters[mime] = iter_fn
     else:
-        return [{"insert": "Unsuppored file type\n"}]
+        _stream_converters.pop(mime, None)
+
+    for ext in extensions:
+        ext = ext.lower()
+        if not ext.startswith("."):
+            ext = "." + ext
+        _extension_to_mime[ext] = mime
+
+    # Drop any old sniffer for this mime, newest registrations get checked first
+    _sniffers[:] = [(m, sn) for m, sn in _sniffers if m != mime]
+    if sniff is not None:
+        _sniffers.insert(0, (mime, sniff))
+
+
+def detect_mime(file_path: str) -> Optional[str]:
+    ''' Returns the mime type of a registered converter for the file, or None if we can't convert it. '''
+
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(SNIFF_SIZE)
+    except OSError:
+        head = b""
+
+    # Magic bytes first, a .json that's really .qdelta is still .qdelta
+    for mime, sniff in _sniffers:
+        if isinstance(sniff, bytes) and head.startswith(sniff):
+            return mime
+
+    # Then the extension. A .txt starting with [{"insert" is text the user wants to see as text
+    ext = os.path.splitext(file_path)[1].lower()
+    mime = _extension_to_mime.get(ext)
+    if mime is not None or not head:
+        return mime
+
+    # Unknown extension, see if the content looks like something we know
+    for mime, sniff in _sniffers:
+        if not isinstance(sniff, bytes) and sniff(head):
+            return mime
+    return None
+
+
+def supported_extensions() -> list:
+    ''' Returns the file extensions we have converters registered for, like [".docx", ".html", ...]. '''
+    return sorted(_extension_to_mime)
+
+
+def json_path_for(file_path: str, extension: str = ".json") -> str:
+    '''
+    Returns the .json path converted delta ops are saved to for a file, next to the original.
+    Json and .qdelta files are already delta ops, so they keep their own path.
+    extension: pass ".qdelta" to save conversions in the compact binary format instead
+    '''
+    file_name = os.path.basename(file_path)
+
+    # Json can read, so it needs no change
+    if file_name.lower().endswith((".json", BINARY_EXTENSION)):
+        return file_path
+
+    # Otherwise, make a new file name with the .json extension
+    new_file_name = os.path.splitext(file_name)[0] + extension
+    return os.path.join(os.path.dirname(file_path), new_file_name)
+
+
+# Called to convert read and convert our file paths to delta ops (list)
+def load_file_to_delta_ops(file_path: str, cache: Optional[ConversionCache] = None, compact: bool = True) -> list:
+    '''
+    Accepts our file path and calls the appropriate converter based on file type.
+    If a ConversionCache is passed, conversions are read from and saved to it.
+    compact: merge neighbouring ops with the same attributes (see compact_delta), so a 50k line
+    text file is a handful of inserts instead of 50k.
+    '''
+
+    mime = detect_mime(file_path)
+
+    with measure("convert", path=file_path, mime=mime) as event:
+
+        # If not a supported file type, this error will fill the text editor
+        if mime is None:
+            event["ok"] = False
+            event["error"] = "Unsupported file type"
+            return [{"insert": "Unsupported file type\n"}]
+
+        convert = _converters[mime]
+        if compact:
+            convert = _compacted(convert)
+
+        # Json is already delta ops, so there's no parsing to save by caching it
+        if cache is None or mime in DELTA_MIMES:
+            ops = convert(file_path)
+        else:
+            version = f"{mime}:{CONVERTER_VERSION}" if compact else f"{mime}:{CONVERTER_VERSION}:raw"
+            hits = cache.hits
+            ops = cache.get_or_convert(file_path, convert, version)
+            event["cache_hit"] = cache.hits > hits
+
+        event["ops"] = len(ops)
+        try:
+            event["bytes"] = os.path.getsize(file_path)
+        except OSError:
+            pass
+        return ops
+
+
+# Wraps a converter so its output goes through compact_delta
+def _compacted(convert: Callable[[str], list]) -> Callable[[str], list]:
+    return lambda file_path: compact_delta(convert(file_path))
+
+
+# Streaming version of load_file_to_delta_ops, for files too big to hold as one list
+def iter_delta_ops(file_path: str, compact: bool = True, **options) -> Iterator[dict]:
+    '''
+    Yields the delta ops of a file as they're converted instead of building the whole list.
+    Formats without a streaming converter fall back to their regular one.
+    compact: merge neighbouring ops with the same attributes, up to STREAM_CHUNK_SIZE characters per insert.
+    options: passed on to the converter, like iter_delta_ops("big.pdf", max_pages=50)
+    Raises ValueError for files we have no converter for, so batch conversions report them as failed.
+    '''
+
+    mime = detect_mime(file_path)
+
+    if mime is None:
+        raise ValueError(f"Unsupported file type: {file_path}")
+
+    iter_fn = _stream_converters.get(mime)
+    ops = _converters[mime](file_path, **options) if iter_fn is None else iter_fn(file_path, **options)
+    if compact:
+        ops = iter_compact_delta(ops, max_length=STREAM_CHUNK_SIZE)
+    yield from ops
+
+
+def write_delta_ops_json(ops: Iterable[dict], out_path: str) -> int:
+    '''
+    Writes delta ops to a json file one op at a time, so a streamed conversion never sits in memory whole.
+    Writes to a temp file and renames it, so a failed conversion doesn't leave half a file. Returns the op count.
+    Example:
+        write_delta_ops_json(iter_delta_ops("export.html"), "export.json")
+    '''
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("[")
+            for op in ops:
+                if count:
+                    f.write(", ")
+                f.write(json.dumps(op))
+                count += 1
+            f.write("]")
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+# Groups text pieces into inserts of about STREAM_CHUNK_SIZE characters
+def _batch_inserts(pieces: Iterable[str]) -> Iterator[dict]:
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_SIZE:
+            yield {"insert": "".join(buffer)}
+            buffer = []
+            size = 0
+    if buffer:
+        yield {"insert": "".join(buffer)}
+
+
+# Called on .json files, these are already delta ops
+def delta_from_json(file_path: str) -> list:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Streams the ops of a delta json array without loading the whole file
+def iter_delta_from_json(file_path: str) -> Iterator[dict]:
+    decoder = json.JSONDecoder()
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = f.read(STREAM_CHUNK_SIZE).lstrip("\ufeff")
+        pos = 0
+        read_size = STREAM_CHUNK_SIZE
+
+        # Reads the next chunk on to what's left of the buffer, False at end of file
+        def read_more() -> bool:
+            nonlocal buffer, pos
+            chunk = f.read(read_size)
+            if not chunk:
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        # Skips whitespace (and commas between ops), returns the next character or "" at end of file
+        def next_char(skip: str) -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in skip:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not read_more():
+                    return ""
+
+        if next_char(" \t\r\n") != "[":
+            raise ValueError(f"Delta json must be a list of ops: {file_path}")
+        pos += 1
+
+        while True:
+            c = next_char(" \t\r\n,")
+            if c == "]":
+                return
+            if c == "":
+                raise ValueError(f"Unexpected end of delta json: {file_path}")
+            try:
+                op, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The op is cut off at the end of the buffer, read more and try again. Doubling what we
+                # read each time keeps one huge insert from being copied and decoded again every chunk
+                if not read_more():
+                    raise
+                read_size *= 2
+                continue
+            pos = end
+            read_size = STREAM_CHUNK_SIZE
+            yield op
+
+
+# Sniffers for the built in formats. They only get the file head, so they just look for telltale bytes
+def _sniff_json(head: bytes) -> bool:
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    return re.match(rb"\[\s*\{", text) is not None and b'"insert"' in text
+
+
+def _sniff_html(head: bytes) -> bool:
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n")[:512].lower()
+    return text.startswith((b"<!doctype html", b"<html", b"<head", b"<body")) or \
+        (text.startswith(b"<?xml") and b"<html" in text)
+
+
+def _sniff_docx(head: bytes) -> bool:
+    # Docx is a zip with word/document.xml. Xlsx and pptx are zips with [Content_Types].xml too, so that's not enough
+    return head.startswith(b"PK\x03\x04") and b"word/document.xml" in head
+
 
 # Called on .txt files to convert to delta ops
 def delta_from_txt(file_path: str) -> list:
@@ -64,82 +322,403 @@ def delta_from_txt(file_path: str) -> list:
     
     ops = [{"insert": line} for line in lines]
     return ops
+
+
+def iter_delta_from_txt(file_path: str) -> Iterator[dict]:
+    """Streams a plain text file as Quill Delta ops, one per line like delta_from_txt."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = ""
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), ""):
+            lines = (buffer + chunk).splitlines(keepends=True)
+
+            # The last line might continue in the next chunk
+            buffer = lines.pop() if lines else ""
+            for line in lines:
+                yield {"insert": line}
+        if buffer:
+            yield {"insert": buffer}
     
 
 # Called on .html files to convert to delta ops
 def delta_from_html(file_path: str) -> list:
     """
-    Load HTML from file_path and convert to Delta ops JSON list.
-    Returns [{"insert": "text"}, {"insert": "\n"}, ...]
+    Load HTML from file_path and convert to Delta ops JSON list, keeping formatting.
+    Inline tags become attributes on the text (bold, italic, link, ...), block tags attributes
+    on the "\\n" ending their lines (header, list, blockquote, code-block, ...).
     """
-    
+    return list(iter_delta_from_html(file_path))
+
+
+# Inline tags and the attributes their text gets
+_HTML_INLINE_TAGS = {
+    "b": {"bold": True},
+    "strong": {"bold": True},
+    "i": {"italic": True},
+    "em": {"italic": True},
+    "cite": {"italic": True},
+    "var": {"italic": True},
+    "u": {"underline": True},
+    "ins": {"underline": True},
+    "s": {"strike": True},
+    "strike": {"strike": True},
+    "del": {"strike": True},
+    "code": {"code": True},
+    "kbd": {"code": True},
+    "samp": {"code": True},
+    "tt": {"code": True},
+    "sub": {"script": "sub"},
+    "sup": {"script": "super"},
+}
+
+# Tags that end the line before and after them. Their line attributes are worked out in _block_attributes
+_HTML_BLOCK_TAGS = {
+    "p", "div", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "blockquote", "pre", "ul", "ol",
+    "table", "thead", "tbody", "tfoot", "section", "article", "header", "footer", "nav", "aside",
+    "main", "figure", "figcaption", "dl", "dt", "dd", "address", "form", "fieldset", "details", "summary",
+}
+
+# Tags whose text isn't document text. Not <head>, </head> is optional so skipping it could swallow the
+# whole body. What's in it (title, style, script, meta...) is skipped or ignored on its own
+_HTML_SKIP_TAGS = {"script", "style", "template", "noscript", "title"}
+
+# Tags that never have an end tag
+_HTML_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+# A new one of these closes an open one at the same level, html lets them go unclosed
+_HTML_SELF_CLOSING = {"li", "p", "dt", "dd", "tr", "td", "th"}
+
+_HTML_WHITESPACE = re.compile(r"[ \t\n\r\f]+")
+_CSS_DECLARATION = re.compile(r"([a-z-]+)\s*:\s*([^;]+)")
+
+
+def _css_inline_attributes(style: str) -> dict:
+    attributes = {}
+    for name, value in _CSS_DECLARATION.findall(style.lower()):
+        value = value.strip()
+        if name == "font-weight" and (value in ("bold", "bolder") or value[:1] in "6789" and value.isdigit()):
+            attributes["bold"] = True
+        elif name == "font-style" and value in ("italic", "oblique"):
+            attributes["italic"] = True
+        elif name in ("text-decoration", "text-decoration-line"):
+            if "underline" in value:
+                attributes["underline"] = True
+            if "line-through" in value:
+                attributes["strike"] = True
+        elif name == "color" and value.startswith("#"):
+            attributes["color"] = value
+        elif name == "background-color" and value.startswith("#"):
+            attributes["background"] = value
+    return attributes
+
+
+# Converts html fed to it in chunks to delta ops in one pass, collecting them in self.ops for the
+# caller to take after each feed. Only the open tags are kept, so memory doesn't grow with the file
+class _HtmlDeltaParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.ops: list = []
+        self._inline_stack: list = []   # (tag, attributes it adds)
+        self._inline: dict = {}         # attributes of text right now, all of the stack merged
+        self._blocks: list = []         # (tag, line attributes it adds)
+        self._skip_depth = 0
+        self._pre_depth = 0
+        self._pre_start = False         # a newline right after <pre> isn't content
+        self._line_has_content = False
+        self._space: Optional[dict] = None  # attributes of a collapsed space waiting for more text on the line
+
+    # Attributes of the "\n" ending the current line, inner blocks win
+    def _block_attributes(self) -> Optional[dict]:
+        attributes = {}
+        for _, added in self._blocks:
+            attributes.update(added)
+        if self._pre_depth:
+            attributes = {"code-block": True}
+        return attributes or None
 
-    # Read HTML file safely
+    def _insert(self, value, attributes: Optional[dict]):
+        op = {"insert": value}
+        if attributes:
+            op["attributes"] = dict(attributes)
+        self.ops.append(op)
+
+    def _end_line(self, always: bool = False):
+        if self._line_has_content or always:
+            self._insert("\n", self._block_attributes())
+        self._line_has_content = False
+        self._space = None
+
+    def _set_inline(self):
+        self._inline = {}
+        for _, added in self._inline_stack:
+            self._inline.update(added)
+
+    def _embed(self, embed: dict):
+        if self._space is not None and self._line_has_content:
+            self._insert(" ", self._space)
+        self._space = None
+        self._insert(embed, self._inline)
+        self._line_has_content = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _HTML_SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth:
+            return
+
+        attrs = dict(attrs)
+        if tag in _HTML_SELF_CLOSING:
+            self._close_open(tag)
+
+        if tag == "br":
+            self._end_line(always=True)
+        elif tag == "hr":
+            self._end_line()
+            self._embed({"divider": True})
+            self._end_line()
+        elif tag == "img":
+            if attrs.get("src"):
+                self._embed({"image": attrs["src"]})
+        elif tag in ("td", "th"):
+            # Cells of a row share its line, tab separated
+            if self._line_has_content:
+                self._insert("\t", None)
+                self._space = None
+        elif tag in _HTML_BLOCK_TAGS:
+            self._end_line()
+            self._blocks.append((tag, self._tag_block_attributes(tag, attrs)))
+            if tag == "pre":
+                self._pre_depth += 1
+                self._pre_start = True
+        elif tag not in _HTML_VOID_TAGS:
+            added = dict(_HTML_INLINE_TAGS.get(tag, ()))
+            if tag == "a" and attrs.get("href"):
+                added["link"] = attrs["href"]
+            if attrs.get("style"):
+                added.update(_css_inline_attributes(attrs["style"]))
+            if self._pre_depth:
+                added.pop("code", None)
+            self._inline_stack.append((tag, added))
+            if added:
+                self._set_inline()
+
+    def _tag_block_attributes(self, tag: str, attrs: dict) -> dict:
+        added = {}
+        if tag[0] == "h" and tag[1:].isdigit():
+            added["header"] = int(tag[1:])
+        elif tag == "blockquote":
+            added["blockquote"] = True
+        elif tag == "li":
+            lists = [t for t, _ in self._blocks if t in ("ul", "ol")]
+            added["list"] = "ordered" if lists and lists[-1] == "ol" else "bullet"
+            added["indent"] = max(len(lists) - 1, 0) or None
+        style = (attrs.get("style") or "").lower()
+        align = re.search(r"text-align\s*:\s*(center|right|justify)", style)
+        if align:
+            added["align"] = align.group(1)
+        return {k: v for k, v in added.items() if v is not None}
+
+    # Closes an unclosed <li>/<p>/... when the next one starts, as long as no other block is in between
+    def _close_open(self, tag: str):
+        for i in range(len(self._blocks) - 1, -1, -1):
+            open_tag = self._blocks[i][0]
+            if open_tag == tag:
+                self.handle_endtag(tag)
+                return
+            if open_tag in ("ul", "ol", "table", "blockquote") or open_tag not in _HTML_SELF_CLOSING:
+                return
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _HTML_VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in _HTML_SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+            return
+        if self._skip_depth:
+            return
+
+        if tag in _HTML_BLOCK_TAGS:
+            if not any(t == tag for t, _ in self._blocks):
+                return
+            # End the line while the block's attributes still apply, closing anything left open inside it
+            self._end_line()
+            while self._blocks:
+                open_tag, _ = self._blocks.pop()
+                if open_tag == "pre":
+                    self._pre_depth -= 1
+                if open_tag == tag:
+                    break
+        elif tag not in _HTML_VOID_TAGS:
+            for i in range(len(self._inline_stack) - 1, -1, -1):
+                if self._inline_stack[i][0] == tag:
+                    del self._inline_stack[i:]
+                    self._set_inline()
+                    break
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+
+        # Preformatted text keeps its whitespace, every newline ends a code block line
+        if self._pre_depth:
+            if self._pre_start and data.startswith("\n"):
+                data = data[1:]
+            self._pre_start = False
+            lines = data.replace("\r\n", "\n").split("\n")
+            for i, line in enumerate(lines):
+                if i:
+                    self._end_line(always=True)
+                if line:
+                    self._insert(line, self._inline)
+                    self._line_has_content = True
+            return
+
+        # Anywhere else whitespace runs collapse to one space, dropped at the start and end of lines
+        text = _HTML_WHITESPACE.sub(" ", data)
+        if not text:
+            return
+        if text[0] == " ":
+            if self._space is None:
+                self._space = self._inline
+            text = text[1:]
+        if not text:
+            return
+        if self._space is not None and self._line_has_content:
+            self._insert(" ", self._space)
+        self._space = None
+        if text[-1] == " ":
+            text = text[:-1]
+            self._space = self._inline
+        self._insert(text, self._inline)
+        self._line_has_content = True
+
+    def close(self):
+        super().close()
+        self._end_line()
+
+
+def iter_delta_from_html(file_path: str) -> Iterator[dict]:
+    """Streams an HTML file as Delta ops, same as delta_from_html."""
     if not os.path.exists(file_path) or not os.path.isfile(file_path):
         raise ValueError(f"HTML file not found: {file_path}")
-    
+
+    parser = _HtmlDeltaParser()
+    empty = True
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), ""):
+            parser.feed(chunk)
+            if parser.ops:
+                empty = False
+                yield from parser.ops
+                parser.ops.clear()
+    parser.close()
+    if parser.ops:
+        empty = False
+        yield from parser.ops
+
+    # Documents always end with a newline, even empty ones
+    if empty:
+        yield {"insert": "\n"}
+
+
+# Pages each pdf worker extracts per task. Small enough to spread evenly, big enough that
+# re-opening the reader in each worker doesn't dominate
+PDF_PAGES_PER_TASK = 16
+
+
+def _import_pdf_reader():
     try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            html = f.read().strip()
-    except Exception as e:
-        raise RuntimeError(f"Failed to read HTML file {file_path}: {e}")
+        from pypdf import PdfReader  # type: ignore
+    except ImportError as e:
+        raise RuntimeError(
+            "PDF conversion requires 'pypdf'. Install: pip install pypdf"
+        ) from e
+    return PdfReader
 
-    if not html:
-        return [{"insert": "\n"}]  # Empty document
 
-    soup = BeautifulSoup(html, "html.parser")
-    
-    # Replace <br> with newlines
-    for br in soup.find_all("br"):
-        br.replace_with("\n")
-    
-    # Add newlines after block elements
-    for tag_name in ("p", "div", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr"):
-        for t in soup.find_all(tag_name):
-            t.append("\n")
-    
-    # Extract and clean text
-    text = soup.get_text()
-    lines = [ln.rstrip() for ln in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
-    
-    # Collapse excessive blank lines (max 2)
-    out_lines = []
-    blank_run = 0
-    for ln in lines:
-        if ln.strip() == "":
-            blank_run += 1
-            if blank_run <= 2:
-                out_lines.append("")
-        else:
-            blank_run = 0
-            out_lines.append(ln)
-    
-    full_text = "\n".join(out_lines).strip()
-    if not full_text.endswith("\n"):
-        full_text += "\n"
-    
-    # Return proper Delta ops list
-    return [{"insert": full_text}]
+# Extracts and cleans the text of pages [start, stop) in an open reader
+def _read_pdf_pages(reader, start: int, stop: int) -> list:
+    pages_text = []
+    for index in range(start, stop):
+        t = (reader.pages[index].extract_text() or "").replace("\r\n", "\n").replace("\r", "\n").strip()
+        if t:
+            # Normalize multiple spaces to single space, preserve newlines
+            t = re.sub(r' +', ' ', t)
+        pages_text.append(t)
+    return pages_text
+
+
+# The pages [start, stop) to extract from an open reader, page_range and max_pages clamped to the document
+def _pdf_page_span(reader, page_range: Optional[tuple], max_pages: Optional[int]) -> tuple:
+    start, stop = page_range if page_range is not None else (0, len(reader.pages))
+    start = max(0, start)
+    stop = min(len(reader.pages), stop)
+    if max_pages is not None:
+        stop = min(stop, start + max_pages)
+    return start, max(start, stop)
+
 
+# Same as above for pool workers, they open their own reader. Top level so it can be pickled
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> list:
+    return _read_pdf_pages(_import_pdf_reader()(file_path), start, stop)
 
-def delta_from_pdf(file_path: str) -> list:
-    """Convert PDF file at file_path to Delta ops JSON list."""
+
+def delta_from_pdf(
+    file_path: str,
+    workers: Optional[int] = None,
+    page_range: Optional[tuple] = None,
+    max_pages: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> list:
+    """
+    Convert PDF file at file_path to Delta ops JSON list.
+    workers: extract pages in a process pool with this many workers (None or 1 extracts in this process)
+    page_range: (start, stop) pages to extract, 0 based and stop exclusive
+    max_pages: only extract up to this many pages from the start of the range
+    on_progress: called with (pages_done, pages_total) as pages finish
+    """
     if not os.path.exists(file_path) or not os.path.isfile(file_path):
         raise ValueError(f"PDF file not found: {file_path}")
     
-    
     # Read PDF from file path
-    reader = PdfReader(file_path)
-    
+    reader = _import_pdf_reader()(file_path)
+    start, stop = _pdf_page_span(reader, page_range, max_pages)
+    total = stop - start
+
     pages_text = []
-    for page in reader.pages:
-        t = (page.extract_text() or "").replace("\r\n", "\n").replace("\r", "\n").strip()
-        if t:
-            # Normalize multiple spaces to single space, preserve newlines
-            t = re.sub(r' +', ' ', t)
-            pages_text.append(t)
 
-    full_text = "\n\n".join(pages_text).strip()
+    # Small documents (or no workers) aren't worth starting a pool for
+    if not workers or workers <= 1 or total <= PDF_PAGES_PER_TASK:
+        for index in range(start, stop):
+            pages_text.extend(_read_pdf_pages(reader, index, index + 1))
+            if on_progress is not None:
+                on_progress(index - start + 1, total)
+
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # Split into page chunks, then put the results back in page order as they finish
+        chunks = [(s, min(s + PDF_PAGES_PER_TASK, stop)) for s in range(start, stop, PDF_PAGES_PER_TASK)]
+        results: dict = {}
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_extract_pdf_pages, file_path, s, e): s for s, e in chunks}
+            for future in as_completed(futures):
+                chunk_text = future.result()
+                results[futures[future]] = chunk_text
+                done += len(chunk_text)
+                if on_progress is not None:
+                    on_progress(done, total)
+
+        for s, _ in chunks:
+            pages_text.extend(results[s])
+
+    full_text = "\n\n".join(t for t in pages_text if t).strip()
     
     # FIX: Create Delta directly (match delta_from_html pattern)
     if not full_text.endswith("\n"):
@@ -147,6 +726,37 @@ def delta_from_pdf(file_path: str) -> list:
     return [{"insert": full_text}]
 
 
+def iter_delta_from_pdf(
+    file_path: str,
+    page_range: Optional[tuple] = None,
+    max_pages: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[dict]:
+    """
+    Streams a PDF as Delta ops one page at a time, with the same text as delta_from_pdf.
+    page_range, max_pages and on_progress work like delta_from_pdf's, pages are always read in this process.
+    """
+    if not os.path.exists(file_path) or not os.path.isfile(file_path):
+        raise ValueError(f"PDF file not found: {file_path}")
+
+    reader = _import_pdf_reader()(file_path)
+    start, stop = _pdf_page_span(reader, page_range, max_pages)
+
+    def pieces() -> Iterator[str]:
+        first = True
+        for index in range(start, stop):
+            t = _read_pdf_pages(reader, index, index + 1)[0]
+            if on_progress is not None:
+                on_progress(index - start + 1, stop - start)
+            if not t:
+                continue
+            yield t if first else "\n\n" + t
+            first = False
+        yield "\n"
+
+    yield from _batch_inserts(pieces())
+
+
 def delta_from_rtf(file_path: str) -> list:
     """
     Load RTF from file_path and convert to Delta ops JSON list.
@@ -185,98 +795,503 @@ def delta_from_rtf(file_path: str) -> list:
 
 def delta_from_md(file_path: str) -> list:
     """
-    Load Markdown from file_path and convert to Delta ops JSON list.
-    Returns [{"insert": "text\n"}, ...]
+    Load Markdown from file_path and convert to Delta ops JSON list, keeping formatting.
+    Returns [{"insert": "text"}, {"insert": "\\n", "attributes": {"header": 1}}, ...]
     """
+    return list(iter_delta_from_md(file_path))
 
-    # Read Markdown content
-    with open(file_path, 'r', encoding='utf-8') as f:
-        md_text = f.read()
 
-    # Convert to HTML using the Python Markdown package
-    # Use commonmark-like parsing with some basic extensions for better structure
-    html = markdown.markdown(md_text, extensions=['extra', 'codehilite'])
+_MD_ATX_HEADER = re.compile(r"^(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_MD_FENCE = re.compile(r"^(`{3,}|~{3,})(.*)$")
+_MD_RULE = re.compile(r"^([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_MD_SETEXT = re.compile(r"^(=+|-+)[ \t]*$")
+_MD_LIST_ITEM = re.compile(r"^([-+*]|\d{1,9}[.)])(?:( +)(.*))?$")
+_MD_TASK = re.compile(r"^\[([ xX])\][ \t]+")
+_MD_REFERENCE = re.compile(r"^\[([^\]]+)\]:[ \t]*<?(\S+?)>?(?:[ \t]+.*)?$")
+_MD_TABLE_DIVIDER = re.compile(r"^\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+_MD_TABLE_CELL_SPLIT = re.compile(r"(?<!\\)\|")
+_MD_INLINE_SPECIAL = re.compile(r"[\\`!\[<*_~\n]")
+_MD_BRACKET = re.compile(r"\\.|[\[\]]")
+_MD_AUTOLINK = re.compile(r"<([A-Za-z][A-Za-z0-9+.-]{1,31}:[^\s<>]*|[^\s<>@]+@[^\s<>@]+\.[A-Za-z]+)>")
+_MD_HTML_TAG = re.compile(r"</?([A-Za-z][A-Za-z0-9-]*)(?:\s[^<>]*)?/?>")
+_MD_ESCAPABLE = set("\\`*_{}[]()#+-.!|~<>\"'")
 
-    # Parse HTML to structured blocks
-    soup = BeautifulSoup(html, 'html.parser')
+# Inline html tags that mean the same as markdown formatting, others are dropped leaving their text
+_MD_HTML_INLINE = {"b": "bold", "strong": "bold", "i": "italic", "em": "italic", "u": "underline", "s": "strike", "del": "strike"}
 
-    ops = []
 
-    # Helper to append an insert operation with a trailing newline if needed
-    def append_insert(text, with_nl=True):
-        if not text:
+# Inline markdown to [(text or embed, attributes)] pieces, one scan over the text. Emphasis closers are found
+# ahead with str.find, and a delimiter that had no closer from some point on isn't searched for again
+class _MarkdownInline:
+
+    def __init__(self, references: dict):
+        self.references = references
+
+    def parse(self, text: str, attributes: dict, out: list) -> None:
+        n = len(text)
+        missing: dict = {}  # delimiter or closing tag -> earliest start we know has no closer after it
+        brackets: Optional[dict] = None
+        buffer: list = []
+        i = 0
+
+        def flush():
+            if buffer:
+                out.append(("".join(buffer), attributes))
+                buffer.clear()
+
+        while i < n:
+            match = _MD_INLINE_SPECIAL.search(text, i)
+            if match is None:
+                buffer.append(text[i:])
+                break
+            j = match.start()
+            if j > i:
+                buffer.append(text[i:j])
+            i = j
+            c = text[i]
+
+            if c == "\n":
+                buffer.append(c)
+                i += 1
+
+            elif c == "\\":
+                if i + 1 < n and text[i + 1] in _MD_ESCAPABLE:
+                    buffer.append(text[i + 1])
+                    i += 2
+                else:
+                    buffer.append(c)
+                    i += 1
+
+            elif c == "`":
+                run = _md_run(text, i, c)
+                end = self._find_code_end(text, i + run, run)
+                if end is None:
+                    buffer.append(text[i:i + run])
+                    i += run
+                    continue
+                flush()
+                code = text[i + run:end]
+                if len(code) > 2 and code[0] == " " and code[-1] == " " and code.strip():
+                    code = code[1:-1]
+                out.append((code, dict(attributes, code=True)))
+                i = end + run
+
+            elif c in "![":
+                start = i + 1 if c == "!" else i
+                link = None
+                if text.startswith("[", start):
+                    if brackets is None:
+                        brackets = _md_brackets(text)
+                    link = _md_link(text, start, brackets.get(start), self.references)
+                if link is None:
+                    buffer.append(c)
+                    i += 1
+                    continue
+                label, url, end = link
+                flush()
+                if c == "!":
+                    out.append(({"image": url}, attributes))
+                else:
+                    self.parse(label, dict(attributes, link=url), out)
+                i = end
+
+            elif c == "<":
+                autolink = _MD_AUTOLINK.match(text, i)
+                tag = None if autolink else _MD_HTML_TAG.match(text, i)
+                if autolink:
+                    flush()
+                    url = autolink.group(1)
+                    out.append((url, dict(attributes, link=url if ":" in url else "mailto:" + url)))
+                    i = autolink.end()
+                elif tag:
+                    name = tag.group(1).lower()
+                    if name == "br":
+                        buffer.append("\n")
+                        i = tag.end()
+                    elif name in _MD_HTML_INLINE and not tag.group(0).startswith("</"):
+                        # Formats up to its closing tag, if there is one
+                        closing = f"</{tag.group(1)}>"
+                        close = -1 if tag.end() >= missing.get(closing, n + 1) else text.find(closing, tag.end())
+                        if close < 0:
+                            missing[closing] = min(missing.get(closing, tag.end()), tag.end())
+                            i = tag.end()
+                            continue
+                        flush()
+                        self.parse(text[tag.end():close], dict(attributes, **{_MD_HTML_INLINE[name]: True}), out)
+                        i = close + len(closing)
+                    else:
+                        i = tag.end()
+                else:
+                    buffer.append(c)
+                    i += 1
+
+            else:
+                # * and _ emphasis, ~~ strikethrough
+                run = _md_run(text, i, c)
+                after = text[i + run:i + run + 1]
+                opens = after and not after.isspace() and not (c == "_" and i and text[i - 1].isalnum())
+                sizes = ((2,) if run >= 2 else ()) if c == "~" else ((3, 2, 1) if run >= 3 else (2, 1) if run == 2 else (1,))
+                for size in sizes if opens else ():
+                    close = self._find_closer(text, i + size, c, size, missing)
+                    if close is not None:
+                        flush()
+                        styled = dict(attributes)
+                        if c == "~":
+                            styled["strike"] = True
+                        else:
+                            if size >= 2:
+                                styled["bold"] = True
+                            if size != 2:
+                                styled["italic"] = True
+                        self.parse(text[i + size:close], styled, out)
+                        i = close + size
+                        break
+                else:
+                    buffer.append(text[i:i + run])
+                    i += run
+
+        flush()
+
+    @staticmethod
+    def _find_code_end(text: str, start: int, run: int) -> Optional[int]:
+        ticks = "`" * run
+        j = text.find(ticks, start)
+        while j >= 0:
+            end_run = _md_run(text, j, "`")
+            if end_run == run:
+                return j
+            j = text.find(ticks, j + end_run)
+        return None
+
+    @staticmethod
+    def _find_closer(text: str, start: int, c: str, size: int, missing: dict) -> Optional[int]:
+        key = (c, size)
+        if start >= missing.get(key, len(text) + 1):
+            return None
+        j = text.find(c * size, start)
+        while j >= 0:
+            run = _md_run(text, j, c)
+            # The closer is the end of a longer run (**a *b*** closes b first), but a lone ** doesn't close *
+            close = j + run - size
+            fits = run == size or run >= size + 2 or size >= 2
+            if fits and close > start and not text[close - 1].isspace() and \
+                    not (c == "_" and text[close + size:close + size + 1].isalnum()):
+                return close
+            j = text.find(c * size, j + run)
+        missing[key] = min(missing.get(key, start), start)
+        return None
+
+
+def _md_run(text: str, i: int, c: str) -> int:
+    j = i
+    while j < len(text) and text[j] == c:
+        j += 1
+    return j - i
+
+
+# [label](url "title"), [label][ref] or [ref] at text[i], returns (label, url, end) or None
+# Index of each [ -> its matching ], found in one pass
+def _md_brackets(text: str) -> dict:
+    pairs = {}
+    opened = []
+    for match in _MD_BRACKET.finditer(text):
+        if match.group() == "[":
+            opened.append(match.start())
+        elif match.group() == "]" and opened:
+            pairs[opened.pop()] = match.start()
+    return pairs
+
+
+# [label](url "title"), [label][ref] or [ref] at text[i] (its ] at j), returns (label, url, end) or None
+def _md_link(text: str, i: int, j: Optional[int], references: dict) -> Optional[tuple]:
+    if j is None:
+        return None
+
+    rest = j + 1
+    if text.startswith("(", rest):
+        close = text.find(")", rest)
+        if close < 0:
+            return None
+        target = text[rest + 1:close].strip().split()
+        url = target[0].strip("<>") if target else ""
+        return text[i + 1:j], url, close + 1
+
+    # Reference labels are at most 999 characters, longer ones can't match so aren't sliced out
+    if not references or j - i > 1000:
+        return None
+    label = text[i + 1:j]
+    if text.startswith("[", rest):
+        close = text.find("]", rest, rest + 1001)
+        if close >= 0:
+            url = references.get((text[rest + 1:close] or label).lower())
+            if url is not None:
+                return label, url, close + 1
+    url = references.get(label.lower())
+    if url is not None:
+        return label, url, rest
+    return None
+
+
+# Converts markdown fed to it a line at a time to delta ops in one pass, collected in self.ops for the
+# caller to take. Only the open paragraph and list nesting are kept, so memory doesn't grow with the file
+class _MarkdownDeltaParser:
+
+    def __init__(self, references: Optional[dict] = None):
+        self.ops: list = []
+        self._references: dict = references if references is not None else {}
+        self._inline = _MarkdownInline(self._references)
+        self._paragraph: list = []          # lines of the open paragraph
+        self._paragraph_attributes: Optional[dict] = None
+        self._fence: Optional[tuple] = None  # (fence chars, indent) of an open code fence
+        self._lists: list = []              # (content indent, list type) of the open list items
+        self._table = False
+
+    # Emits inline pieces, any "\n" in them (hard breaks) ends a line with block_attributes. Spaces around
+    # a hard break go, and in a list item the lines after one carry on the item like its other paragraphs
+    def _emit(self, pieces: list, block_attributes: Optional[dict]) -> None:
+        line_attributes = block_attributes
+        after_break = False
+        for value, attributes in pieces:
+            if not isinstance(value, str):
+                self._insert(value, attributes)
+                after_break = False
+                continue
+            lines = value.split("\n")
+            for k, line in enumerate(lines):
+                if k:
+                    self._trim_line_end()
+                    self._insert("\n", line_attributes)
+                    if block_attributes and "list" in block_attributes:
+                        line_attributes = {"indent": block_attributes.get("indent", 0) + 1}
+                    after_break = True
+                if after_break:
+                    line = line.lstrip(" ")
+                if line:
+                    self._insert(line, attributes)
+                    after_break = False
+        self._insert("\n", line_attributes)
+
+    # Drops trailing spaces from the text before a hard break
+    def _trim_line_end(self) -> None:
+        while self.ops:
+            last = self.ops[-1]
+            insert = last["insert"]
+            if not isinstance(insert, str) or insert == "\n" or last.get("attributes", {}).get("code"):
+                return
+            trimmed = insert.rstrip(" ")
+            if trimmed:
+                last["insert"] = trimmed
+                return
+            self.ops.pop()
+
+    def _insert(self, value, attributes: Optional[dict]) -> None:
+        op = {"insert": value}
+        if attributes:
+            op["attributes"] = dict(attributes)
+        self.ops.append(op)
+
+    def _emit_inline(self, text: str, block_attributes: Optional[dict], attributes: Optional[dict] = None) -> None:
+        pieces: list = []
+        self._inline.parse(text, attributes or {}, pieces)
+        self._emit(pieces, block_attributes)
+
+    def _flush_paragraph(self) -> None:
+        if not self._paragraph:
             return
-        insert_text = text if not with_nl else text + '\n'
-        ops.append({"insert": insert_text})
-
-    # Map HTML elements to Delta blocks
-    for element in soup.body or soup:
-        tag = element.name if element.name else None
-
-        if tag in {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}:
-            level = int(tag[1])
-            header_text = element.get_text(" ", strip=True)
-            # Use a bold/bold-ish style for headers and add a newline
-            # Delta format: insert with attributes for header
-            ops.append({"insert": header_text + "\n", "attributes": {"header": level}})
-            continue
-
-        if tag in {'p'}:
-            text = element.get_text(" ", strip=True)
-            if text:
-                append_insert(text)
-            continue
-
-        if tag in {'li'}:
-            # List item. Flatten with bullet and newline.
-            text = element.get_text(" ", strip=True)
-            if text:
-                # Delta: use bullet list attribute
-                ops.append({"insert": text + "\n", "attributes": {"list": "bullet"}})
-            continue
-
-        if tag in {'pre'}:
-            code = element.get_text()
-            if code:
-                # Use code block with newline
-                ops.append({"insert": code + "\n", "attributes": {"code-block": True}})
-            continue
-
-        if tag in {'code'}:
-            code_text = element.get_text()
-            if code_text:
-                # Inline code combined in a paragraph; wrap in backticks appearance not stored,
-                # but we can mark as code with inline style if desired.
-                ops.append({"insert": code_text, "attributes": {"code": True}})
-            continue
-
-        if tag in {'strong', 'b'}:
-            # Bold inside a paragraph or list item
-            text = element.get_text(" ", strip=True)
-            if text:
-                ops.append({"insert": text, "attributes": {"bold": True}})
-            continue
-
-        if tag in {'em', 'i'}:
-            text = element.get_text(" ", strip=True)
-            if text:
-                ops.append({"insert": text, "attributes": {"italic": True}})
-            continue
-
-        # Fallback: treat as a paragraph
-        if element.string:
-            append_insert(element.string.strip())
-
-    # Normalize: merge adjacent plain inserts if needed (not strictly required for Delta)
-    # Here we simply return the constructed list.
-    return ops
+        # Soft line breaks are spaces, two trailing spaces or a backslash make a hard break
+        parts = []
+        last = len(self._paragraph) - 1
+        for k, line in enumerate(self._paragraph):
+            if k == last:
+                parts.append(line.strip())
+            elif line.endswith("  ") or line.endswith("\\"):
+                parts.append(line.rstrip(" \\").strip() + "\n")
+            else:
+                parts.append(line.strip() + " ")
+        self._emit_inline("".join(parts), self._paragraph_attributes)
+        self._paragraph = []
+        self._paragraph_attributes = None
+
+    def _emit_table_row(self, line: str, header: bool) -> None:
+        cells = _MD_TABLE_CELL_SPLIT.split(line.strip().strip("|"))
+        pieces: list = []
+        for k, cell in enumerate(cells):
+            if k:
+                pieces.append(("\t", {}))
+            self._inline.parse(cell.strip(), {"bold": True} if header else {}, pieces)
+        self._emit(pieces, None)
+
+    def feed_line(self, line: str) -> None:
+        line = line.rstrip("\r\n").expandtabs(4)
+
+        # Block quotes: strip the markers, the rest is parsed as usual
+        quoted = False
+        stripped = line.lstrip(" ")
+        while stripped.startswith(">") and len(line) - len(stripped) < 4:
+            quoted = True
+            line = stripped[2:] if stripped.startswith("> ") else stripped[1:]
+            stripped = line.lstrip(" ")
+
+        # Inside a code fence everything is code until the closing fence
+        if self._fence is not None:
+            fence, fence_indent = self._fence
+            if stripped.startswith(fence) and not stripped.rstrip().strip(fence[0]):
+                self._fence = None
+            else:
+                self._insert(line[min(fence_indent, len(line) - len(stripped)):], None) if stripped else None
+                self._insert("\n", {"code-block": True})
+            return
+
+        if not stripped:
+            self._flush_paragraph()
+            self._table = False
+            return
+
+        indent = len(line) - len(stripped)
+        item = _MD_LIST_ITEM.match(stripped) if not _MD_RULE.match(stripped) else None
+
+        # Lines that aren't new blocks carry on an open paragraph, whatever their indent
+        if self._paragraph and not item and not self._starts_block(stripped) and \
+                not (self._paragraph_attributes is None and _MD_SETEXT.match(stripped)) and \
+                not (len(self._paragraph) == 1 and _MD_TABLE_DIVIDER.match(stripped) and "|" in self._paragraph[0]):
+            self._paragraph.append(stripped if not line.endswith("  ") else line.strip() + "  ")
+            return
+
+        # Leave list items this line isn't indented into
+        while self._lists and indent < self._lists[-1][0]:
+            self._lists.pop()
+        base = self._lists[-1][0] if self._lists else 0
+
+        if item:
+            self._flush_paragraph()
+            self._table = False
+            marker, spaces, content = item.group(1), item.group(2) or "", item.group(3) or ""
+            if len(spaces) > 4:
+                content = spaces[1:] + content
+                spaces = " "
+            self._lists.append((indent + len(marker) + max(len(spaces), 1), "bullet" if marker[0] in "-+*" else "ordered"))
+            list_type = self._lists[-1][1]
+            task = _MD_TASK.match(content)
+            if task:
+                list_type = "unchecked" if task.group(1) == " " else "checked"
+                content = content[task.end():]
+            attributes = {"list": list_type}
+            if len(self._lists) > 1:
+                attributes["indent"] = len(self._lists) - 1
+            self._paragraph = [content]
+            self._paragraph_attributes = attributes
+            return
+
+        # Indented code, unless it's carrying on a paragraph
+        if indent - base >= 4 and not self._paragraph:
+            self._insert(line[base + 4:], None)
+            self._insert("\n", {"code-block": True})
+            return
+
+        fence = _MD_FENCE.match(stripped)
+        if fence and not (fence.group(1)[0] == "`" and "`" in fence.group(2)):
+            self._flush_paragraph()
+            self._fence = (fence.group(1), indent)
+            return
+
+        header = _MD_ATX_HEADER.match(stripped)
+        if header:
+            self._flush_paragraph()
+            self._emit_inline(header.group(2) or "", {"header": len(header.group(1))})
+            return
+
+        if self._paragraph and self._paragraph_attributes is None and _MD_SETEXT.match(stripped):
+            # The paragraph above was a header all along
+            self._paragraph_attributes = {"header": 1 if stripped[0] == "=" else 2}
+            self._flush_paragraph()
+            return
+
+        if _MD_RULE.match(stripped):
+            self._flush_paragraph()
+            self._insert({"divider": True}, None)
+            self._insert("\n", None)
+            return
+
+        if len(self._paragraph) == 1 and "|" in self._paragraph[0] and _MD_TABLE_DIVIDER.match(stripped):
+            header_row = self._paragraph[0]
+            self._paragraph = []
+            self._paragraph_attributes = None
+            self._emit_table_row(header_row, header=True)
+            self._table = True
+            return
+
+        if self._table and "|" in stripped:
+            self._emit_table_row(stripped, header=False)
+            return
+        self._table = False
+
+        reference = _MD_REFERENCE.match(stripped) if not self._paragraph else None
+        if reference:
+            self._references.setdefault(reference.group(1).lower(), reference.group(2))
+            return
+
+        # A new paragraph. Inside a list it's more of the item, indented to line up with it
+        self._flush_paragraph()
+        attributes = {}
+        if quoted:
+            attributes["blockquote"] = True
+        elif self._lists:
+            attributes["indent"] = len(self._lists)
+        self._paragraph = [stripped]
+        self._paragraph_attributes = attributes or None
+
+    @staticmethod
+    def _starts_block(stripped: str) -> bool:
+        return bool(_MD_ATX_HEADER.match(stripped) or _MD_FENCE.match(stripped) or _MD_RULE.match(stripped))
+
+    def close(self) -> None:
+        self._flush_paragraph()
+
+
+# [name]: url definitions can come after the links using them, so they're collected in a quick first pass
+def _md_references(file_path: str) -> dict:
+    references: dict = {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith("[") and "]:" in stripped:
+                match = _MD_REFERENCE.match(stripped)
+                if match:
+                    references.setdefault(match.group(1).lower(), match.group(2))
+    return references
+
+
+def iter_delta_from_md(file_path: str) -> Iterator[dict]:
+    """Streams a Markdown file as Delta ops, same as delta_from_md."""
+    parser = _MarkdownDeltaParser(_md_references(file_path))
+    empty = True
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parser.feed_line(line)
+            if len(parser.ops) >= 256:
+                empty = False
+                yield from parser.ops
+                parser.ops.clear()
+    parser.close()
+    if parser.ops:
+        empty = False
+        yield from parser.ops
+
+    # Documents always end with a newline, even empty ones
+    if empty:
+        yield {"insert": "\n"}
 
 
 def delta_from_docx(file_path: str) -> list:
     '''
     Load Docx to delta ops
     '''
-    #from docx import Document
+    try:
+        from docx import Document  # type: ignore
+    except ImportError as e:
+        raise RuntimeError(
+            "DOCX conversion requires 'python-docx'. Install: pip install python-docx"
+        ) from e
 
     document = Document(file_path)
     ops = []
@@ -338,3 +1353,19 @@ def delta_from_docx(file_path: str) -> list:
         ops.append({"insert": "\n"})
 
     return ops
+
+
+# Built in converters
+register_converter("application/json", [".json"], delta_from_json, _sniff_json, iter_delta_from_json)
+register_converter("application/x-quill-delta", [BINARY_EXTENSION], delta_from_qdelta, MAGIC)
+register_converter("text/plain", [".txt"], delta_from_txt, iter_fn=iter_delta_from_txt)
+register_converter("text/html", [".html", ".htm"], delta_from_html, _sniff_html, iter_delta_from_html)
+register_converter("application/pdf", [".pdf"], delta_from_pdf, b"%PDF-", iter_delta_from_pdf)
+register_converter("application/rtf", [".rtf"], delta_from_rtf, b"{\\rtf")
+register_converter("text/markdown", [".md", ".markdown"], delta_from_md, iter_fn=iter_delta_from_md)
+register_converter(
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    [".docx"],
+    delta_from_docx,
+    _sniff_docx,
+)
@@ -0,0 +1,612 @@
+from __future__ import annotations
+
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+import html
+import os
+import tempfile
+import time
+import unicodedata
+
+from .delta_codec import BINARY_EXTENSION, write_delta_ops_binary
+from .text_converter import iter_delta_ops, write_delta_ops_json
+
+# Exporters write delta ops out as other formats, the reverse of text_converter.
+# They take ops as any iterable and walk them once, a line at a time, so a document streamed
+# from iter_delta_ops or iter_delta_from_json never has to be in memory whole (docx is the
+# exception, python-docx builds the whole document before saving it)
+
+
+# Exporter registry, extension -> exporter function (ops, out_path) -> None
+_exporters: dict = {}
+
+
+def register_exporter(extensions: list, fn: Callable[[Iterable[dict], str], None]) -> None:
+    '''
+    Registers an exporter that writes delta ops to a file.
+    extensions: file extensions it writes, like [".odt"]. Registering an existing extension replaces its exporter.
+    '''
+    for ext in extensions:
+        ext = ext.lower()
+        if not ext.startswith("."):
+            ext = "." + ext
+        _exporters[ext] = fn
+
+
+def export_delta_ops(ops: Iterable[dict], out_path: str) -> None:
+    '''
+    Writes delta ops to out_path in the format of its extension (.html, .md, .txt, .rtf, .docx, .pdf, .json or .qdelta).
+    Example:
+        export_delta_ops(editor.text_data, "contract.docx")
+    '''
+    ext = os.path.splitext(out_path)[1].lower()
+    exporter = _exporters.get(ext)
+    if exporter is None:
+        raise ValueError(f"Unsupported export file type: {ext or out_path}")
+    exporter(ops, out_path)
+
+
+def export_file(json_path: str, out_path: str) -> dict:
+    '''
+    Exports a saved delta json (streamed in instead of loaded whole) or .qdelta file.
+    Returns a report entry: {"path", "output", "seconds", "error"}
+    '''
+    result = {"path": json_path, "output": out_path, "seconds": 0.0, "error": None}
+    start = time.perf_counter()
+    try:
+        export_delta_ops(iter_delta_ops(json_path, compact=False), out_path)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def export_many(jobs: Iterable[tuple], workers: Optional[int] = None, on_result: Optional[Callable[[dict], None]] = None) -> list:
+    '''
+    Exports many delta json files in a process pool, like for nightly archives.
+    jobs: (json_path, out_path) pairs
+    workers: size of the process pool (None uses the cpu count, 1 exports in this process)
+    Returns a report entry per job, in the same order.
+    '''
+    jobs = list(jobs)
+    results: dict = {}
+
+    def finished(index: int, result: dict):
+        results[index] = result
+        if on_result is not None:
+            on_result(result)
+
+    if workers == 1 or len(jobs) <= 1:
+        for index, (json_path, out_path) in enumerate(jobs):
+            finished(index, export_file(json_path, out_path))
+
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(export_file, json_path, out_path): index for index, (json_path, out_path) in enumerate(jobs)}
+            for future in as_completed(futures):
+                finished(futures[future], future.result())
+
+    return [results[index] for index in range(len(jobs))]
+
+
+# Walks ops once and yields each line as (segments, block attributes). Segments are (text or embed, attributes).
+# Quill keeps block attributes (header, list, ...) on the "\n" that ends the line
+def iter_lines(ops: Iterable[dict]) -> Iterator[tuple]:
+    segments: list = []
+
+    for op in ops:
+        insert = op.get("insert")
+        if insert is None:
+            continue
+        attributes = op.get("attributes") or {}
+
+        # Embeds (images, dividers, ...) are a segment of their own
+        if not isinstance(insert, str):
+            segments.append((insert, attributes))
+            continue
+
+        parts = insert.split("\n")
+        for index, part in enumerate(parts):
+            if part:
+                segments.append((part, attributes))
+            if index < len(parts) - 1:
+                yield segments, attributes
+                segments = []
+
+    # Text after the last newline still makes a line
+    if segments:
+        yield segments, {}
+
+
+# Writes to a temp file next to out_path and renames it when done, so a failed export doesn't leave half a file
+class _AtomicWriter:
+
+    def __init__(self, out_path: str, mode: str = "w"):
+        self.out_path = out_path
+        self.mode = mode
+
+    def __enter__(self):
+        out_dir = os.path.dirname(os.path.abspath(self.out_path))
+        fd, self.tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+        if "b" in self.mode:
+            self.file = os.fdopen(fd, self.mode)
+        else:
+            self.file = os.fdopen(fd, self.mode, encoding="utf-8", newline="\n")
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.out_path)
+        else:
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+        return False
+
+
+def _segment_text(segments: list) -> str:
+    return "".join(text for text, _ in segments if isinstance(text, str))
+
+
+# .txt
+def export_to_txt(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops as plain text, dropping formatting and embeds."""
+    with _AtomicWriter(out_path) as f:
+        for segments, _ in iter_lines(ops):
+            f.write(_segment_text(segments) + "\n")
+
+
+# .html
+def _html_inline(segments: list) -> str:
+    out = []
+    for text, attributes in segments:
+        if not isinstance(text, str):
+            if "image" in text:
+                out.append(f'<img src="{html.escape(str(text["image"]))}">')
+            elif "divider" in text:
+                out.append("<hr>")
+            continue
+
+        s = html.escape(text)
+        if attributes.get("code"):
+            s = f"<code>{s}</code>"
+        if attributes.get("bold"):
+            s = f"<strong>{s}</strong>"
+        if attributes.get("italic"):
+            s = f"<em>{s}</em>"
+        if attributes.get("underline"):
+            s = f"<u>{s}</u>"
+        if attributes.get("strike"):
+            s = f"<s>{s}</s>"
+        if attributes.get("link"):
+            s = f'<a href="{html.escape(str(attributes["link"]))}">{s}</a>'
+        out.append(s)
+    return "".join(out)
+
+
+def _write_html_body(ops: Iterable[dict], f: TextIO) -> None:
+    lists: list = []        # Open <ul>/<ol> tags, one per indent level
+    in_code = False
+
+    def close_lists(depth: int):
+        while len(lists) > depth:
+            f.write(f"</li></{lists.pop()}>\n")
+
+    for segments, block in iter_lines(ops):
+
+        # Code block lines all go in one <pre>
+        if block.get("code-block"):
+            close_lists(0)
+            if not in_code:
+                f.write("<pre><code>")
+                in_code = True
+            f.write(html.escape(_segment_text(segments)) + "\n")
+            continue
+        if in_code:
+            f.write("</code></pre>\n")
+            in_code = False
+
+        content = _html_inline(segments)
+        list_type = block.get("list")
+
+        if list_type in ("bullet", "ordered", "checked", "unchecked"):
+            tag = "ol" if list_type == "ordered" else "ul"
+            depth = int(block.get("indent", 0) or 0) + 1
+
+            # Deeper items open a nested list inside the current item, shallower ones close lists
+            if len(lists) > depth:
+                close_lists(depth)
+            if len(lists) == depth and lists[-1] != tag:
+                close_lists(depth - 1)
+            if len(lists) == depth:
+                f.write("</li>\n")
+            while len(lists) < depth:
+                f.write(f"<{tag}>\n")
+                lists.append(tag)
+            f.write(f"<li>{content}")
+            continue
+
+        close_lists(0)
+        header = block.get("header")
+        if header:
+            f.write(f"<h{header}>{content}</h{header}>\n")
+        elif block.get("blockquote"):
+            f.write(f"<blockquote>{content}</blockquote>\n")
+        else:
+            f.write(f"<p>{content or '<br>'}</p>\n")
+
+    close_lists(0)
+    if in_code:
+        f.write("</code></pre>\n")
+
+
+def export_to_html(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops as an HTML document."""
+    with _AtomicWriter(out_path) as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head><meta charset="utf-8"></head>\n<body>\n')
+        _write_html_body(ops, f)
+        f.write("</body>\n</html>\n")
+
+
+# .md
+def _md_escape(text: str) -> str:
+    for c in ("\\", "*", "_", "`", "[", "]"):
+        text = text.replace(c, "\\" + c)
+    return text
+
+
+def _md_inline(segments: list) -> str:
+    out = []
+    for text, attributes in segments:
+        if not isinstance(text, str):
+            if "image" in text:
+                out.append(f"![]({text['image']})")
+            continue
+
+        if attributes.get("code"):
+            s = f"`{text}`"
+        else:
+            s = _md_escape(text)
+            # Markdown markers can't have spaces just inside them, so keep those outside
+            stripped = s.strip()
+            if stripped and (attributes.get("bold") or attributes.get("italic") or attributes.get("strike")):
+                lead = s[:len(s) - len(s.lstrip())]
+                trail = s[len(s.rstrip()):]
+                if attributes.get("bold"):
+                    stripped = f"**{stripped}**"
+                if attributes.get("italic"):
+                    stripped = f"*{stripped}*"
+                if attributes.get("strike"):
+                    stripped = f"~~{stripped}~~"
+                s = lead + stripped + trail
+        if attributes.get("link"):
+            s = f"[{s}]({attributes['link']})"
+        out.append(s)
+    return "".join(out)
+
+
+def export_to_md(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops as Markdown."""
+    with _AtomicWriter(out_path) as f:
+        in_code = False
+        last_block = None
+
+        for segments, block in iter_lines(ops):
+            if block.get("code-block"):
+                if not in_code:
+                    f.write("```\n")
+                    in_code = True
+                f.write(_segment_text(segments) + "\n")
+                continue
+            if in_code:
+                f.write("```\n\n")
+                in_code = False
+
+            content = _md_inline(segments)
+            list_type = block.get("list")
+            indent = "   " * int(block.get("indent", 0) or 0)
+
+            if list_type:
+                marker = {"ordered": "1.", "checked": "- [x]", "unchecked": "- [ ]"}.get(list_type, "-")
+                f.write(f"{indent}{marker} {content}\n")
+                last_block = "list"
+                continue
+
+            # Blank line after a list so the next paragraph isn't pulled into it
+            if last_block == "list":
+                f.write("\n")
+            last_block = None
+
+            if block.get("header"):
+                f.write(f"{'#' * int(block['header'])} {content}\n\n")
+            elif block.get("blockquote"):
+                f.write(f"> {content}\n\n")
+            elif content:
+                f.write(f"{content}\n\n")
+            else:
+                f.write("\n")
+
+        if in_code:
+            f.write("```\n")
+
+
+# .rtf
+def _rtf_escape(text: str) -> str:
+    out = []
+    for c in text:
+        if c in "\\{}":
+            out.append("\\" + c)
+        elif ord(c) > 127:
+            # RTF unicode escape, with ? for readers that don't support it
+            code = ord(c)
+            if code > 0xFFFF:
+                out.append("?")
+                continue
+            out.append(f"\\u{code if code < 32768 else code - 65536}?")
+        else:
+            out.append(c)
+    return "".join(out)
+
+
+# Font sizes in half points for headers 1 to 6, body text is 24 (12pt)
+_RTF_HEADER_SIZES = {1: 48, 2: 40, 3: 32, 4: 28, 5: 26, 6: 24}
+
+
+def export_to_rtf(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops as RTF with basic character formatting and header sizes."""
+    with _AtomicWriter(out_path) as f:
+        f.write("{\\rtf1\\ansi\\deff0{\\fonttbl{\\f0 Helvetica;}{\\f1 Courier New;}}\n")
+        for segments, block in iter_lines(ops):
+            header = block.get("header")
+            f.write("\\pard")
+            if header:
+                f.write(f"\\b\\fs{_RTF_HEADER_SIZES.get(int(header), 24)}")
+            elif block.get("list"):
+                f.write("\\li360 \\bullet\\tab")
+            elif block.get("blockquote"):
+                f.write("\\li720")
+            elif block.get("code-block"):
+                f.write("\\f1")
+            f.write(" ")
+
+            for text, attributes in segments:
+                if not isinstance(text, str):
+                    continue
+                codes = ""
+                if attributes.get("bold"):
+                    codes += "\\b"
+                if attributes.get("italic"):
+                    codes += "\\i"
+                if attributes.get("underline"):
+                    codes += "\\ul"
+                if attributes.get("strike"):
+                    codes += "\\strike"
+                if attributes.get("code"):
+                    codes += "\\f1"
+                f.write(f"{{{codes} {_rtf_escape(text)}}}" if codes else _rtf_escape(text))
+
+            f.write("\\b0\\fs24\\f0\\par\n" if header or block.get("code-block") else "\\par\n")
+        f.write("}\n")
+
+
+# .docx
+def export_to_docx(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops as a Word document. python-docx builds it in memory before saving."""
+    try:
+        from docx import Document  # type: ignore
+    except ImportError as e:
+        raise RuntimeError(
+            "DOCX export requires 'python-docx'. Install: pip install python-docx"
+        ) from e
+
+    document = Document()
+    for segments, block in iter_lines(ops):
+
+        # Map block attributes to the built in Word styles
+        header = block.get("header")
+        list_type = block.get("list")
+        if header:
+            para = document.add_heading(level=min(int(header), 9))
+        elif list_type == "ordered":
+            para = document.add_paragraph(style="List Number")
+        elif list_type:
+            para = document.add_paragraph(style="List Bullet")
+        elif block.get("blockquote"):
+            para = document.add_paragraph(style="Quote")
+        else:
+            para = document.add_paragraph()
+
+        for text, attributes in segments:
+            if not isinstance(text, str):
+                continue
+            run = para.add_run(text)
+            run.bold = bool(attributes.get("bold")) or None
+            run.italic = bool(attributes.get("italic")) or None
+            run.underline = bool(attributes.get("underline")) or None
+            if attributes.get("strike"):
+                run.font.strike = True
+            if attributes.get("code") or block.get("code-block"):
+                run.font.name = "Courier New"
+
+    with _AtomicWriter(out_path, "wb") as f:
+        document.save(f)
+
+
+# .pdf
+# A small pdf writer using the built in Courier fonts. Courier is monospaced, so lines can be wrapped
+# exactly without font metrics. Pages are written to the file as they fill up, only their offsets are kept
+_PDF_PAGE_WIDTH = 612       # US letter, in points
+_PDF_PAGE_HEIGHT = 792
+_PDF_MARGIN = 72
+_PDF_FONT_SIZE = 10
+_PDF_HEADER_SIZES = {1: 20, 2: 16, 3: 14, 4: 12, 5: 11, 6: 10}
+_PDF_FONTS = {                # (bold, italic) -> (font resource name, base font)
+    (False, False): ("F1", "Courier"),
+    (True, False): ("F2", "Courier-Bold"),
+    (False, True): ("F3", "Courier-Oblique"),
+    (True, True): ("F4", "Courier-BoldOblique"),
+}
+
+
+def _pdf_string(text: str) -> str:
+    # The fonts use WinAnsiEncoding (cp1252). The content stream is encoded as latin-1 later,
+    # which passes these bytes through as they are
+    try:
+        data = text.encode("cp1252")
+    except UnicodeEncodeError:
+        data = "".join(_pdf_character(c) for c in text).encode("cp1252")
+    text = data.decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+# A character WinAnsiEncoding can't show becomes its unaccented letter ("ā" -> "a") if it has one, else ?
+def _pdf_character(c: str) -> str:
+    try:
+        c.encode("cp1252")
+        return c
+    except UnicodeEncodeError:
+        base = unicodedata.normalize("NFKD", c).encode("cp1252", "ignore").decode("cp1252")
+        return base or "?"
+
+
+# Splits segments into wrapped lines of at most max_chars characters, breaking at spaces where possible
+def _pdf_wrap(segments: list, max_chars: int) -> list:
+    lines: list = [[]]
+    width = 0
+
+    for text, attributes in segments:
+        if not isinstance(text, str):
+            continue
+        style = (bool(attributes.get("bold")), bool(attributes.get("italic")))
+        words = text.replace("\t", "    ").split(" ")
+
+        for index, word in enumerate(words):
+            piece = word if index == len(words) - 1 else word + " "
+            while piece:
+                room = max_chars - width
+                if len(piece.rstrip(" ")) <= room:
+                    lines[-1].append((piece, style))
+                    width += len(piece)
+                    break
+                if width > 0:
+                    lines.append([])
+                    width = 0
+                    continue
+                # A single word longer than the whole line gets broken up
+                lines[-1].append((piece[:max_chars], style))
+                lines.append([])
+                piece = piece[max_chars:]
+
+    return lines
+
+
+def export_to_pdf(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops as a PDF, using Courier with bold/italic and larger headers."""
+    with _AtomicWriter(out_path, "wb") as f:
+        offsets: dict = {}      # object number -> byte offset
+        position = 0
+
+        def write(data: bytes):
+            nonlocal position
+            f.write(data)
+            position += len(data)
+
+        def write_object(number: int, body: bytes):
+            offsets[number] = position
+            write(f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+
+        write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+        # Objects 1 and 2 (catalog, page tree) are written last, once we know the pages.
+        # The fonts come next, then each page's contents and page object
+        next_number = 3
+        font_refs = []
+        for name, base in _PDF_FONTS.values():
+            write_object(next_number, f"<< /Type /Font /Subtype /Type1 /BaseFont /{base} /Encoding /WinAnsiEncoding >>".encode("latin-1"))
+            font_refs.append(f"/{name} {next_number} 0 R")
+            next_number += 1
+        fonts = " ".join(font_refs)
+
+        page_numbers: list = []
+        content: list = []
+        y = _PDF_PAGE_HEIGHT - _PDF_MARGIN
+
+        def finish_page():
+            nonlocal next_number, content, y
+            stream = "\n".join(content).encode("latin-1")
+            content_number = next_number
+            page_number = next_number + 1
+            next_number += 2
+            write_object(content_number, f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1") + stream + b"\nendstream")
+            write_object(
+                page_number,
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PDF_PAGE_WIDTH} {_PDF_PAGE_HEIGHT}] "
+                f"/Resources << /Font << {fonts} >> >> /Contents {content_number} 0 R >>".encode("latin-1"),
+            )
+            page_numbers.append(page_number)
+            content = []
+            y = _PDF_PAGE_HEIGHT - _PDF_MARGIN
+
+        for segments, block in iter_lines(ops):
+            header = block.get("header")
+            size = _PDF_HEADER_SIZES.get(int(header), _PDF_FONT_SIZE) if header else _PDF_FONT_SIZE
+            indent = 0
+            if block.get("list"):
+                marker = "1. " if block["list"] == "ordered" else "- "
+                segments = [(marker, {})] + segments
+                indent = 18 * (int(block.get("indent", 0) or 0) + 1)
+            elif block.get("blockquote"):
+                indent = 24
+            if header:
+                segments = [(text, {**attributes, "bold": True}) for text, attributes in segments]
+
+            max_chars = max(1, int((_PDF_PAGE_WIDTH - 2 * _PDF_MARGIN - indent) / (size * 0.6)))
+            for line in _pdf_wrap(segments, max_chars):
+                if y - size * 1.3 < _PDF_MARGIN:
+                    finish_page()
+                y -= size * 1.3
+                parts = [f"BT {_PDF_MARGIN + indent} {y:.1f} Td"]
+                for text, style in line:
+                    parts.append(f"/{_PDF_FONTS[style][0]} {size} Tf {_pdf_string(text)} Tj")
+                parts.append("ET")
+                content.append(" ".join(parts))
+
+        if content or not page_numbers:
+            finish_page()
+
+        kids = " ".join(f"{n} 0 R" for n in page_numbers)
+        write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode("latin-1"))
+        write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        # Cross reference table, every object's offset in number order
+        xref_position = position
+        count = next_number
+        write(f"xref\n0 {count}\n0000000000 65535 f \n".encode("latin-1"))
+        for number in range(1, count):
+            write(f"{offsets[number]:010d} 00000 n \n".encode("latin-1"))
+        write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref_position}\n%%EOF\n".encode("latin-1"))
+
+
+# .json, the editor's own format
+def export_to_json(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops as delta json, streamed with write_delta_ops_json."""
+    write_delta_ops_json(ops, out_path)
+
+
+def export_to_qdelta(ops: Iterable[dict], out_path: str) -> None:
+    """Writes delta ops in the compact binary format (see delta_codec)."""
+    write_delta_ops_binary(ops, out_path)
+
+
+# Built in exporters
+register_exporter([".txt"], export_to_txt)
+register_exporter([".html", ".htm"], export_to_html)
+register_exporter([".md", ".markdown"], export_to_md)
+register_exporter([".rtf"], export_to_rtf)
+register_exporter([".docx"], export_to_docx)
+register_exporter([".pdf"], export_to_pdf)
+register_exporter([".json"], export_to_json)
+register_exporter([BINARY_EXTENSION], export_to_qdelta)
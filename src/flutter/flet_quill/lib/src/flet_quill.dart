@@ -1,12 +1,256 @@
 import 'package:flet/flet.dart';
 import 'dart:io';
 import 'dart:async';
+import 'dart:collection';
 import 'dart:convert';
+import 'dart:math' show Random;
+import 'dart:typed_data';
+import 'package:flutter/foundation.dart';
 import 'package:flutter/gestures.dart';
 import 'package:flutter/material.dart';
 import 'package:flutter_quill/flutter_quill.dart';
+import 'package:flutter_quill/quill_delta.dart';
 import 'package:flutter_localizations/flutter_localizations.dart'; // <-- use this
 
+// Content hash of an encoded document (FNV-1a plus length), used to skip saves that change nothing
+String _contentHash(List<int> data) {
+  int hash = 0x811c9dc5;
+  for (int i = 0; i < data.length; i++) {
+    hash ^= data[i];
+    hash = (hash * 0x01000193) & 0xffffffff;
+  }
+  return "${data.length}:${hash.toRadixString(16)}";
+}
+
+// Writes bytes to a new temp file next to filePath and returns its path. Every write gets its own
+// name, so a sync save and a background one never write into each other's temp file
+String _writeTempFile(String filePath, List<int> bytes) {
+  final tmp = File(
+      "$filePath.$pid.${DateTime.now().microsecondsSinceEpoch}.${Random().nextInt(1 << 32)}.tmp");
+  tmp.writeAsBytesSync(bytes, flush: true);
+  return tmp.path;
+}
+
+// Writes to a temp file and renames it over the target, so a crash mid-write never truncates it
+int _writeFileAtomic(String filePath, List<int> bytes) {
+  File(_writeTempFile(filePath, bytes)).renameSync(filePath);
+  return bytes.length;
+}
+
+// Compact binary delta format (.qdelta), the layout is described in delta_codec.py.
+// We always write zlib, zstd files written from Python can't be read here
+const List<int> _binaryDeltaMagic = [0x51, 0x44, 0x4C, 0x54]; // "QDLT"
+
+bool _isBinaryDeltaPath(String filePath) =>
+    filePath.toLowerCase().endsWith(".qdelta");
+
+void _writeVarint(BytesBuilder out, int value) {
+  while (value > 0x7F) {
+    out.addByte((value & 0x7F) | 0x80);
+    value >>= 7;
+  }
+  out.addByte(value);
+}
+
+void _writeLengthPrefixed(BytesBuilder out, List<int> data) {
+  _writeVarint(out, data.length);
+  out.add(data);
+}
+
+Uint8List _encodeBinaryDelta(List<dynamic> ops) {
+  // Attribute sets repeat a lot, so each one is stored once and ops refer to it
+  final attributeIndex = <String, int>{};
+  final attributeTable = <String>[];
+  final body = BytesBuilder(copy: false);
+  int count = 0;
+
+  for (final op in ops) {
+    if (op is! Map) continue;
+    final attributes = op["attributes"];
+    int ref = 0;
+    if (attributes is Map && attributes.isNotEmpty) {
+      final encoded = jsonEncode(attributes);
+      ref = attributeIndex.putIfAbsent(encoded, () {
+        attributeTable.add(encoded);
+        return attributeTable.length;
+      });
+    }
+
+    if (op.containsKey("insert")) {
+      final insert = op["insert"];
+      body.addByte(insert is String ? 0 : 1);
+      _writeVarint(body, ref);
+      _writeLengthPrefixed(
+          body, utf8.encode(insert is String ? insert : jsonEncode(insert)));
+    } else if (op["retain"] is int) {
+      body.addByte(2);
+      _writeVarint(body, ref);
+      _writeVarint(body, op["retain"] as int);
+    } else if (op["delete"] is int) {
+      body.addByte(3);
+      _writeVarint(body, op["delete"] as int);
+    } else {
+      continue;
+    }
+    count++;
+  }
+
+  final data = BytesBuilder(copy: false);
+  _writeVarint(data, attributeTable.length);
+  for (final encoded in attributeTable) {
+    _writeLengthPrefixed(data, utf8.encode(encoded));
+  }
+  _writeVarint(data, count);
+  data.add(body.takeBytes());
+
+  final out = BytesBuilder(copy: false)
+    ..add(_binaryDeltaMagic)
+    ..addByte(1) // format version
+    ..addByte(1) // zlib
+    ..add(zlib.encode(data.takeBytes()));
+  return out.takeBytes();
+}
+
+List<Object?> _decodeBinaryDelta(List<int> data) {
+  for (int i = 0; i < _binaryDeltaMagic.length; i++) {
+    if (data.length < 6 || data[i] != _binaryDeltaMagic[i]) {
+      throw const FormatException("Not a binary delta");
+    }
+  }
+  if (data[4] != 1) {
+    throw FormatException("Unsupported binary delta version: ${data[4]}");
+  }
+
+  final List<int> body;
+  if (data[5] == 0) {
+    body = data.sublist(6);
+  } else if (data[5] == 1) {
+    body = zlib.decode(data.sublist(6));
+  } else {
+    throw FormatException("Unsupported binary delta compression: ${data[5]}");
+  }
+
+  int pos = 0;
+  int readVarint() {
+    int value = 0;
+    int shift = 0;
+    while (true) {
+      final byte = body[pos++];
+      value |= (byte & 0x7F) << shift;
+      if (byte < 0x80) return value;
+      shift += 7;
+    }
+  }
+
+  String readString() {
+    final length = readVarint();
+    final text = utf8.decode(body.sublist(pos, pos + length));
+    pos += length;
+    return text;
+  }
+
+  final attributeTable = <Object?>[null];
+  for (int i = readVarint(); i > 0; i--) {
+    attributeTable.add(jsonDecode(readString()));
+  }
+
+  final ops = <Object?>[];
+  for (int i = readVarint(); i > 0; i--) {
+    final kind = body[pos++];
+    if (kind == 3) {
+      ops.add({"delete": readVarint()});
+      continue;
+    }
+
+    final attributes = attributeTable[readVarint()];
+    final Map<String, Object?> op;
+    if (kind == 0) {
+      op = {"insert": readString()};
+    } else if (kind == 1) {
+      op = {"insert": jsonDecode(readString())};
+    } else if (kind == 2) {
+      op = {"retain": readVarint()};
+    } else {
+      throw FormatException("Bad op kind in binary delta: $kind");
+    }
+    if (attributes is Map) {
+      op["attributes"] = Map<String, Object?>.from(attributes);
+    }
+    ops.add(op);
+  }
+  return ops;
+}
+
+// Reads a saved document, json or .qdelta by its extension. Returns null if there's nothing there
+Object? _readDeltaFile(String filePath) {
+  final file = File(filePath);
+  if (!file.existsSync()) return null;
+  if (_isBinaryDeltaPath(filePath)) {
+    return _decodeBinaryDelta(file.readAsBytesSync());
+  }
+  final jsonString = file.readAsStringSync();
+  return jsonString.isEmpty ? null : jsonDecode(jsonString);
+}
+
+// Encodes (and writes to a temp file, when given a file path) a document. Runs on a background isolate
+// for autosaves so big documents don't drop frames. The caller renames the temp file into place
+// (see _finishSave), so it can tell whether a newer save got there first.
+// Files are written as json or .qdelta by their extension, save events as json or
+// base64 .qdelta by save_format
+Map<String, Object?> _encodeAndSave(Map<String, Object?> job) {
+  final stopwatch = Stopwatch()..start();
+  final filePath = job["file_path"] as String?;
+  final bool binary =
+      filePath != null ? _isBinaryDeltaPath(filePath) : job["binary"] == true;
+
+  final String? jsonString = binary ? null : jsonEncode(job["delta"]);
+  final List<int> bytes = binary
+      ? _encodeBinaryDelta(job["delta"] as List<dynamic>)
+      : utf8.encode(jsonString!);
+  final hash = _contentHash(bytes);
+
+  // Same content as the last save, nothing to write
+  if (hash == job["last_hash"]) {
+    return {"skipped": true, "hash": hash};
+  }
+
+  return {
+    "skipped": false,
+    "hash": hash,
+    "tmp_path": filePath != null ? _writeTempFile(filePath, bytes) : null,
+    // Saved to file_path, Python only gets the document when it asked for it (search index, history)
+    "payload": filePath != null && job["send_document"] != true
+        ? null
+        : binary
+            ? base64Encode(bytes)
+            : jsonString,
+    "binary": binary,
+    "bytes": bytes.length,
+    "duration_ms": stopwatch.elapsedMicroseconds / 1000.0,
+  };
+}
+
+// Reads (when given a file path) and decodes the document. Runs on a background isolate
+// in background_decode mode so multi-MB documents don't hold up the first frame
+Map<String, Object?> _decodeDocumentJson(Map<String, Object?> job) {
+  final stopwatch = Stopwatch()..start();
+  final filePath = job["file_path"] as String?;
+  if (filePath != null) {
+    final file = File(filePath);
+    return {
+      "delta": _readDeltaFile(filePath),
+      "bytes": file.existsSync() ? file.lengthSync() : 0,
+      "decode_ms": stopwatch.elapsedMicroseconds / 1000.0,
+    };
+  }
+  final String jsonString = job["json"] as String? ?? "";
+  return {
+    "delta": jsonString.isEmpty ? null : jsonDecode(jsonString),
+    "bytes": jsonString.length,
+    "decode_ms": stopwatch.elapsedMicroseconds / 1000.0,
+  };
+}
+
 class FletQuillControl extends StatefulWidget {
   final Control? parent;
   final Control control;
@@ -28,54 +272,772 @@ class _FletQuillControlState extends State<FletQuillControl>
   late final QuillController _controller;
   final FocusNode _focusNode = FocusNode();
   final ScrollController _toolbarScrollController = ScrollController();
+
+  // Find bar: match start offsets in the document, the current one is selected
+  bool _findVisible = false;
+  final TextEditingController _findTextController = TextEditingController();
+  bool _findCaseSensitive = false;
+  bool _findWholeWord = false;
+  List<int> _findMatches = [];
+  int _findLength = 0;
+  int _findCurrent = -1;
   Timer? _saveTimer;
+  Timer? _maxWaitTimer;
   bool _pendingSave = false;
+  bool _dirty = false;
+
+  // Incremental save mode: changes since the last sent version, composed together
+  StreamSubscription? _docChangesSubscription;
+  Delta _pendingChange = Delta();
+  int _deltaVersion = 0;
+  int _deltasSinceSnapshot = 0;
+  int _fileRevision = 0; // document revision file_path was last written at
+
+  // Collaboration (CollabHub): the server revision our document is on, and our change
+  // waiting for its ack. Edits made meanwhile wait in _pendingChange
+  String _loadedCollabReset = "";
+  int _collabRevision = 0;
+  Delta? _collabOutstanding;
+
+  // Python's apply_delta edits and the hub's changes are both composed as ChangeSource.remote.
+  // Document changes reach the listener later, so each remote compose queues whether it was
+  // the hub's (already on the server) or Python's (still has to be sent), in the same order
+  final ListQueue<bool> _remoteComposes = ListQueue<bool>();
+
+  // Change tracking for saves: the document revision bumps on every edit
+  int _docRevision = 0;
+  int _savedRevision = 0;
+  String? _savedHash;
+  bool _saveInFlight = false;
+  bool _saveQueued = false;
+
+  // Every save gets the next generation. A sync flush can overtake a background save, so the one
+  // finishing later may be older, and it mustn't replace the file or move _savedRevision back
+  int _saveGeneration = 0;
+  int _finishedSaveGeneration = 0;
 
+  // text_data we last built a document from, so we notice when Python pushes a new one
+  String _loadedTextData = "";
+  bool _replacingDocument = false;
+
+  // Background decoding: the editor shows a placeholder until the decoded document is swapped in
+  bool _decoding = false;
+  int _decodeGeneration = 0;
+
+  // Chunked text_data: Python sends big documents a chunk at a time as we request them
+  String _loadedTransfer = "";
+  String? _transferId;
+  int _transferTotal = 0;
+  int _transferNext = 0;
+  StringBuffer? _transferBuffer;
+
+  // Autosave policy from Python: debounce after the last edit, max_wait forces a save while
+  // the user keeps typing, min_changes skips tiny edits, and autosave=false only saves on request
   void _scheduleSave() {
     _pendingSave = true;
+    if (!(widget.control.attrBool("autosave", true) ?? true)) return;
+
+    final double debounce =
+        widget.control.attrDouble("autosave_debounce", 2.0) ?? 2.0;
+    final double maxWait =
+        widget.control.attrDouble("autosave_max_wait", 0.0) ?? 0.0;
+    final int minChanges =
+        widget.control.attrInt("autosave_min_changes", 1) ?? 1;
+
     _saveTimer?.cancel();
-    _saveTimer = Timer(const Duration(seconds: 2), _flushPendingSave);
+    if (_docRevision - _savedRevision >= minChanges) {
+      _saveTimer = Timer(
+          Duration(milliseconds: (debounce * 1000).round()), _flushPendingSave);
+    }
+    if (maxWait > 0 && _maxWaitTimer == null) {
+      _maxWaitTimer = Timer(
+          Duration(milliseconds: (maxWait * 1000).round()), _flushPendingSave);
+    }
   }
 
-  void _flushPendingSave() {
+  // sync saves on this isolate, for when the app or control is going away and can't wait
+  void _flushPendingSave({bool sync = false}) {
     _saveTimer?.cancel();
-    if (!_pendingSave) return;
-    _pendingSave = false;
-    _saveDocument();
+    _maxWaitTimer?.cancel();
+    _maxWaitTimer = null;
+    if (_pendingSave) {
+      _pendingSave = false;
+      _saveDocument(sync: sync);
+    }
+
+    // Incremental mode only writes file_path at snapshots, bring it up to date before going away
+    if (sync &&
+        (widget.control.attrBool("incremental_save", false) ?? false)) {
+      _writeSnapshotFile();
+    }
   }
 
-  void _saveDocument() {
-    final deltaJson = _controller.document.toDelta().toJson();
-    final jsonString = jsonEncode(deltaJson);
+  void _saveDocument({bool sync = false}) {
+    // Incremental mode only sends what changed since the last version
+    final bool incrementalSave =
+        widget.control.attrBool("incremental_save", false) ?? false;
+    if (incrementalSave) {
+      _emitChangeDelta();
+      return;
+    }
+
+    // Nothing edited since the last save
+    if (_docRevision == _savedRevision) return;
 
-    // Prefer Python callback (event) if enabled
+    // Prefer Python callback (event) if enabled, otherwise fall back to file_path
     final bool saveToEvent =
         widget.control.attrBool("save_to_event", false) ?? false;
-    if (saveToEvent) {
+    final filePath = widget.control.attrString("file_path", "") ?? "";
+    if (!saveToEvent && filePath.isEmpty) return;
+
+    // One save at a time, edits made meanwhile get saved once it's done
+    if (_saveInFlight && !sync) {
+      _saveQueued = true;
+      return;
+    }
+
+    final revision = _docRevision;
+    final generation = ++_saveGeneration;
+    final job = <String, Object?>{
+      "delta": _controller.document.toDelta().toJson(),
+      "file_path": saveToEvent ? null : filePath,
+      "binary": widget.control.attrString("save_format", "json") == "binary",
+      "last_hash": _savedHash,
+      "send_document":
+          widget.control.attrBool("saved_document", false) ?? false,
+    };
+
+    final stopwatch = Stopwatch()..start();
+
+    if (sync) {
       try {
+        _finishSave(_encodeAndSave(job), revision, generation, filePath,
+            saveToEvent);
+      } catch (e) {
+        _reportSaveError(e, stopwatch);
+      }
+      return;
+    }
+
+    _saveInFlight = true;
+    compute(_encodeAndSave, job).then((result) {
+      _finishSave(result, revision, generation, filePath, saveToEvent);
+    }).catchError((e) {
+      _reportSaveError(e, stopwatch);
+    }).whenComplete(() {
+      _saveInFlight = false;
+      if (_saveQueued && mounted) {
+        _saveQueued = false;
+        _saveDocument();
+      }
+    });
+  }
+
+  // Failed saves used to vanish, now Python counts them in its metrics ("client_save" with ok false)
+  void _reportSaveError(Object error, Stopwatch stopwatch) {
+    if (!mounted) return;
+    try {
+      widget.backend.triggerControlEvent(
+        widget.control.id,
+        "save_error",
+        jsonEncode({
+          "error": error.toString(),
+          "duration_ms": stopwatch.elapsedMicroseconds / 1000.0,
+        }),
+      );
+    } catch (_) {
+      // ignore
+    }
+  }
+
+  // Lets Python know when the document first has unsaved changes, and when they're all saved
+  void _setDirty(bool dirty) {
+    if (dirty == _dirty) return;
+    _dirty = dirty;
+    if (!mounted) return;
+    try {
+      widget.backend.triggerControlEvent(
+        widget.control.id,
+        dirty ? "dirty" : "clean",
+        "",
+      );
+    } catch (_) {
+      // ignore
+    }
+  }
+
+  void _finishSave(Map<String, Object?> result, int revision, int generation,
+      String filePath, bool saveToEvent) {
+    final tmpPath = result["tmp_path"] as String?;
+
+    // A newer save already finished, this content is out of date
+    if (generation < _finishedSaveGeneration) {
+      if (tmpPath != null) {
+        try {
+          File(tmpPath).deleteSync();
+        } catch (_) {
+          // ignore
+        }
+      }
+      return;
+    }
+    _finishedSaveGeneration = generation;
+    if (tmpPath != null) {
+      File(tmpPath).renameSync(filePath);
+    }
+
+    if (revision > _savedRevision) _savedRevision = revision;
+    _savedHash = result["hash"] as String?;
+    if (_savedRevision == _docRevision) {
+      _setDirty(false);
+    }
+    if (result["skipped"] == true || !mounted) return;
+
+    try {
+      if (saveToEvent) {
         widget.backend.triggerControlEvent(
           widget.control.id,
           "save",
-          jsonString,
+          result["payload"] as String,
         );
-      } catch (_) {
-        // ignore
       }
-      return;
+      widget.backend.triggerControlEvent(
+        widget.control.id,
+        "saved",
+        jsonEncode({
+          "bytes": result["bytes"],
+          "duration_ms": result["duration_ms"],
+          if (!saveToEvent && result["payload"] != null) ...{
+            "document": result["payload"],
+            "binary": result["binary"],
+          },
+        }),
+      );
+    } catch (_) {
+      // ignore
+    }
+  }
+
+  void _emitChangeDelta() {
+    if (_pendingChange.isEmpty) return;
+
+    // Collaborating, one change at a time, the next goes once this one is acked
+    final bool collab = widget.control.attrBool("collab", false) ?? false;
+    if (collab) {
+      if (_collabOutstanding != null) return;
+      _collabOutstanding = _pendingChange;
+    }
+
+    final ops = _pendingChange.toJson();
+    _pendingChange = Delta();
+    _savedRevision = _docRevision;
+    _deltaVersion++;
+    _deltasSinceSnapshot++;
+
+    try {
+      widget.backend.triggerControlEvent(
+        widget.control.id,
+        "change_delta",
+        jsonEncode({
+          "version": _deltaVersion,
+          "ops": ops,
+          if (collab) "base": _collabRevision,
+        }),
+      );
+    } catch (_) {
+      // ignore
+    }
+    _setDirty(false);
+
+    // Every so often send the whole document so the server copy can't drift.
+    // The hub's document is the server copy when collaborating, so no snapshots then
+    final int snapshotInterval =
+        widget.control.attrInt("snapshot_interval", 50) ?? 50;
+    if (!collab &&
+        snapshotInterval > 0 &&
+        _deltasSinceSnapshot >= snapshotInterval) {
+      _emitSnapshot();
+    }
+  }
+
+  void _emitSnapshot() {
+    // Unsent changes are part of the snapshot, so they count as a new version
+    if (_pendingChange.isNotEmpty) {
+      _pendingChange = Delta();
+      _deltaVersion++;
+    }
+    _deltasSinceSnapshot = 0;
+
+    final deltaJson = _controller.document.toDelta().toJson();
+
+    try {
+      widget.backend.triggerControlEvent(
+        widget.control.id,
+        "snapshot",
+        jsonEncode({"version": _deltaVersion, "ops": deltaJson}),
+      );
+    } catch (_) {
+      // ignore
     }
 
-    // Fallback to file_path
+    _writeSnapshotFile(deltaJson);
+  }
+
+  // Snapshots are the only full saves in incremental mode, so they go to file_path too.
+  // Skipped when collaborating (the hub keeps the document) or nothing changed since the last write
+  void _writeSnapshotFile([List<dynamic>? deltaJson]) {
+    final bool saveToEvent =
+        widget.control.attrBool("save_to_event", false) ?? false;
+    final bool collab = widget.control.attrBool("collab", false) ?? false;
     final filePath = widget.control.attrString("file_path", "") ?? "";
-    if (filePath.isEmpty) return;
+    if (saveToEvent || collab || filePath.isEmpty) return;
+    if (_fileRevision == _docRevision) return;
 
+    final revision = _docRevision;
+    deltaJson ??= _controller.document.toDelta().toJson();
+    final stopwatch = Stopwatch()..start();
     try {
-      File(filePath).writeAsStringSync(jsonString);
+      _writeFileAtomic(
+          filePath,
+          _isBinaryDeltaPath(filePath)
+              ? _encodeBinaryDelta(deltaJson)
+              : utf8.encode(jsonEncode(deltaJson)));
+      _fileRevision = revision;
+    } catch (e) {
+      _reportSaveError(e, stopwatch);
+    }
+  }
+
+  Future<String?> _onMethodCall(
+      String methodName, Map<String, String> args) async {
+    switch (methodName) {
+      case "request_snapshot":
+        _emitSnapshot();
+        return null;
+      case "text_data_chunk":
+        _receiveTransferChunk(args);
+        return null;
+      case "save_now":
+        // flush() waits on this, so it saves on this isolate before answering
+        _pendingSave = true;
+        _flushPendingSave(sync: args["sync"] == "True");
+        return null;
+      case "apply_delta":
+        return _applyRemoteDelta(args["ops"] ?? "[]");
+      case "collab_update":
+        _applyCollabUpdate(args["messages"] ?? "[]");
+        return null;
+      case "find":
+        _openFind(args["query"] ?? "",
+            caseSensitive: args["case_sensitive"] == "True",
+            wholeWord: args["whole_word"] == "True");
+        return jsonEncode([
+          for (final start in _findMatches) [start, _findLength]
+        ]);
+      case "close_find":
+        _closeFind();
+        return null;
+      case "select_range":
+        _selectRange(int.tryParse(args["index"] ?? "") ?? 0,
+            int.tryParse(args["length"] ?? "") ?? 0);
+        return null;
+    }
+    return null;
+  }
+
+  // Finds every (non overlapping) match of query in the document. toPlainText counts embeds
+  // as one character, so the offsets are document offsets, same as Python's SearchIndex
+  List<int> _findInDocument(String query) {
+    if (query.isEmpty) return [];
+    final String text = _controller.document.toPlainText();
+
+    // Matched case insensitively in the text as it is. Lowercasing the text first can change its
+    // length ('İ' becomes 2 code units), which moved every match after it
+    final pattern =
+        RegExp(RegExp.escape(query), caseSensitive: _findCaseSensitive);
+    final wordChar = RegExp(r'\w');
+    final matches = <int>[];
+    for (final match in pattern.allMatches(text)) {
+      final index = match.start;
+      final end = match.end;
+      if (!_findWholeWord ||
+          ((index == 0 || !wordChar.hasMatch(text[index - 1])) &&
+              (end >= text.length || !wordChar.hasMatch(text[end])))) {
+        matches.add(index);
+      }
+    }
+    return matches;
+  }
+
+  // Reruns the search after an edit, keeping the current match without moving the cursor
+  void _refreshFindMatches() {
+    _findMatches = _findInDocument(_findTextController.text);
+    _findLength = _findTextController.text.length;
+    if (_findCurrent >= _findMatches.length) {
+      _findCurrent = _findMatches.length - 1;
+    } else if (_findCurrent < 0 && _findMatches.isNotEmpty) {
+      _findCurrent = 0;
+    }
+  }
+
+  void _runFind(String query) {
+    setState(() {
+      _findMatches = _findInDocument(query);
+      _findLength = query.length;
+      _findCurrent = _findMatches.isEmpty ? -1 : 0;
+    });
+    _selectFindMatch();
+  }
+
+  void _openFind(String query,
+      {bool caseSensitive = false, bool wholeWord = false}) {
+    _findCaseSensitive = caseSensitive;
+    _findWholeWord = wholeWord;
+    _findTextController.text = query;
+    setState(() => _findVisible = true);
+    _runFind(query);
+  }
+
+  void _closeFind() {
+    setState(() {
+      _findVisible = false;
+      _findMatches = [];
+      _findCurrent = -1;
+    });
+    _focusNode.requestFocus();
+  }
+
+  void _stepFind(int step) {
+    if (_findMatches.isEmpty) return;
+    setState(() =>
+        _findCurrent = (_findCurrent + step) % _findMatches.length);
+    _selectFindMatch();
+  }
+
+  void _selectFindMatch() {
+    if (_findCurrent < 0) return;
+    _controller.updateSelection(
+      TextSelection(
+        baseOffset: _findMatches[_findCurrent],
+        extentOffset: _findMatches[_findCurrent] + _findLength,
+      ),
+      ChangeSource.local,
+    );
+  }
+
+  // Selects a range from Python (like a SearchIndex match), the editor scrolls it into view
+  void _selectRange(int index, int length) {
+    final int docLength = _controller.document.length - 1;
+    final int start = index.clamp(0, docLength);
+    final int end = (index + length).clamp(start, docLength);
+    _controller.updateSelection(
+      TextSelection(baseOffset: start, extentOffset: end),
+      ChangeSource.local,
+    );
+    _focusNode.requestFocus();
+  }
+
+  Widget _buildFindBar(ThemeData theme) {
+    return Padding(
+      padding: const EdgeInsets.symmetric(horizontal: 8, vertical: 4),
+      child: Row(
+        children: [
+          Expanded(
+            child: TextField(
+              controller: _findTextController,
+              autofocus: true,
+              decoration: const InputDecoration(
+                isDense: true,
+                hintText: "Find",
+                prefixIcon: Icon(Icons.search),
+              ),
+              onChanged: _runFind,
+              onSubmitted: (_) => _stepFind(1),
+            ),
+          ),
+          Padding(
+            padding: const EdgeInsets.symmetric(horizontal: 8),
+            child: Text(
+              _findMatches.isEmpty
+                  ? "0/0"
+                  : "${_findCurrent + 1}/${_findMatches.length}",
+              style: theme.textTheme.bodySmall,
+            ),
+          ),
+          IconButton(
+            icon: const Icon(Icons.keyboard_arrow_up),
+            tooltip: "Previous match",
+            onPressed: () => _stepFind(-1),
+          ),
+          IconButton(
+            icon: const Icon(Icons.keyboard_arrow_down),
+            tooltip: "Next match",
+            onPressed: () => _stepFind(1),
+          ),
+          IconButton(
+            icon: const Icon(Icons.close),
+            tooltip: "Close",
+            onPressed: _closeFind,
+          ),
+        ],
+      ),
+    );
+  }
+
+  // Applies an edit pushed from Python (insert_text, format_range, ...) to the open document.
+  // Composing keeps the cursor (moved past the edit) and undo history, unlike replacing the document.
+  // Returns the error if the delta doesn't fit the document
+  String? _applyRemoteDelta(String opsJson) {
+    try {
+      final delta = Delta.fromJson(jsonDecode(opsJson) as List);
+      final selection = _controller.selection;
+      _composeRemote(
+        delta,
+        selection.copyWith(
+          baseOffset: delta.transformPosition(selection.baseOffset),
+          extentOffset: delta.transformPosition(selection.extentOffset),
+        ),
+        fromHub: false,
+      );
+    } catch (e) {
+      return e.toString();
+    }
+    return null;
+  }
+
+  // Composes a change that isn't the user's, noting where it came from for _listenToDocument.
+  // Empty deltas don't reach the document, so they aren't noted
+  void _composeRemote(Delta delta, TextSelection selection,
+      {required bool fromHub}) {
+    final bool noted = delta.isNotEmpty;
+    if (noted) _remoteComposes.add(fromHub);
+    try {
+      _controller.compose(delta, selection, ChangeSource.remote);
+    } catch (_) {
+      if (noted) _remoteComposes.removeLast();
+      rethrow;
+    }
+  }
+
+  // Changes from the CollabHub, in order: [revision, ops] for someone else's change and
+  // [revision, null] acking ours. Their changes are transformed over ours that the server
+  // hadn't seen yet (outstanding, then pending), ours get transformed over theirs
+  void _applyCollabUpdate(String messagesJson) {
+    try {
+      for (final message in jsonDecode(messagesJson) as List) {
+        _collabRevision = (message[0] as num).toInt();
+        if (message[1] == null) {
+          _collabOutstanding = null;
+          continue;
+        }
+
+        Delta change = Delta.fromJson(message[1] as List);
+        final outstanding = _collabOutstanding;
+        if (outstanding != null) {
+          _collabOutstanding = change.transform(outstanding, true);
+          change = outstanding.transform(change, false);
+        }
+        if (_pendingChange.isNotEmpty) {
+          final pending = _pendingChange;
+          _pendingChange = change.transform(pending, true);
+          change = pending.transform(change, false);
+        }
+
+        // Not our edit, so no autosave or focus grab for it (see _handleControllerChanged)
+        final selection = _controller.selection;
+        _replacingDocument = true;
+        _composeRemote(
+          change,
+          selection.copyWith(
+            baseOffset: change.transformPosition(selection.baseOffset),
+            extentOffset: change.transformPosition(selection.extentOffset),
+          ),
+          fromHub: true,
+        );
+        _replacingDocument = false;
+      }
+    } catch (_) {
+      _replacingDocument = false;
+    }
+
+    // Our change made it, send what was typed meanwhile
+    if (_collabOutstanding == null && _pendingChange.isNotEmpty) {
+      _emitChangeDelta();
+    }
+  }
+
+  // Python attached us to a CollabHub document (again), "resets:revision". The document
+  // comes with it in text_data, anything we hadn't sent yet is dropped
+  bool _checkCollabReset() {
+    final String reset =
+        widget.control.attrString("collab_reset", "") ?? "";
+    if (reset == _loadedCollabReset) return false;
+    _loadedCollabReset = reset;
+    if (reset.isEmpty) return false;
+    _collabRevision = int.tryParse(reset.split(":").last) ?? 0;
+    _collabOutstanding = null;
+    return true;
+  }
+
+  // Starts a chunked transfer when Python announces a new one ("id:chunk count")
+  void _checkTextDataTransfer() {
+    final String transfer =
+        widget.control.attrString("text_data_transfer", "") ?? "";
+    if (transfer == _loadedTransfer) return;
+    _loadedTransfer = transfer;
+    if (transfer.isEmpty) return;
+
+    final parts = transfer.split(":");
+    _transferId = parts[0];
+    _transferTotal = parts.length > 1 ? int.tryParse(parts[1]) ?? 0 : 0;
+    _transferNext = 0;
+    _transferBuffer = StringBuffer();
+    _decoding = true;
+    _requestTransferChunk();
+  }
+
+  void _requestTransferChunk() {
+    try {
+      widget.backend.triggerControlEvent(
+        widget.control.id,
+        "text_data_request",
+        jsonEncode({"id": _transferId, "seq": _transferNext}),
+      );
     } catch (_) {
       // ignore
     }
   }
 
+  void _receiveTransferChunk(Map<String, String> args) {
+    // Chunks of an old transfer, or out of order
+    if (args["id"] != _transferId ||
+        int.tryParse(args["seq"] ?? "") != _transferNext ||
+        _transferBuffer == null) {
+      return;
+    }
+
+    _transferBuffer!.write(args["data"] ?? "");
+    _transferNext++;
+    if (_transferNext < _transferTotal) {
+      _requestTransferChunk();
+      return;
+    }
+
+    // All chunks are in, build the document from them
+    final String json = _transferBuffer.toString();
+    _transferBuffer = null;
+    _transferId = null;
+
+    if (widget.control.attrBool("background_decode", false) ?? false) {
+      _decodeInBackground(json: json);
+      return;
+    }
+
+    try {
+      _replaceDocument(Document.fromJson(jsonDecode(json)));
+    } catch (_) {
+      // ignore invalid data and keep the current document
+    }
+    setState(() => _decoding = false);
+  }
+
+  void _listenToDocument(Document doc) {
+    _docChangesSubscription?.cancel();
+    _remoteComposes.clear();
+    _docChangesSubscription = doc.changes.listen((event) {
+      // Collaborators' changes are already on the server, only our own (and Python's) get sent
+      final bool fromHub = event.source == ChangeSource.remote &&
+          _remoteComposes.isNotEmpty &&
+          _remoteComposes.removeFirst();
+      if (!fromHub) {
+        _docRevision++;
+        _setDirty(true);
+        _pendingChange = _pendingChange.compose(event.change);
+      }
+      if (_findVisible) setState(_refreshFindMatches);
+    });
+  }
+
+  // Swaps in a document pushed from Python, this isn't a user edit so it doesn't save
+  void _replaceDocument(Document doc) {
+    _replacingDocument = true;
+    _controller.document = doc;
+    _pendingChange = Delta();
+    _listenToDocument(doc);
+    _replacingDocument = false;
+  }
+
+  @override
+  void didUpdateWidget(covariant FletQuillControl oldWidget) {
+    super.didUpdateWidget(oldWidget);
+
+    final bool collabReset = _checkCollabReset();
+    _checkTextDataTransfer();
+
+    // A collab reset starts over from text_data even if the text didn't change
+    final String textData = widget.control.attrString("text_data", "") ?? "";
+    if (textData == _loadedTextData && !collabReset) return;
+    _loadedTextData = textData;
+    if (textData.isEmpty) return;
+
+    if (widget.control.attrBool("background_decode", false) ?? false) {
+      _decodeInBackground(json: textData);
+      return;
+    }
+
+    try {
+      _replaceDocument(Document.fromJson(jsonDecode(textData)));
+    } catch (_) {
+      // ignore invalid data and keep the current document
+    }
+  }
+
+  // Decodes text_data or the file_path json on a background isolate, then swaps the document in
+  void _decodeInBackground({String? json, String? filePath}) {
+    final int generation = ++_decodeGeneration;
+    final totalStopwatch = Stopwatch()..start();
+
+    // Callers are initState (already showing the placeholder) and didUpdateWidget (builds right after)
+    _decoding = true;
+
+    compute(_decodeDocumentJson, <String, Object?>{
+      "json": json,
+      "file_path": filePath,
+    }).then((result) {
+      // Unmounted, or newer text_data arrived while we were decoding
+      if (!mounted || generation != _decodeGeneration) return;
+
+      final buildStopwatch = Stopwatch()..start();
+      final delta = result["delta"];
+      final doc = delta is List ? Document.fromJson(delta) : Document();
+      _replaceDocument(doc);
+      buildStopwatch.stop();
+
+      setState(() => _decoding = false);
+
+      try {
+        widget.backend.triggerControlEvent(
+          widget.control.id,
+          "load_timing",
+          jsonEncode({
+            "bytes": result["bytes"],
+            "decode_ms": result["decode_ms"],
+            "build_ms": buildStopwatch.elapsedMicroseconds / 1000.0,
+            "total_ms": totalStopwatch.elapsedMicroseconds / 1000.0,
+          }),
+        );
+      } catch (_) {
+        // ignore
+      }
+    }).catchError((_) {
+      if (mounted && generation == _decodeGeneration) {
+        setState(() => _decoding = false);
+      }
+    });
+  }
+
   void _handleControllerChanged() {
+    if (_replacingDocument) return;
     if (!_focusNode.hasFocus) {
       _focusNode.requestFocus();
     }
@@ -90,11 +1052,24 @@ class _FletQuillControlState extends State<FletQuillControl>
     final String initialTextData =
         widget.control.attrString("text_data", "") ?? "";
     final filePath = widget.control.attrString("file_path", "") ?? "";
+    final bool loading = widget.control.attrBool("loading", false) ?? false;
+    final bool backgroundDecode =
+        widget.control.attrBool("background_decode", false) ?? false;
+    final String transfer =
+        widget.control.attrString("text_data_transfer", "") ?? "";
+    _loadedTextData = initialTextData;
+    _checkCollabReset();
 
     Document doc;
 
+    // 0) Python is still converting the file, it pushes text_data when done.
+    // Big text_data arrives in chunks, and in background_decode mode we also
+    // start blank and decode once the shell is up
+    if (loading || transfer.isNotEmpty || backgroundDecode) {
+      doc = Document();
+    }
     // 1) Prefer loading from passed-in data
-    if (initialTextData.isNotEmpty) {
+    else if (initialTextData.isNotEmpty) {
       try {
         final deltaJson = jsonDecode(initialTextData);
         doc = Document.fromJson(deltaJson);
@@ -105,14 +1080,8 @@ class _FletQuillControlState extends State<FletQuillControl>
     // 2) Fallback to file_path
     else if (filePath.isNotEmpty) {
       try {
-        final file = File(filePath);
-        if (file.existsSync()) {
-          final jsonString = file.readAsStringSync();
-          final deltaJson = jsonDecode(jsonString);
-          doc = Document.fromJson(deltaJson);
-        } else {
-          doc = Document();
-        }
+        final deltaJson = _readDeltaFile(filePath);
+        doc = deltaJson is List ? Document.fromJson(deltaJson) : Document();
       } catch (_) {
         doc = Document();
       }
@@ -126,15 +1095,38 @@ class _FletQuillControlState extends State<FletQuillControl>
     );
 
     _controller.addListener(_handleControllerChanged);
+    _listenToDocument(doc);
+
+    widget.backend.subscribeMethods(widget.control.id, _onMethodCall);
+
+    // Big text_data comes in chunks, we ask for them once we're subscribed to method calls
+    if (transfer.isNotEmpty && !loading) {
+      _decoding = true;
+      WidgetsBinding.instance
+          .addPostFrameCallback((_) => _checkTextDataTransfer());
+    } else if (backgroundDecode && !loading) {
+      if (initialTextData.isNotEmpty) {
+        _decoding = true;
+        WidgetsBinding.instance.addPostFrameCallback(
+            (_) => _decodeInBackground(json: initialTextData));
+      } else if (filePath.isNotEmpty) {
+        _decoding = true;
+        WidgetsBinding.instance.addPostFrameCallback(
+            (_) => _decodeInBackground(filePath: filePath));
+      }
+    }
   }
 
   @override
   void dispose() {
     WidgetsBinding.instance.removeObserver(this);
-    _flushPendingSave();
+    _flushPendingSave(sync: true);
+    widget.backend.unsubscribeMethods(widget.control.id);
+    _docChangesSubscription?.cancel();
     _controller.removeListener(_handleControllerChanged);
     _controller.dispose();
     _focusNode.dispose();
+    _findTextController.dispose();
     _toolbarScrollController.dispose();
     super.dispose();
   }
@@ -144,7 +1136,7 @@ class _FletQuillControlState extends State<FletQuillControl>
     if (state == AppLifecycleState.inactive ||
         state == AppLifecycleState.paused ||
         state == AppLifecycleState.detached) {
-      _flushPendingSave();
+      _flushPendingSave(sync: true);
     }
   }
 
@@ -176,6 +1168,9 @@ class _FletQuillControlState extends State<FletQuillControl>
     double paddingBottom =
         widget.control.attrDouble("padding_bottom", 0.0) ?? 0.0;
 
+    final bool loading =
+        (widget.control.attrBool("loading", false) ?? false) || _decoding;
+
     final String placeHolderText =
         widget.control.attrString("placeholder_text", "Enter text here...") ??
             "Enter text here...";
@@ -198,6 +1193,9 @@ class _FletQuillControlState extends State<FletQuillControl>
     final bool showToolbarDivider =
         widget.control.attrBool("show_toolbar_divider", false) ?? false;
 
+    final bool showSearchButton =
+        widget.control.attrBool("show_search_button", true) ?? true;
+
     // Optional custom font sizes for the toolbar (JSON list or map).
     Map<String, String>? fontSizeItems;
     final String? fontSizesJson = widget.control.attrString("font_sizes");
@@ -242,6 +1240,7 @@ class _FletQuillControlState extends State<FletQuillControl>
       paddingRight: paddingRight,
       paddingBottom: paddingBottom,
       placeHolderText: placeHolderText,
+      loading: loading,
     );
 
     Widget sizedEditor;
@@ -278,7 +1277,21 @@ class _FletQuillControlState extends State<FletQuillControl>
                 child: QuillSimpleToolbar(
                   controller: _controller,
                   config: QuillSimpleToolbarConfig(
-                    showSearchButton: false, // Broken buttons
+                    // The built in search dialog opens on the root navigator, outside our
+                    // Localizations, which is what broke it. Our own find bar replaces it
+                    showSearchButton: false,
+                    customButtons: [
+                      if (showSearchButton)
+                        QuillToolbarCustomButtonOptions(
+                          icon: const Icon(Icons.search),
+                          tooltip: "Find",
+                          onPressed: () => _findVisible
+                              ? _closeFind()
+                              : _openFind(_findTextController.text,
+                                  caseSensitive: _findCaseSensitive,
+                                  wholeWord: _findWholeWord),
+                        ),
+                    ],
                     showFontFamily: false,
                     showColorButton: false,
                     showBackgroundColorButton: false,
@@ -329,6 +1342,7 @@ class _FletQuillControlState extends State<FletQuillControl>
               thickness: 1,
               color: baseTheme.colorScheme.outlineVariant,
             ),
+          if (_findVisible) _buildFindBar(baseTheme),
           Expanded(
             child: Center(
               child: sizedEditor,
@@ -354,6 +1368,7 @@ class _FletQuillControlState extends State<FletQuillControl>
     required double paddingRight,
     required double paddingBottom,
     required String placeHolderText,
+    bool loading = false,
   }) {
     return Container(
       decoration: BoxDecoration(
@@ -364,22 +1379,40 @@ class _FletQuillControlState extends State<FletQuillControl>
               )
             : null,
       ),
-      child: MouseRegion(
-        cursor: SystemMouseCursors.text,
-        child: QuillEditor.basic(
-          controller: _controller,
-          focusNode: _focusNode,
-          config: QuillEditorConfig(
-            placeholder: placeHolderText,
-            expands: true,
-            scrollable: true,
-            autoFocus: true,
-            padding: EdgeInsets.only(
-              left: paddingLeft,
-              top: paddingTop,
-              right: paddingRight,
-              bottom: paddingBottom,
+      child: loading
+          ? const Center(child: CircularProgressIndicator())
+          : _buildEditor(
+              paddingLeft: paddingLeft,
+              paddingTop: paddingTop,
+              paddingRight: paddingRight,
+              paddingBottom: paddingBottom,
+              placeHolderText: placeHolderText,
             ),
+    );
+  }
+
+  Widget _buildEditor({
+    required double paddingLeft,
+    required double paddingTop,
+    required double paddingRight,
+    required double paddingBottom,
+    required String placeHolderText,
+  }) {
+    return MouseRegion(
+      cursor: SystemMouseCursors.text,
+      child: QuillEditor.basic(
+        controller: _controller,
+        focusNode: _focusNode,
+        config: QuillEditorConfig(
+          placeholder: placeHolderText,
+          expands: true,
+          scrollable: true,
+          autoFocus: true,
+          padding: EdgeInsets.only(
+            left: paddingLeft,
+            top: paddingTop,
+            right: paddingRight,
+            bottom: paddingBottom,
           ),
         ),
       ),
@@ -0,0 +1,51 @@
+import json
+import os
+
+from flet_quill.batch_converter import convert_many
+from flet_quill.text_converter import load_file_to_delta_ops
+
+
+def test_unsupported_file_fails_without_output(tmp_path):
+    path = tmp_path / "data.xyz"
+    path.write_text("something", encoding="utf-8")
+
+    [result] = convert_many([str(path)], workers=1)
+    assert result["error"] and "Unsupported file type" in result["error"]
+    assert not os.path.exists(result["output"])
+    assert [name for name in os.listdir(tmp_path) if name != "data.xyz"] == []
+
+
+def test_supported_file_converts(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello\n", encoding="utf-8")
+
+    [result] = convert_many([str(path)], workers=1)
+    assert result["error"] is None
+    with open(result["output"], encoding="utf-8") as f:
+        assert "".join(op["insert"] for op in json.load(f)) == "hello\n"
+
+
+def test_editor_shows_unsupported_message(tmp_path):
+    path = tmp_path / "data.xyz"
+    path.write_text("something", encoding="utf-8")
+    assert load_file_to_delta_ops(str(path)) == [{"insert": "Unsupported file type\n"}]
+
+
+def test_sources_sharing_an_output_are_reported(tmp_path):
+    (tmp_path / "a.md").write_text("# from markdown\n", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("from text\n", encoding="utf-8")
+
+    for _ in range(2):   # a rerun with resume mustn't skip a.txt as already converted either
+        md, txt = convert_many([str(tmp_path)], workers=1)
+        assert md["path"].endswith("a.md") and md["error"] is None
+        assert txt["path"].endswith("a.txt") and txt["output"] == md["output"]
+        assert "a.md" in txt["error"] and not txt["skipped"]
+        with open(md["output"], encoding="utf-8") as f:
+            assert "".join(op["insert"] for op in json.load(f)) == "from markdown\n"
+
+
+def test_same_file_given_twice_converts_once(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello\n", encoding="utf-8")
+    [result] = convert_many([str(path), str(tmp_path)], workers=1)
+    assert result["error"] is None
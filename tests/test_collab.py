@@ -0,0 +1,196 @@
+import json
+import random
+
+import pytest
+from flet.core.event import Event
+
+from flet_quill import CollabClient, CollabHub, Delta, FletQuill
+
+
+# UTF-16 offsets between characters, where the editor can start or end an edit
+def _boundaries(document: Delta) -> list:
+    offsets = [0]
+    for op in document.ops:
+        if isinstance(op.value, str):
+            for character in op.value:
+                offsets.append(offsets[-1] + (2 if ord(character) > 0xFFFF else 1))
+        else:
+            offsets.append(offsets[-1] + 1)
+    return offsets
+
+
+def _random_edit(rng: random.Random, document: Delta) -> list:
+    offsets = _boundaries(document)[:-1]   # the last newline stays
+    start = rng.choice(offsets)
+    end = rng.choice([o for o in offsets if o >= start] + [start])
+    ops = [{"retain": start}] if start else []
+    roll = rng.random()
+    if roll < 0.6 or end == start:
+        ops.append({"insert": rng.choice(["a", "bc", "😀", "é", " ", "\n"])})
+    elif roll < 0.85:
+        ops.append({"delete": end - start})
+    else:
+        ops.append({"retain": end - start, "attributes": {"bold": rng.choice([True, None])}})
+    return ops
+
+
+def _settle(hub, clients):
+    for _ in range(5):
+        for client in clients:
+            client.flush()
+        hub.tick()
+
+
+def test_concurrent_random_edits_converge():
+    rng = random.Random(11)
+    hub = CollabHub()
+    hub.open("doc", [{"insert": "Shared 😀 text\nsecond line\n"}])
+    clients = [CollabClient(hub, "doc") for _ in range(5)]
+
+    for _ in range(200):
+        for client in clients:
+            if rng.random() < 0.5:
+                client.edit(_random_edit(rng, client.document))
+            # Some clients hold their changes back a while, so they arrive on stale revisions
+            if rng.random() < 0.4:
+                client.flush()
+        if rng.random() < 0.7:
+            hub.tick()
+    _settle(hub, clients)
+
+    server = Delta(hub.document("doc").ops)
+    assert hub.document("doc").revision > 50
+    for client in clients:
+        assert client.document == server
+
+
+def test_change_on_a_stale_revision_is_transformed():
+    hub = CollabHub()
+    document = hub.open("doc", [{"insert": "hello world\n"}])
+    a, b = CollabClient(hub, "doc"), CollabClient(hub, "doc")
+
+    a.edit([{"insert": "😀 "}])
+    b.edit([{"retain": 5}, {"insert": ","}, {"retain": 1}, {"delete": 5}, {"insert": "there"}])
+    a.flush()
+    # Made on revision 0, the hub moves its retain past a's insert (3 units, the emoji is 2)
+    b.flush()
+    assert a.outstanding is not None and b.revision == 0
+    assert document.ops == [{"insert": "😀 hello, there\n"}]
+
+    a.edit([{"retain": 3}, {"insert": "oh "}])
+    _settle(hub, [a, b])
+    assert a.document == b.document == Delta(document.ops) == Delta([{"insert": "😀 oh hello, there\n"}])
+
+
+@pytest.mark.parametrize("ops, base", [
+    ([{"insert": "x"}], 3),                         # revision the document doesn't have yet
+    ([{"insert": "x"}], -1),
+    ([{"retain": 20}, {"insert": "x"}], 0),          # past the end of the document
+    ([{"retain": 3}, {"delete": 10}], 0),
+    ([{"retain": -2}, {"insert": "x"}], 0),
+    ([{"delete": 0}], 0),
+    ([{"bogus": 1}], 0),
+])
+def test_bad_changes_are_rejected(ops, base):
+    hub = CollabHub()
+    document = hub.open("doc", [{"insert": "hello\n"}])
+    client = CollabClient(hub, "doc")
+
+    with pytest.raises(ValueError):
+        client.session.submit(ops, base)
+    assert document.revision == 0
+    assert document.ops == [{"insert": "hello\n"}]
+
+
+def test_range_is_checked_against_the_base_revision():
+    hub = CollabHub()
+    document = hub.open("doc", [{"insert": "hello\n"}])
+    a, b = CollabClient(hub, "doc"), CollabClient(hub, "doc")
+    a.session.submit([{"insert": "long prefix "}], 0)
+
+    # Fits the document now, but not the one at revision 0 it was made on
+    with pytest.raises(ValueError):
+        b.session.submit([{"retain": 10}, {"insert": "x"}], 0)
+    assert b.session.submit([{"retain": 5}, {"insert": "!"}], 0) == 2
+    assert document.ops == [{"insert": "long prefix hello!\n"}]
+
+
+def test_too_old_base_resets_the_session():
+    hub = CollabHub()
+    document = hub.open("doc", [{"insert": "a\n"}])
+    document.max_log = 1
+    a, b = CollabClient(hub, "doc"), CollabClient(hub, "doc")
+    for _ in range(4):
+        a.edit([{"insert": "x"}])
+        _settle(hub, [a])
+
+    # b hasn't heard of any of that, and the log needed to transform its change is gone
+    b.revision = 0
+    b.edit([{"insert": "lost"}])
+    b.flush()
+    assert b.document == Delta(document.ops) == Delta([{"insert": "xxxxa\n"}])
+    assert b.revision == document.revision and b.outstanding is None
+
+
+def test_resync_starts_a_client_over():
+    hub = CollabHub()
+    document = hub.open("doc", [{"insert": "shared\n"}])
+    a, b = CollabClient(hub, "doc"), CollabClient(hub, "doc")
+    a.document = Delta([{"insert": "drifted\n"}])
+    a.revision = 7
+
+    a.session.resync()
+    assert a.document == Delta(document.ops) and a.revision == 0
+
+    a.edit([{"insert": "A"}])
+    b.edit([{"retain": 6}, {"insert": "B"}])
+    _settle(hub, [a, b])
+    assert a.document == b.document == Delta([{"insert": "AsharedB\n"}])
+
+
+def _collab_editor(hub, doc_id):
+    editor = FletQuill()
+    sent = []
+    editor.invoke_method = lambda name, arguments=None, **kwargs: sent.append((name, arguments))
+    session, ops, revision = hub.connect(doc_id, lambda messages: sent.append(("collab_update", messages)),
+                                         lambda ops, revision: editor._join_collab(session, ops, revision))
+    editor._join_collab(session, ops, revision)
+    return editor, sent
+
+
+def _change_delta(editor, ops, base, version=1):
+    editor.event_handlers["change_delta"](Event("", "change_delta", json.dumps(
+        {"version": version, "ops": ops, "base": base})))
+
+
+def test_apply_delta_edits_reach_the_hub():
+    hub = CollabHub()
+    document = hub.open("doc", [{"insert": "shared\n"}])
+    editor, sent = _collab_editor(hub, "doc")
+    other = CollabClient(hub, "doc")
+
+    # The client applies the edit and sends it back as its own change delta
+    editor.insert_text(6, " 😀")
+    name, arguments = sent[-1]
+    assert name == "apply_delta"
+    _change_delta(editor, json.loads(arguments["ops"]), 0)
+    hub.tick()
+
+    assert document.ops == [{"insert": "shared 😀\n"}]
+    assert other.document == Delta(document.ops)
+    assert ("collab_update", [[1, None]]) in sent
+
+
+def test_out_of_range_change_delta_resyncs_the_editor():
+    hub = CollabHub()
+    document = hub.open("doc", [{"insert": "shared\n"}])
+    editor, _ = _collab_editor(hub, "doc")
+    CollabClient(hub, "doc").session.submit([{"insert": "new "}], 0)
+    resets = editor._collab_resets
+
+    _change_delta(editor, [{"retain": 50}, {"insert": "x"}], 0)
+
+    assert document.revision == 1
+    assert editor._collab_resets == resets + 1
+    assert editor.text_data == [{"insert": "new shared\n"}]
+    assert editor._get_attr("collab_reset") == f"{editor._collab_resets}:1"
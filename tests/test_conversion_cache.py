@@ -0,0 +1,98 @@
+import os
+
+from flet_quill.conversion_cache import ConversionCache
+from flet_quill.text_converter import load_file_to_delta_ops
+
+
+def _entry(cache, key):
+    return os.path.join(cache.cache_dir, key + ConversionCache.ENTRY_SUFFIX)
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    assert cache.get("nothing") is None
+
+    cache.put("key", [{"insert": "cached 😀\n"}])
+    assert cache.get("key") == [{"insert": "cached 😀\n"}]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # Entries already on disk are picked up by a new cache
+    again = ConversionCache(str(tmp_path / "cache"))
+    assert again.stats()["entries"] == 1 and again.total_bytes == cache.total_bytes
+    assert again.get("key") == [{"insert": "cached 😀\n"}]
+
+
+def test_key_changes_with_the_file(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    path = tmp_path / "doc.txt"
+    path.write_text("first")
+    key = cache.key_for(str(path), "1")
+    assert cache.key_for(str(path), "1") == key
+    assert cache.key_for(str(path), "2") != key
+
+    # Same size, only the mtime moves
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    touched = cache.key_for(str(path), "1")
+    assert touched != key
+
+    path.write_text("first, longer")
+    assert cache.key_for(str(path), "1") not in (key, touched)
+
+    # Same size and mtime but different content still misses
+    stat = os.stat(path)
+    path.write_text("FIRST, longer")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert os.stat(path).st_size == stat.st_size
+    assert cache.key_for(str(path), "1") != key
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    ops = [{"insert": "x" * 50 + "\n"}]
+    for t, key in enumerate(["a", "b", "c"]):
+        cache.put(key, ops)
+        os.utime(_entry(cache, key), (1000 + t, 1000 + t))
+    entry_size = cache.total_bytes // 3
+    cache.max_bytes = entry_size * 3
+
+    # Reading a makes it the most recently used, so b is the oldest now
+    assert cache.get("a") == ops
+    cache.put("d", ops)
+
+    assert cache.get("b") is None
+    assert not os.path.exists(_entry(cache, "b"))
+    assert [cache.get(key) is not None for key in "acd"] == [True, True, True]
+    assert cache.evictions == 1 and cache.total_bytes == entry_size * 3
+
+
+def test_entries_bigger_than_the_cache_are_skipped(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), max_bytes=10)
+    cache.put("big", [{"insert": "lots of text that won't compress to ten bytes\n"}])
+    assert cache.get("big") is None and cache.total_bytes == 0
+
+
+def test_load_file_uses_the_cache(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    path = tmp_path / "notes.md"
+    path.write_text("# Title\n", encoding="utf-8")
+
+    first = load_file_to_delta_ops(str(path), cache)
+    assert cache.hits == 0 and cache.misses == 1
+    assert load_file_to_delta_ops(str(path), cache) == first
+    assert cache.hits == 1
+
+    # An edited file is converted again, never served from the old entry
+    path.write_text("# Other title\n", encoding="utf-8")
+    assert load_file_to_delta_ops(str(path), cache) == [
+        {"insert": "Other title"},
+        {"insert": "\n", "attributes": {"header": 1}},
+    ]
+    assert cache.hits == 1 and cache.misses == 2
+
+
+def test_delta_files_are_not_cached(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    path = tmp_path / "doc.json"
+    path.write_text('[{"insert": "a\\n"}]')
+    assert load_file_to_delta_ops(str(path), cache) == [{"insert": "a\n"}]
+    assert cache.stats()["entries"] == 0 and cache.misses == 0
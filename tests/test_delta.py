@@ -0,0 +1,204 @@
+import random
+
+from flet_quill import delta as delta_module
+from flet_quill.delta import Delta, compact_delta, iter_compact_delta, utf16_length, utf16_slice, utf16_units
+from flet_quill.delta_document import DeltaDocument
+
+# Lengths and offsets follow the editor, which counts UTF-16 code units, so an emoji is 2 long
+
+
+def test_utf16_length():
+    assert utf16_length("abc") == 3
+    assert utf16_length("é") == 1
+    assert utf16_length("😀") == 2
+    assert utf16_length("a😀b𝄞") == 6
+
+
+def test_utf16_slice():
+    assert utf16_slice("😀ab", 2) == "ab"
+    assert utf16_slice("😀ab", 0, 2) == "😀"
+    assert utf16_slice("a😀b", 1, 3) == "😀"
+    assert utf16_slice("héllo", 1, 3) == "él"
+
+
+def test_utf16_units():
+    assert utf16_units("abc") == "abc"
+    assert len(utf16_units("a😀b")) == 4
+
+
+def test_op_lengths():
+    assert Delta([{"insert": "😀ab\n"}]).length() == 5
+    assert Delta([{"insert": "😀"}, {"insert": {"image": "x.png"}}]).length() == 3
+
+
+def test_insert_after_emoji():
+    # Client delta from the review: retain past the emoji and "a", then insert
+    document = DeltaDocument([{"insert": "😀ab\n"}])
+    assert document.apply([{"retain": 3}, {"insert": "X"}])
+    assert document.ops == [{"insert": "😀aXb\n"}]
+
+
+def test_delete_emoji():
+    document = DeltaDocument([{"insert": "😀ab\n"}])
+    document.apply([{"delete": 2}])
+    assert document.ops == [{"insert": "ab\n"}]
+
+
+def test_format_astral_range():
+    document = Delta([{"insert": "x𝄞y\n"}])
+    change = Delta().retain(1).retain(2, {"bold": True})
+    assert document.compose(change).to_json() == [
+        {"insert": "x"}, {"insert": "𝄞", "attributes": {"bold": True}}, {"insert": "y\n"}
+    ]
+
+
+def test_split_surrogate_pair_joins_back():
+    emoji = Delta([{"insert": "😀"}])
+    assert emoji.slice(0, 1).concat(emoji.slice(1)).to_json() == [{"insert": "😀"}]
+
+
+def test_diff_with_emoji():
+    a = Delta([{"insert": "😀ab\n"}])
+    b = Delta([{"insert": "a😀b😃\n"}])
+    change = a.diff(b)
+    assert a.compose(change) == b
+    assert change.change_length() == b.length() - a.length()
+
+
+def test_transform_with_emoji():
+    document = Delta([{"insert": "😀😀\n"}])
+    a = Delta().retain(2).insert("A")
+    b = Delta().retain(4).insert("B")
+    left = document.compose(a).compose(a.transform(b, True))
+    right = document.compose(b).compose(b.transform(a, False))
+    assert left == right == Delta([{"insert": "😀A😀B\n"}])
+
+
+def test_invert_with_emoji():
+    document = Delta([{"insert": "😀ab\n"}])
+    change = Delta().retain(2).delete(1).insert("é")
+    assert document.compose(change).compose(change.invert(document)) == document
+
+
+def test_diff_random_edits():
+    rng = random.Random(7)
+    for _ in range(300):
+        text = "".join(rng.choice("ab c\n") for _ in range(rng.randint(0, 80)))
+        edited = list(text)
+        for _ in range(rng.randint(0, 8)):
+            position = rng.randint(0, len(edited))
+            if edited and rng.random() < 0.5:
+                del edited[min(position, len(edited) - 1)]
+            else:
+                edited.insert(position, rng.choice("ab c\n😀"))
+        a = Delta([{"insert": text + "\n"}])
+        b = Delta([{"insert": "".join(edited) + "\n"}])
+        assert a.compose(a.diff(b)) == b
+
+
+def test_diff_keeps_unchanged_text():
+    a = Delta([{"insert": "one\ntwo\nthree\n"}])
+    b = Delta([{"insert": "one\n2\nthree\n"}])
+    assert a.diff(b).to_json() == [{"retain": 4}, {"insert": "2"}, {"delete": 3}]
+
+
+def test_diff_big_document_with_scattered_edits():
+    rng = random.Random(3)
+    lines = [" ".join(rng.choice(["lorem", "ipsum", "dolor", "sit", "amet"]) for _ in range(14)) for _ in range(20000)]
+    text = "\n".join(lines) + "\n"
+    edited = list(text)
+    for _ in range(200):
+        position = rng.randrange(len(edited) - 1)
+        edited[position:position + 2] = "XY"
+    a, b = Delta([{"insert": text}]), Delta([{"insert": "".join(edited)}])
+
+    change = a.diff(b)
+    assert a.compose(change) == b
+    # Line by line then by character, so only the edited spots change
+    assert sum(op.length for op in change.ops if op.kind == "insert") <= 400
+
+
+def test_diff_over_budget_replaces_whole(monkeypatch):
+    monkeypatch.setattr(delta_module, "DIFF_MAX_STEPS", 10)
+    a = Delta([{"insert": "abcdefghij\n"}])
+    b = Delta([{"insert": "bXdYfZhW\n"}])
+    change = a.diff(b)
+    assert a.compose(change) == b
+
+
+def test_compact_merges_neighbours_with_equal_attributes():
+    assert compact_delta([
+        {"insert": "ab", "attributes": {"bold": True}},
+        {"insert": "c", "attributes": {"bold": True}},
+        {"insert": "d"},
+        {"insert": "e", "attributes": {}},
+        {"delete": 2},
+        {"delete": 1},
+        {"retain": 2, "attributes": {"italic": True}},
+        {"retain": 1, "attributes": {"italic": True}},
+    ]) == [
+        {"insert": "abc", "attributes": {"bold": True}},
+        {"insert": "de"},
+        {"delete": 3},
+        {"retain": 3, "attributes": {"italic": True}},
+    ]
+
+
+def test_compact_keeps_different_attributes_and_embeds_apart():
+    ops = [
+        {"insert": "a", "attributes": {"bold": True}},
+        {"insert": "b", "attributes": {"italic": True}},
+        {"insert": {"image": "x.png"}},
+        {"insert": {"image": "x.png"}},
+        {"insert": "c"},
+        {"retain": 1},
+        {"insert": "d"},
+    ]
+    assert compact_delta(ops) == ops
+
+
+def test_compact_drops_ops_that_do_nothing():
+    assert compact_delta([
+        {"insert": ""},
+        {"insert": "a"},
+        {"retain": 0},
+        {"delete": 0},
+        {"insert": "b", "attributes": {}},
+        {"insert": {"image": "x.png"}, "attributes": {"width": None}},
+        {"retain": 4},
+    ]) == [{"insert": "ab"}, {"insert": {"image": "x.png"}}]
+
+
+def test_compact_none_attributes():
+    # On a retain None removes the format, so it's kept and doesn't merge with a plain retain.
+    # On inserts there's nothing to remove, None values are dropped like missing ones
+    assert compact_delta([
+        {"retain": 2, "attributes": {"bold": None}},
+        {"retain": 1},
+        {"insert": "a", "attributes": {"bold": None}},
+        {"insert": "b"},
+        {"insert": "c", "attributes": {"bold": None, "italic": True}},
+    ]) == [
+        {"retain": 2, "attributes": {"bold": None}},
+        {"retain": 1},
+        {"insert": "ab"},
+        {"insert": "c", "attributes": {"italic": True}},
+    ]
+
+
+def test_iter_compact_matches_compact():
+    rng = random.Random(5)
+    choices = [
+        {"insert": "ab"}, {"insert": "c", "attributes": {"bold": True}}, {"insert": ""},
+        {"insert": {"image": "x.png"}}, {"retain": 2}, {"retain": 1, "attributes": {"bold": None}},
+        {"delete": 1}, {"insert": "😀", "attributes": {"bold": True}},
+    ]
+    for _ in range(200):
+        ops = [rng.choice(choices) for _ in range(rng.randint(0, 12))]
+        assert list(iter_compact_delta(iter(ops))) == compact_delta(ops)
+
+
+def test_iter_compact_max_length():
+    ops = [{"insert": "abc"}, {"insert": "def"}, {"insert": "gh"}]
+    assert list(iter_compact_delta(ops, max_length=4)) == [{"insert": "abcdef"}, {"insert": "gh"}]
+    assert "".join(op["insert"] for op in iter_compact_delta(ops, max_length=1)) == "abcdefgh"
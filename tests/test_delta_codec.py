@@ -0,0 +1,73 @@
+import pytest
+
+from flet_quill.delta_codec import BINARY_EXTENSION, decode_delta, encode_delta, write_delta_ops_binary
+from flet_quill.text_converter import load_file_to_delta_ops
+
+DOCUMENT = [
+    {"insert": "Title"},
+    {"insert": "\n", "attributes": {"header": 1}},
+    {"insert": "bold", "attributes": {"bold": True}},
+    {"insert": " plain, ünïcödé and 😀 "},
+    {"insert": {"image": "https://example.com/a.png"}, "attributes": {"width": "120"}},
+    {"insert": {"divider": True}},
+    {"insert": "x" * 300, "attributes": {"color": "#ff0000", "link": "https://example.com"}},
+    {"insert": "\n", "attributes": {"list": "bullet", "indent": 2}},
+]
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "zstd"])
+def test_round_trip(compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    assert decode_delta(encode_delta(DOCUMENT, compression=compression)) == DOCUMENT
+
+
+def test_round_trip_change():
+    change = [
+        {"retain": 5},
+        {"retain": 3, "attributes": {"bold": None, "italic": True}},
+        {"delete": 200},
+        {"insert": "new"},
+    ]
+    assert decode_delta(encode_delta(change)) == change
+
+
+def test_round_trip_empty():
+    assert decode_delta(encode_delta([])) == []
+
+
+def test_equal_values_of_different_types_stay_apart():
+    # True == 1 == 1.0 in Python, the interned attribute sets mustn't mix them up
+    ops = [
+        {"insert": "a", "attributes": {"bold": True}},
+        {"insert": "b", "attributes": {"bold": 1}},
+        {"insert": "c", "attributes": {"bold": 1.0}},
+        {"insert": "d", "attributes": {"header": 1}},
+        {"insert": "e", "attributes": {"header": True}},
+        {"insert": "\n"},
+    ]
+    decoded = decode_delta(encode_delta(ops))
+    assert decoded == ops
+    assert [type(op.get("attributes", {}).get("bold")) for op in decoded[:3]] == [bool, int, float]
+    assert type(decoded[3]["attributes"]["header"]) is int
+    assert type(decoded[4]["attributes"]["header"]) is bool
+
+
+def test_unhashable_attribute_values():
+    ops = [
+        {"insert": "a", "attributes": {"mention": {"id": 1}}},
+        {"insert": "b", "attributes": {"mention": {"id": True}}},
+        {"insert": "\n"},
+    ]
+    assert decode_delta(encode_delta(ops)) == ops
+
+
+def test_load_written_file(tmp_path):
+    path = tmp_path / f"doc{BINARY_EXTENSION}"
+    write_delta_ops_binary(DOCUMENT, str(path))
+    assert load_file_to_delta_ops(str(path), compact=False) == DOCUMENT
+
+
+def test_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_delta(b'[{"insert": "\\n"}]')
@@ -0,0 +1,243 @@
+import json
+
+import pytest
+from flet.core.event import Event
+
+from flet_quill import CollabHub, Delta, FletQuill, HistoryStore, SearchIndex
+
+
+def test_text_data_view_is_read_only_all_the_way_down():
+    editor = FletQuill(text_data=[
+        {"insert": "bold", "attributes": {"bold": True}},
+        {"insert": {"image": "a.png"}},
+        {"insert": "\n"},
+    ])
+    view = editor.text_data_view
+
+    with pytest.raises(TypeError):
+        view[0]["insert"] = "changed"
+    with pytest.raises(TypeError):
+        view[0]["attributes"]["bold"] = False
+    with pytest.raises(TypeError):
+        view[1]["insert"]["image"] = "b.png"
+
+    assert editor.text_data == [
+        {"insert": "bold", "attributes": {"bold": True}},
+        {"insert": {"image": "a.png"}},
+        {"insert": "\n"},
+    ]
+
+
+def test_text_data_view_follows_text_data():
+    editor = FletQuill(text_data=[{"insert": "a\n"}])
+    assert editor.text_data_view[0]["insert"] == "a\n"
+    editor.text_data = [{"insert": "b\n"}]
+    assert editor.text_data_view[0]["insert"] == "b\n"
+
+
+def test_saved_event_indexes_the_sent_document(tmp_path):
+    path = tmp_path / "notes.json"
+    path.write_text(json.dumps([{"insert": "draft\n"}]))
+    index = SearchIndex()
+    editor = FletQuill(file_path=str(path), search_index=index)
+    assert index.search("draft")
+    assert editor._get_attr("saved_document", data_type=bool)
+
+    saved = []
+    editor.on_saved = saved.append
+    ops = [{"insert": "quarterly report\n"}]
+    editor.event_handlers["saved"](Event("", "saved", json.dumps(
+        {"bytes": 10, "duration_ms": 1.0, "document": json.dumps(ops), "binary": False})))
+
+    # file_path still has the old text, the index only has what came with the event
+    assert index.search("report") == [{"doc_id": str(path), "matches": [(10, 16)]}]
+    assert not index.search("draft")
+    assert saved == [{"bytes": 10, "duration_ms": 1.0}]
+
+
+def test_bad_collab_change_resets_the_session():
+    hub = CollabHub()
+    hub.open("doc", [{"insert": "shared\n"}])
+    editor = FletQuill()
+    resets = []
+    session, ops, revision = hub.connect("doc", lambda messages: None, lambda ops, revision: resets.append((ops, revision)))
+    editor._join_collab(session, ops, revision)
+
+    # Based on a revision the hub never had
+    editor.event_handlers["change_delta"](Event("", "change_delta", json.dumps(
+        {"version": 1, "ops": [{"insert": "x"}], "base": 5})))
+
+    assert resets == [([{"insert": "shared\n"}], 0)]
+    assert hub.document("doc").revision == 0
+
+
+@pytest.mark.parametrize("data", ['[{"insert": "trunc', '{"insert": "x"}', "not base64!"])
+def test_broken_save_event_changes_nothing(tmp_path, data):
+    index = SearchIndex()
+    history = HistoryStore(str(tmp_path / "history"))
+    saves = []
+    editor = FletQuill(
+        text_data=[{"insert": "keep me\n"}],
+        save_method=saves.append,
+        save_format="binary" if data == "not base64!" else "json",
+        search_index=index,
+        search_doc_id="notes",
+        history=history,
+    )
+    history.flush()
+    head = history.head
+
+    editor.event_handlers["save"](Event("", "save", data))
+    history.flush()
+
+    assert saves == []
+    assert history.head == head
+    assert history.document == [{"insert": "keep me\n"}]
+    assert index.search("keep") == [{"doc_id": "notes", "matches": [(0, 4)]}]
+    history.close()
+
+
+def _stub_invoke(editor) -> list:
+    sent = []
+    editor.invoke_method = lambda name, arguments=None, **kwargs: sent.append((name, arguments))
+    return sent
+
+
+def _request_chunk(editor, transfer_id, seq):
+    editor.event_handlers["text_data_request"](Event("", "text_data_request", json.dumps(
+        {"id": transfer_id, "seq": seq})))
+
+
+def test_small_text_data_is_sent_in_one_go():
+    editor = FletQuill(text_data=[{"insert": "short\n"}], text_data_chunk_size=1024)
+    assert editor._get_attr("text_data") == json.dumps([{"insert": "short\n"}])
+    assert editor._get_attr("text_data_transfer") is None
+
+
+def test_big_text_data_is_sent_in_chunks():
+    # Emoji are surrogate pairs, escaped in the JSON, so some chunks end in the middle of one
+    ops = [{"insert": "😀 chunked 👍🏽 text\n" * 20, "attributes": {"bold": True}}, {"insert": "\n"}]
+    editor = FletQuill(text_data_chunk_size=7)
+    sent = _stub_invoke(editor)
+    editor.text_data = ops
+
+    data = json.dumps(ops)
+    chunks = (len(data) + 6) // 7
+    assert editor._get_attr("text_data") is None
+    assert editor._get_attr("text_data_transfer") == f"1:{chunks}"
+
+    for seq in range(chunks):
+        _request_chunk(editor, "1", seq)
+    assert [name for name, _ in sent] == ["text_data_chunk"] * chunks
+    assert [arguments["seq"] for _, arguments in sent] == list(range(chunks))
+    assert all(arguments["id"] == "1" and len(arguments["data"]) <= 7 for _, arguments in sent)
+    assert any(arguments["data"].endswith(("\\ud83d", "\\ud8", "\\u")) for _, arguments in sent)
+    assert json.loads("".join(arguments["data"] for _, arguments in sent)) == ops
+
+
+def test_chunk_requests_for_other_transfers_are_ignored():
+    editor = FletQuill(text_data_chunk_size=4)
+    sent = _stub_invoke(editor)
+    editor.text_data = [{"insert": "first\n"}]
+    editor.text_data = [{"insert": "second\n"}]
+    assert editor._get_attr("text_data_transfer").startswith("2:")
+
+    _request_chunk(editor, "1", 0)      # replaced by the second document
+    _request_chunk(editor, "3", 0)
+    _request_chunk(editor, "2", -1)
+    _request_chunk(editor, "2", 100)    # past the end
+    editor.event_handlers["text_data_request"](Event("", "text_data_request", "not json"))
+    assert sent == []
+
+    _request_chunk(editor, "2", 0)
+    assert sent == [("text_data_chunk", {"id": "2", "seq": 0, "data": '[{"i'})]
+
+    # Small enough again, the transfer is over
+    editor.text_data_chunk_size = 1024
+    editor.text_data = [{"insert": "x\n"}]
+    assert not editor._get_attr("text_data_transfer")
+    _request_chunk(editor, "2", 1)
+    assert len(sent) == 1
+
+
+def test_autosave_settings_reach_the_client():
+    editor = FletQuill(autosave=False, autosave_debounce=0.5, autosave_max_wait=10, autosave_min_changes=3)
+    assert editor.autosave is False
+    assert editor.autosave_debounce == 0.5
+    assert editor.autosave_max_wait == 10.0
+    assert editor.autosave_min_changes == 3
+
+    editor.autosave = True
+    editor.autosave_min_changes = 1
+    assert editor.autosave is True and editor.autosave_min_changes == 1
+
+
+def test_dirty_follows_the_client_events():
+    calls = []
+    editor = FletQuill(on_dirty=lambda: calls.append("dirty"), on_clean=lambda: calls.append("clean"))
+    assert editor.dirty is False
+
+    editor.event_handlers["dirty"](Event("", "dirty", ""))
+    assert editor.dirty is True
+    editor.event_handlers["clean"](Event("", "clean", ""))
+    assert editor.dirty is False
+    assert calls == ["dirty", "clean"]
+
+
+def test_save_now_and_flush_ask_the_client_to_save():
+    editor = FletQuill()
+    sent = []
+    editor.invoke_method = lambda name, arguments=None, **kwargs: sent.append((name, arguments, kwargs))
+
+    editor.save_now()
+    editor.flush(timeout=2)
+    assert sent == [
+        ("save_now", None, {}),
+        ("save_now", {"sync": True}, {"wait_for_result": True, "wait_timeout": 2}),
+    ]
+
+
+def _sent_ops(sent) -> list:
+    name, arguments = sent[-1]
+    assert name == "apply_delta"
+    return json.loads(arguments["ops"])
+
+
+def test_edit_calls_send_change_deltas():
+    editor = FletQuill()
+    sent = _stub_invoke(editor)
+
+    editor.insert_text(0, "😀 hi")
+    assert _sent_ops(sent) == [{"insert": "😀 hi"}]
+    editor.insert_text(3, "bold", {"bold": True})
+    assert _sent_ops(sent) == [{"retain": 3}, {"insert": "bold", "attributes": {"bold": True}}]
+    editor.format_range(2, 5, {"italic": True, "bold": None})
+    assert _sent_ops(sent) == [{"retain": 2}, {"retain": 5, "attributes": {"italic": True, "bold": None}}]
+    editor.delete_range(4, 2)
+    assert _sent_ops(sent) == [{"retain": 4}, {"delete": 2}]
+    editor.delete_range(0, 1)
+    assert _sent_ops(sent) == [{"delete": 1}]
+
+    editor.apply_delta(Delta().retain(1).insert("x"))
+    assert _sent_ops(sent) == [{"retain": 1}, {"insert": "x"}]
+    editor.apply_delta([{"retain": 2}, {"insert": "y", "attributes": {"link": "https://example.com"}}])
+    assert _sent_ops(sent) == [{"retain": 2}, {"insert": "y", "attributes": {"link": "https://example.com"}}]
+    assert len(sent) == 7
+
+
+@pytest.mark.parametrize("call", [
+    lambda editor: editor.insert_text(-1, "x"),
+    lambda editor: editor.insert_text(1.5, "x"),
+    lambda editor: editor.insert_text(0, None),
+    lambda editor: editor.format_range(0, -2, {"bold": True}),
+    lambda editor: editor.delete_range(-3, 1),
+    lambda editor: editor.delete_range(0, "2"),
+    lambda editor: editor.apply_delta([{"bogus": 1}]),
+    lambda editor: editor.apply_delta("not ops"),
+])
+def test_bad_edit_calls_send_nothing(call):
+    editor = FletQuill()
+    sent = _stub_invoke(editor)
+    with pytest.raises((ValueError, TypeError)):
+        call(editor)
+    assert sent == []
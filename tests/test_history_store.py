@@ -0,0 +1,59 @@
+import pytest
+
+from flet_quill.history_store import HistoryStore
+from flet_quill.metrics import add_metrics_hook, remove_metrics_hook
+
+
+def test_background_writes_stay_in_order(tmp_path):
+    with HistoryStore(str(tmp_path)) as history:
+        history.commit_later([{"insert": "hello\n"}])
+        history.append_later([{"retain": 5}, {"insert": " world"}])
+        history.commit_later([{"insert": "hello world!\n"}])
+        history.flush()
+
+        assert history.head == 3
+        assert history.revision(1) == [{"insert": "hello\n"}]
+        assert history.revision(2) == [{"insert": "hello world\n"}]
+        assert history.document == [{"insert": "hello world!\n"}]
+
+
+def test_close_writes_what_was_queued(tmp_path):
+    history = HistoryStore(str(tmp_path))
+    history.commit_later([{"insert": "kept\n"}])
+    history.close()
+
+    with HistoryStore(str(tmp_path)) as reopened:
+        assert reopened.document == [{"insert": "kept\n"}]
+
+
+def test_failed_background_write_is_raised_by_flush(tmp_path):
+    events = []
+    add_metrics_hook(events.append)
+    try:
+        with HistoryStore(str(tmp_path)) as history:
+            def append(change_ops):
+                raise OSError("disk full")
+            history.append = append
+
+            history.commit_later([{"insert": "lost\n"}])
+            with pytest.raises(OSError, match="disk full"):
+                history.flush()
+            # Reported once, the next flush is clean
+            history.flush()
+            assert history.head == 0
+    finally:
+        remove_metrics_hook(events.append)
+
+    failed = [e for e in events if e["phase"] == "history_write" and not e["ok"]]
+    assert len(failed) == 1 and "disk full" in failed[0]["error"]
+
+
+def test_close_raises_a_failed_write(tmp_path):
+    history = HistoryStore(str(tmp_path))
+
+    def append(change_ops):
+        raise PermissionError("read only")
+    history.append = append
+    history.commit_later([{"insert": "lost\n"}])
+    with pytest.raises(PermissionError):
+        history.close()
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+
+import flet_quill
+
+# Converter backends are imported the first time their format is used, never by "import flet_quill"
+BACKENDS = ("pypdf", "docx", "markdown", "bs4", "striprtf", "lxml", "zipfile", "zstandard")
+
+# Some environments load zipfile at startup (.pth files), forget those so an import by flet_quill shows up
+_SCRIPT = f"""
+import json, sys
+for name in [name for name in sys.modules if name.split(".")[0] in {BACKENDS!r}]:
+    del sys.modules[name]
+before = set(sys.modules)
+import flet_quill
+print(json.dumps(sorted(set(sys.modules) - before)))
+"""
+
+
+def _modules_added_by(script: str) -> list:
+    # A fresh interpreter, finding flet_quill where this one did
+    src = os.path.dirname(os.path.dirname(os.path.abspath(flet_quill.__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_skips_converter_backends():
+    added = _modules_added_by(_SCRIPT)
+    assert "flet_quill" in added
+    loaded = [name for name in added if name.split(".")[0] in BACKENDS]
+    assert loaded == []
+
+
+def test_converting_imports_only_its_backend(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("hello\n", encoding="utf-8")
+    script = _SCRIPT.replace("import flet_quill", f"import flet_quill\nflet_quill.load_file_to_delta_ops({str(path)!r})")
+    added = _modules_added_by(script)
+    assert [name for name in added if name.split(".")[0] in BACKENDS] == []
@@ -0,0 +1,19 @@
+from flet_quill.search_index import SearchIndex
+
+
+def test_offsets_count_utf16_units():
+    index = SearchIndex()
+    index.update_document("notes", [
+        {"insert": "😀 hi "},
+        {"insert": {"image": "a.png"}},
+        {"insert": " there hi\n"},
+    ])
+    # The emoji is 2 units and the embed 1, like the editor counts them
+    assert index.search("hi") == [{"doc_id": "notes", "matches": [(3, 5), (14, 16)]}]
+    assert index.search("there hi") == [{"doc_id": "notes", "matches": [(8, 16)]}]
+
+
+def test_plain_text_offsets():
+    index = SearchIndex()
+    index.update_document("a", [{"insert": "Hello, world\n"}])
+    assert index.search("hello world") == [{"doc_id": "a", "matches": [(0, 12)]}]
@@ -0,0 +1,375 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from flet_quill import text_converter
+from flet_quill.delta import compact_delta
+from flet_quill.text_converter import (
+    STREAM_CHUNK_SIZE,
+    delta_from_html,
+    delta_from_md,
+    delta_from_pdf,
+    detect_mime,
+    iter_delta_from_json,
+    iter_delta_from_pdf,
+    iter_delta_ops,
+    load_file_to_delta_ops,
+)
+from flet_quill.text_exporter import export_delta_ops
+
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _zip(names) -> bytes:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as zf:
+        for name in names:
+            zf.writestr(name, "<xml/>")
+    return data.getvalue()
+
+
+def test_extension_beats_text_sniffing(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text('[{"insert": "not a delta"}]', encoding="utf-8")
+    assert detect_mime(str(path)) == "text/plain"
+    assert load_file_to_delta_ops(str(path))[0]["insert"].startswith('[{"insert"')
+
+
+def test_text_sniffing_without_extension(tmp_path):
+    path = tmp_path / "document"
+    path.write_text('[{"insert": "hello\\n"}]', encoding="utf-8")
+    assert detect_mime(str(path)) == "application/json"
+
+
+def test_magic_bytes_beat_extension(tmp_path):
+    path = tmp_path / "report.json"
+    path.write_bytes(b"%PDF-1.4\n")
+    assert detect_mime(str(path)) == "application/pdf"
+
+
+def test_docx_sniffing_needs_word_document(tmp_path):
+    docx = tmp_path / "document.bin"
+    docx.write_bytes(_zip(["[Content_Types].xml", "_rels/.rels", "word/document.xml"]))
+    assert detect_mime(str(docx)) == DOCX
+
+    for name, parts in (("sheet.xlsx", ["[Content_Types].xml", "xl/workbook.xml"]),
+                        ("slides.pptx", ["[Content_Types].xml", "ppt/presentation.xml"])):
+        path = tmp_path / name
+        path.write_bytes(_zip(parts))
+        assert detect_mime(str(path)) is None
+
+
+def test_streamed_json_with_ops_bigger_than_a_chunk(tmp_path):
+    ops = [
+        {"insert": "x" * (5 * STREAM_CHUNK_SIZE + 7)},
+        {"insert": "bold", "attributes": {"bold": True}},
+        {"insert": "y" * (2 * STREAM_CHUNK_SIZE) + "\n"},
+    ]
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps(ops), encoding="utf-8")
+    assert list(iter_delta_from_json(str(path))) == ops
+
+
+def test_html_without_closing_head_keeps_the_body(tmp_path):
+    path = tmp_path / "report.html"
+    path.write_text(
+        '<html><head><meta charset="utf-8"><title>T</title>\n'
+        "<body><h1>Report</h1><p>Body text</p></body></html>",
+        encoding="utf-8",
+    )
+    assert load_file_to_delta_ops(str(path)) == [
+        {"insert": "Report"},
+        {"insert": "\n", "attributes": {"header": 1}},
+        {"insert": "Body text\n"},
+    ]
+
+
+def test_html_head_text_is_skipped(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text(
+        "<html><head><title>T</title><style>p { color: red }</style><script>x = 1</script></head>"
+        "<body><p>Hello</p></body></html>",
+        encoding="utf-8",
+    )
+    assert load_file_to_delta_ops(str(path)) == [{"insert": "Hello\n"}]
+
+
+def _markdown(tmp_path, text):
+    path = tmp_path / "doc.md"
+    path.write_text(text, encoding="utf-8")
+    return compact_delta(delta_from_md(str(path)))
+
+
+def test_markdown_nested_lists(tmp_path):
+    assert _markdown(tmp_path, "1. first\n2. second\n   - nested\n     1. deeper\n- [ ] todo\n- [x] done\n") == [
+        {"insert": "first"},
+        {"insert": "\n", "attributes": {"list": "ordered"}},
+        {"insert": "second"},
+        {"insert": "\n", "attributes": {"list": "ordered"}},
+        {"insert": "nested"},
+        {"insert": "\n", "attributes": {"list": "bullet", "indent": 1}},
+        {"insert": "deeper"},
+        {"insert": "\n", "attributes": {"list": "ordered", "indent": 2}},
+        {"insert": "todo"},
+        {"insert": "\n", "attributes": {"list": "unchecked"}},
+        {"insert": "done"},
+        {"insert": "\n", "attributes": {"list": "checked"}},
+    ]
+
+
+def test_markdown_code_blocks(tmp_path):
+    code = {"code-block": True}
+    assert _markdown(tmp_path, "```python\ndef f():\n    return *1*\n```\n\n~~~\nx\n~~~\n") == [
+        {"insert": "def f():"},
+        {"insert": "\n", "attributes": code},
+        {"insert": "    return *1*"},
+        {"insert": "\n", "attributes": code},
+        {"insert": "x"},
+        {"insert": "\n", "attributes": code},
+    ]
+    assert _markdown(tmp_path, "para\n\n    code line\n      more\n") == [
+        {"insert": "para\ncode line"},
+        {"insert": "\n", "attributes": code},
+        {"insert": "  more"},
+        {"insert": "\n", "attributes": code},
+    ]
+
+
+def test_markdown_headers(tmp_path):
+    assert _markdown(tmp_path, "# One\n### Three ###\nTitle\n=====\nSub\n---\n") == [
+        {"insert": "One"},
+        {"insert": "\n", "attributes": {"header": 1}},
+        {"insert": "Three"},
+        {"insert": "\n", "attributes": {"header": 3}},
+        {"insert": "Title"},
+        {"insert": "\n", "attributes": {"header": 1}},
+        {"insert": "Sub"},
+        {"insert": "\n", "attributes": {"header": 2}},
+    ]
+
+
+def test_markdown_emphasis_and_code_spans(tmp_path):
+    assert _markdown(tmp_path, "*it* **bold** ***both*** _u_ ~~gone~~ `co*de*` 2*3*4\n") == [
+        {"insert": "it", "attributes": {"italic": True}},
+        {"insert": " "},
+        {"insert": "bold", "attributes": {"bold": True}},
+        {"insert": " "},
+        {"insert": "both", "attributes": {"bold": True, "italic": True}},
+        {"insert": " "},
+        {"insert": "u", "attributes": {"italic": True}},
+        {"insert": " "},
+        {"insert": "gone", "attributes": {"strike": True}},
+        {"insert": " "},
+        {"insert": "co*de*", "attributes": {"code": True}},
+        {"insert": " 2"},
+        {"insert": "3", "attributes": {"italic": True}},
+        {"insert": "4\n"},
+    ]
+
+
+def test_markdown_links(tmp_path):
+    assert _markdown(tmp_path, '[site](http://a.com "t"), [ref][r], [r] and ![alt](img.png)\n\n[r]: http://r.com\n') == [
+        {"insert": "site", "attributes": {"link": "http://a.com"}},
+        {"insert": ", "},
+        {"insert": "ref", "attributes": {"link": "http://r.com"}},
+        {"insert": ", "},
+        {"insert": "r", "attributes": {"link": "http://r.com"}},
+        {"insert": " and "},
+        {"insert": {"image": "img.png"}},
+        {"insert": "\n"},
+    ]
+
+
+def test_markdown_blockquote_and_table(tmp_path):
+    assert _markdown(tmp_path, "> quoted **text**\n> more\n\n| a | b |\n|---|:-:|\n| 1 | `2` |\n") == [
+        {"insert": "quoted "},
+        {"insert": "text", "attributes": {"bold": True}},
+        {"insert": " more"},
+        {"insert": "\n", "attributes": {"blockquote": True}},
+        {"insert": "a", "attributes": {"bold": True}},
+        {"insert": "\t"},
+        {"insert": "b", "attributes": {"bold": True}},
+        {"insert": "\n1\t"},
+        {"insert": "2", "attributes": {"code": True}},
+        {"insert": "\n"},
+    ]
+
+
+def test_markdown_hard_breaks_leave_no_spaces(tmp_path):
+    assert _markdown(tmp_path, "one  \ntwo\\\nthree <br> four *five* <br>six\n") == [
+        {"insert": "one\ntwo\nthree\nfour "},
+        {"insert": "five", "attributes": {"italic": True}},
+        {"insert": "\nsix\n"},
+    ]
+
+
+def test_markdown_hard_break_keeps_one_list_item(tmp_path):
+    # The line after the break carries on the item, like a second paragraph in it would
+    assert _markdown(tmp_path, "- one  \n  two\n- three<br>four\n  - nested\n") == [
+        {"insert": "one"},
+        {"insert": "\n", "attributes": {"list": "bullet"}},
+        {"insert": "two"},
+        {"insert": "\n", "attributes": {"indent": 1}},
+        {"insert": "three"},
+        {"insert": "\n", "attributes": {"list": "bullet"}},
+        {"insert": "four"},
+        {"insert": "\n", "attributes": {"indent": 1}},
+        {"insert": "nested"},
+        {"insert": "\n", "attributes": {"list": "bullet", "indent": 1}},
+    ]
+
+
+def _html(tmp_path, html):
+    path = tmp_path / "doc.html"
+    path.write_text(html, encoding="utf-8")
+    return compact_delta(delta_from_html(str(path)))
+
+
+def test_html_inline_attributes(tmp_path):
+    assert _html(tmp_path, (
+        '<p><b>b</b> <i>i</i> <u>u</u> <s>s</s> <a href="http://x">a</a> <code>c</code> '
+        '<strong><em>bi</em></strong> <span style="font-weight:bold;color:#ff0000">st</span></p>'
+    )) == [
+        {"insert": "b", "attributes": {"bold": True}},
+        {"insert": " "},
+        {"insert": "i", "attributes": {"italic": True}},
+        {"insert": " "},
+        {"insert": "u", "attributes": {"underline": True}},
+        {"insert": " "},
+        {"insert": "s", "attributes": {"strike": True}},
+        {"insert": " "},
+        {"insert": "a", "attributes": {"link": "http://x"}},
+        {"insert": " "},
+        {"insert": "c", "attributes": {"code": True}},
+        {"insert": " "},
+        {"insert": "bi", "attributes": {"bold": True, "italic": True}},
+        {"insert": " "},
+        {"insert": "st", "attributes": {"bold": True, "color": "#ff0000"}},
+        {"insert": "\n"},
+    ]
+
+
+def test_html_block_attributes(tmp_path):
+    assert _html(tmp_path, "<h1>H</h1><h3>h3</h3><blockquote>q</blockquote><pre>\n  a\n b</pre>") == [
+        {"insert": "H"},
+        {"insert": "\n", "attributes": {"header": 1}},
+        {"insert": "h3"},
+        {"insert": "\n", "attributes": {"header": 3}},
+        {"insert": "q"},
+        {"insert": "\n", "attributes": {"blockquote": True}},
+        {"insert": "  a"},
+        {"insert": "\n", "attributes": {"code-block": True}},
+        {"insert": " b"},
+        {"insert": "\n", "attributes": {"code-block": True}},
+    ]
+
+
+def test_html_nested_lists(tmp_path):
+    assert _html(tmp_path, "<ul><li>a<ol><li>b</li><li>c</li></ol></li><li>d</li></ul>") == [
+        {"insert": "a"},
+        {"insert": "\n", "attributes": {"list": "bullet"}},
+        {"insert": "b"},
+        {"insert": "\n", "attributes": {"list": "ordered", "indent": 1}},
+        {"insert": "c"},
+        {"insert": "\n", "attributes": {"list": "ordered", "indent": 1}},
+        {"insert": "d"},
+        {"insert": "\n", "attributes": {"list": "bullet"}},
+    ]
+
+
+def test_html_unclosed_li_and_p(tmp_path):
+    assert _html(tmp_path, "<ul><li>one<li>two</ul><p>p1<p>p2") == [
+        {"insert": "one"},
+        {"insert": "\n", "attributes": {"list": "bullet"}},
+        {"insert": "two"},
+        {"insert": "\n", "attributes": {"list": "bullet"}},
+        {"insert": "p1\np2\n"},
+    ]
+
+
+def test_html_whitespace_collapses(tmp_path):
+    assert _html(tmp_path, "<p>  lots   of\n\n  space <b> bold </b> end  </p>") == [
+        {"insert": "lots of space "},
+        {"insert": "bold ", "attributes": {"bold": True}},
+        {"insert": "end\n"},
+    ]
+
+
+def test_html_tables_breaks_and_embeds(tmp_path):
+    assert _html(tmp_path, (
+        "<table><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>2</td></tr></table>"
+        "<p>a<br>b</p><hr><img src='x.png'>"
+    )) == [
+        {"insert": "A\tB\n1\t2\na\nb\n"},
+        {"insert": {"divider": True}},
+        {"insert": "\n"},
+        {"insert": {"image": "x.png"}},
+        {"insert": "\n"},
+    ]
+
+
+def test_html_small_chunks_match_one_read(tmp_path, monkeypatch):
+    html = (
+        "<html><head><title>T</title></head><body><h2>Title &amp; more</h2>"
+        "<p>line1 <b>bold <i>both</i></b> plain&nbsp;text</p><pre>\n code\n  kept</pre>"
+        "<ul><li>one<li>two <a href='u'>link</a></ul><table><tr><td>x<td>y</table></body></html>"
+    )
+    whole = _html(tmp_path, html)
+    monkeypatch.setattr(text_converter, "STREAM_CHUNK_SIZE", 7)
+    assert _html(tmp_path, html) == whole
+
+
+# About 49 lines fit on a page, so this is 9 pages of "Line n"
+def _pdf(tmp_path):
+    pytest.importorskip("pypdf")
+    path = tmp_path / "pages.pdf"
+    export_delta_ops([{"insert": "".join(f"Line {i}\n" for i in range(400))}], str(path))
+    return str(path)
+
+
+def _lines(ops):
+    return "".join(op["insert"] for op in ops).split()
+
+
+def test_pdf_parallel_matches_serial(tmp_path, monkeypatch):
+    path = _pdf(tmp_path)
+    serial = delta_from_pdf(path)
+    assert _lines(serial)[:4] == ["Line", "0", "Line", "1"] and _lines(serial)[-1] == "399"
+
+    # Chunks of 2 pages, so the 9 pages go out as 5 tasks
+    monkeypatch.setattr(text_converter, "PDF_PAGES_PER_TASK", 2)
+    progress = []
+    assert delta_from_pdf(path, workers=2, on_progress=lambda done, total: progress.append((done, total))) == serial
+    assert progress[-1] == (9, 9)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+    assert len(progress) == 5
+
+
+def test_pdf_page_range_and_max_pages(tmp_path):
+    path = _pdf(tmp_path)
+    whole = delta_from_pdf(path)
+    first_page = _lines(delta_from_pdf(path, max_pages=1))
+    assert first_page[:2] == ["Line", "0"] and len(first_page) < len(_lines(whole)) // 5
+
+    progress = []
+    middle = delta_from_pdf(path, page_range=(2, 4), on_progress=lambda done, total: progress.append((done, total)))
+    assert progress == [(1, 2), (2, 2)]
+    # Pages 2 and 3 are what the pages after the first two hold
+    assert _lines(middle) == _lines(delta_from_pdf(path, page_range=(2, 100), max_pages=2))
+    assert "Line" in _lines(middle) and _lines(middle)[1] not in first_page
+
+    # Clamped to the document, an empty range is an empty document
+    assert delta_from_pdf(path, page_range=(-5, 100)) == whole
+    assert delta_from_pdf(path, page_range=(20, 30)) == [{"insert": "\n"}]
+
+
+def test_streamed_pdf_takes_the_same_options(tmp_path):
+    path = _pdf(tmp_path)
+    assert compact_delta(iter_delta_from_pdf(path)) == delta_from_pdf(path)
+    progress = []
+    streamed = iter_delta_from_pdf(path, page_range=(1, 9), max_pages=3, on_progress=lambda *a: progress.append(a))
+    assert compact_delta(streamed) == delta_from_pdf(path, page_range=(1, 4))
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert compact_delta(iter_delta_ops(path, max_pages=1)) == delta_from_pdf(path, max_pages=1)
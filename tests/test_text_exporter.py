@@ -0,0 +1,14 @@
+import pytest
+
+from flet_quill.text_exporter import export_delta_ops
+
+
+def test_pdf_keeps_latin_characters(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    path = tmp_path / "out.pdf"
+    export_delta_ops([{"insert": "Café “quoted” €5\n"}, {"insert": "naïve ā 😀\n"}], str(path))
+
+    text = pypdf.PdfReader(str(path)).pages[0].extract_text()
+    assert "Café “quoted” €5" in text
+    # Outside WinAnsiEncoding: the plain letter if there is one, else ?
+    assert "naïve a ?" in text